@@ -20,6 +20,9 @@ class Config:
         self.DB_NAME = os.getenv('DB_NAME', 'postgres')
         self.DB_USER = os.getenv('DB_USER', 'postgres')
         self.DB_PASSWORD = os.getenv('DB_PASSWORD', '')
+        self.DB_POOL_MIN_CONNECTIONS = int(os.getenv('DB_POOL_MIN_CONNECTIONS', 1))
+        self.DB_POOL_MAX_CONNECTIONS = int(os.getenv('DB_POOL_MAX_CONNECTIONS', 10))
+        self.DB_HEALTH_CHECK_INTERVAL = float(os.getenv('DB_HEALTH_CHECK_INTERVAL_SECONDS', 30))
         
         # AI Configuration
         self.OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
@@ -36,6 +39,7 @@ class Config:
         # Processing Configuration
         self.BATCH_SIZE = int(os.getenv('BATCH_SIZE', 50))
         self.MAX_CONCURRENT_REQUESTS = int(os.getenv('MAX_CONCURRENT_REQUESTS', 5))
+        self.OPENAI_MAX_CONCURRENCY = int(os.getenv('OPENAI_MAX_CONCURRENCY', 32))
         self.PROCESSING_TIMEOUT = int(os.getenv('PROCESSING_TIMEOUT_SECONDS', 300))
         
         # Logging
@@ -70,6 +74,7 @@ class Config:
             'rate_limits': self.RATE_LIMITS,
             'batch_size': self.BATCH_SIZE,
             'max_concurrent_requests': self.MAX_CONCURRENT_REQUESTS,
+            'openai_max_concurrency': self.OPENAI_MAX_CONCURRENCY,
             'log_level': self.LOG_LEVEL
         }
 
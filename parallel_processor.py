@@ -1,38 +1,53 @@
 #!/usr/bin/env python3
 """
 Parallel Product-Specific AI Processor
-Run different products in separate terminals for faster processing
+Run any number of these, for the same or different companies, in separate
+terminals or on other hosts: reviews are leased from the backlog, so no two
+workers analyze the same review
 """
 
 import os
 import sys
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Dict, Optional
 
-sys.path.append('/Users/yhuchchannavar/Documents/consumer-security-analysis-v3/src')
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
 
-from supabase import create_client
 from dotenv import load_dotenv
 from openai import OpenAI
 
+from analysis.analysis_cache import AnalysisCache, get_analysis_cache
+from analysis.rate_limiter import create_chat_completion, get_openai_rate_limiter, is_transient_error
+from analysis.work_queue import AnalysisWorkQueue
+from database.manager import BulkResultWriter, get_db_manager
+from database.metadata_registry import get_metadata_registry
+
 load_dotenv()
 
+# Bump when the prompt below changes so cached analyses are not reused
+PROMPT_VERSION = 'parallel-3.1'
+
 class ParallelProductProcessor:
     """Process specific products in parallel terminals"""
     
     def __init__(self, target_company: str = None):
-        # Initialize clients
-        self.supabase = create_client(
-            os.getenv('SUPABASE_URL'),
-            os.getenv('SUPABASE_ANON_KEY')
-        )
-        self.openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        # Initialize clients (Supabase through the shared, pooled database manager)
+        self.db_manager = get_db_manager()
+        self.supabase = self.db_manager.supabase
+        self.metadata = get_metadata_registry()
+        # Retries go through the shared rate limiter, not the SDK's own backoff
+        self.openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'), max_retries=0)
+        self.rate_limiter = get_openai_rate_limiter()
+        self.cache = get_analysis_cache()
         
         # Processing configuration
         self.batch_size = 500
-        self.processing_delay = 1.0
+        self.result_writer = BulkResultWriter(self.db_manager, flush_size=self.batch_size)
+        # Claimed reviews are leased to this worker until their results are written
+        self.work_queue = AnalysisWorkQueue(self.db_manager)
         self.target_company = target_company
         
         # Year priority (same as main processor)
@@ -55,36 +70,14 @@ class ParallelProductProcessor:
         """Get product IDs for the target company"""
         
         try:
-            products_result = self.supabase.table('products').select('id, name, company').execute()
-            products = products_result.data
-            
-            company_patterns = {
-                'Norton': ['Norton', 'NorTech', 'Broadcom'],
-                'Bitdefender': ['Bitdefender'],
-                'McAfee': ['McAfee', 'Intel Security'],
-                'Kaspersky': ['Kaspersky'],
-                'AVG': ['AVG', 'AVG Technologies'],
-                'Avast': ['Avast'],
-                'ESET': ['ESET'],
-                'Trend Micro': ['Trend Micro'],
-                'Malwarebytes': ['Malwarebytes']
-            }
-            
-            target_patterns = company_patterns.get(self.target_company, [self.target_company])
-            matching_ids = []
-            
-            for product in products:
-                company = product['company']
-                for pattern in target_patterns:
-                    if pattern.lower() in company.lower():
-                        matching_ids.append(product['id'])
-                        break
-            
+            # Company aliases (e.g. Norton -> NorTech, Broadcom) live in the metadata registry
+            matching_ids = self.metadata.product_ids_for_company(self.target_company)
+                
             print(f"🎯 TARGET: {self.target_company}")
             print(f"📦 Found {len(matching_ids)} products: {matching_ids}")
-            
+                
             return matching_ids
-            
+                
         except Exception as e:
             print(f"❌ Error getting product IDs: {e}")
             return []
@@ -96,41 +89,27 @@ class ParallelProductProcessor:
             return {}
         
         try:
-            result = self.supabase.table('reviews').select(
-                'review_date'
-            ).is_('processed_at', 'null').in_('product_id', self.product_ids).execute()
-            
-            reviews = result.data
-            year_counts = {}
-            
-            for review in reviews:
-                try:
-                    review_date = review['review_date']
-                    if isinstance(review_date, str):
-                        year = int(review_date[:4])
-                    else:
-                        year = review_date.year
-                    
-                    year_counts[year] = year_counts.get(year, 0) + 1
-                except:
-                    continue
-            
+            rows = self.db_manager.get_review_aggregates(
+                group_by=['year'], product_ids=self.product_ids, unprocessed_only=True
+            )
+            year_counts = {row['year']: row['review_count'] for row in rows}
+                
             print(f"\n📊 UNPROCESSED REVIEWS FOR {self.target_company}:")
             total = 0
             for year in sorted(year_counts.keys(), reverse=True):
                 count = year_counts[year]
                 total += count
                 print(f"   📅 {year}: {count:,} reviews")
-            
+                
             print(f"   🎯 TOTAL: {total:,} unprocessed reviews")
             return year_counts
-            
+                
         except Exception as e:
             print(f"❌ Error getting unprocessed count: {e}")
             return {}
     
     def get_prioritized_batch(self, batch_size: int = 500) -> List[Dict]:
-        """Get next batch for target company by year priority"""
+        """Claim next batch for target company by year priority"""
         
         if not self.product_ids:
             return []
@@ -138,37 +117,32 @@ class ParallelProductProcessor:
         try:
             # Try each year in priority order
             for year in self.year_priority:
-                result = self.supabase.table('reviews').select(
-                    'id, content, rating, product_id, review_date'
-                ).is_('processed_at', 'null').in_('product_id', self.product_ids).gte(
-                    'review_date', f'{year}-01-01'
-                ).lt('review_date', f'{year + 1}-01-01').limit(batch_size).execute()
-                
-                reviews = result.data
+                reviews = self.work_queue.claim(batch_size, product_ids=self.product_ids, year=year)
                 
                 if reviews:
-                    print(f"🎯 Found {len(reviews)} {self.target_company} reviews from {year}")
+                    print(f"🎯 Claimed {len(reviews)} {self.target_company} reviews from {year}")
                     self.stats['current_year'] = year
                     return reviews
-            
-            # If no priority year reviews, get any unprocessed
-            result = self.supabase.table('reviews').select(
-                'id, content, rating, product_id, review_date'
-            ).is_('processed_at', 'null').in_('product_id', self.product_ids).limit(batch_size).execute()
-            
-            reviews = result.data
+                
+            # If no priority year reviews, claim any unprocessed
+            reviews = self.work_queue.claim(batch_size, product_ids=self.product_ids)
             if reviews:
-                print(f"🔄 Found {len(reviews)} {self.target_company} reviews (mixed years)")
+                print(f"🔄 Claimed {len(reviews)} {self.target_company} reviews (mixed years)")
                 self.stats['current_year'] = 'Mixed'
-            
+                
             return reviews
-            
+                
         except Exception as e:
-            print(f"❌ Error fetching batch: {e}")
+            print(f"❌ Error claiming batch: {e}")
             return []
     
     def analyze_review_with_openai(self, review_content: str, product_info: str) -> Optional[Dict]:
-        """Analyze single review with OpenAI GPT-4o-mini"""
+        """Analyze single review with OpenAI GPT-4o-mini (raises on API or JSON errors)"""
+        
+        cache_key = AnalysisCache.make_key(review_content, product_info, PROMPT_VERSION, 'gpt-4o-mini')
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return dict(cached, processed_at=datetime.utcnow().isoformat())
         
         prompt = f"""Analyze this product review for {product_info}:
 
@@ -184,48 +158,39 @@ Please provide a JSON response with:
 
 Return only valid JSON without any markdown formatting."""
 
-        try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are an expert at analyzing customer reviews for cybersecurity products. Always respond with valid JSON only."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=400,
-                temperature=0.1
-            )
-            
-            content = response.choices[0].message.content.strip()
-            analysis = json.loads(content)
-            
-            # Add metadata
-            analysis['ai_model_used'] = 'gpt-4o-mini'
-            analysis['processing_version'] = '3.1'
-            analysis['processed_at'] = datetime.utcnow().isoformat()
-            
-            return analysis
-            
-        except Exception as e:
-            print(f"❌ OpenAI API error: {e}")
-            return None
+        response = create_chat_completion(
+            self.openai_client, self.rate_limiter,
+            label="review analysis",
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": "You are an expert at analyzing customer reviews for cybersecurity products. Always respond with valid JSON only."},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=400,
+            temperature=0.1
+        )
+        
+        content = response.choices[0].message.content.strip()
+        analysis = json.loads(content)
+        
+        # Add metadata
+        analysis['ai_model_used'] = 'gpt-4o-mini'
+        analysis['processing_version'] = '3.1'
+        analysis['processed_at'] = datetime.utcnow().isoformat()
+        
+        self.cache.set(cache_key, analysis)
+        return analysis
     
     def get_product_info(self, product_id: int) -> str:
         """Get product name and company for context"""
         
         try:
-            result = self.supabase.table('products').select(
-                'name, company'
-            ).eq('id', product_id).execute()
-            
-            if result.data:
-                product = result.data[0]
-                return f"{product['name']} by {product['company']}"
-            return "Unknown Product"
+            return self.metadata.product_label(product_id)
         except:
             return "Unknown Product"
     
     def update_review_with_analysis(self, review_id: int, analysis: Dict) -> bool:
-        """Update review with AI analysis results"""
+        """Queue review update with AI analysis results (written in bulk)"""
         
         try:
             update_data = {
@@ -233,16 +198,16 @@ Return only valid JSON without any markdown formatting."""
                 'sentiment_score': analysis.get('sentiment_score', 0.0),
                 'sentiment_label': analysis.get('sentiment_label', 'neutral'),
                 'confidence_score': analysis.get('confidence_score', 0.0),
-                'key_topics': json.dumps(analysis.get('key_topics', [])),
-                'issues_mentioned': json.dumps(analysis.get('issues_mentioned', [])),
+                'key_topics': analysis.get('key_topics', []),
+                'issues_mentioned': analysis.get('issues_mentioned', []),
                 'priority_level': analysis.get('priority_level', 'low'),
                 'ai_model_used': analysis.get('ai_model_used', 'gpt-4o-mini'),
                 'processing_version': analysis.get('processing_version', '3.1')
             }
-            
-            result = self.supabase.table('reviews').update(update_data).eq('id', review_id).execute()
+                
+            self.result_writer.add(review_id, update_data)
             return True
-            
+                
         except Exception as e:
             print(f"❌ Error updating review {review_id}: {e}")
             return False
@@ -265,35 +230,67 @@ Return only valid JSON without any markdown formatting."""
         
         print(f"🔄 Processing {self.target_company} batch of {len(reviews)} reviews...")
         
-        for i, review in enumerate(reviews):
-            try:
-                product_info = product_cache[review['product_id']]
-                
-                # Analyze with OpenAI
-                analysis = self.analyze_review_with_openai(review['content'], product_info)
+        # (review_id, error) for reviews whose analysis failed; they back off instead of topping the next batch
+        failures = []
+        
+        def analyze(review: Dict) -> Optional[Dict]:
+            return self.analyze_review_with_openai(review['content'], product_cache[review['product_id']])
+        
+        # The shared rate limiter decides how many requests are actually in flight
+        with ThreadPoolExecutor(max_workers=self.rate_limiter.max_concurrency) as pool:
+            futures = [pool.submit(analyze, review) for review in reviews]
                 
-                if analysis:
-                    if self.update_review_with_analysis(review['id'], analysis):
-                        batch_stats['processed'] += 1
-                        self.stats['total_processed'] += 1
-                        
-                        # Progress indicator
-                        if (i + 1) % 100 == 0:
-                            print(f"   ✅ {self.target_company}: {i + 1}/{len(reviews)} processed")
+            for i, (review, future) in enumerate(zip(reviews, futures)):
+                try:
+                    analysis = future.result()
+                    
+                    if analysis:
+                        if self.update_review_with_analysis(review['id'], analysis):
+                            batch_stats['processed'] += 1
+                            self.stats['total_processed'] += 1
+                            
+                            # Progress indicator
+                            if (i + 1) % 100 == 0:
+                                print(f"   ✅ {self.target_company}: {i + 1}/{len(reviews)} processed")
+                        else:
+                            batch_stats['errors'] += 1
+                            self.stats['total_errors'] += 1
                     else:
+                        failures.append((review['id'], 'Empty analysis'))
                         batch_stats['errors'] += 1
                         self.stats['total_errors'] += 1
-                else:
+                    
+                except Exception as e:
+                    print(f"❌ Error processing review {review['id']}: {e}")
+                    # Outages and exhausted rate-limit retries are not the review's fault
+                    if not is_transient_error(e):
+                        failures.append((review['id'], f"{type(e).__name__}: {e}"))
                     batch_stats['errors'] += 1
                     self.stats['total_errors'] += 1
-                
-                # Small delay between reviews
-                time.sleep(0.1)
-                
+        
+        if failures:
+            try:
+                recorded = self.db_manager.record_analysis_failures(failures)
+                if recorded['dead_lettered']:
+                    print(f"☠️ {recorded['dead_lettered']} {self.target_company} reviews dead-lettered")
             except Exception as e:
-                print(f"❌ Error processing review {review['id']}: {e}")
-                batch_stats['errors'] += 1
-                self.stats['total_errors'] += 1
+                print(f"❌ Could not record {len(failures)} analysis failures: {e}")
+        
+        # Write out anything still buffered so the next batch query sees these rows as processed
+        failed_before = self.result_writer.failed
+        self.result_writer.flush()
+        write_failures = self.result_writer.failed - failed_before
+        if write_failures:
+            batch_stats['processed'] -= write_failures
+            batch_stats['errors'] += write_failures
+            self.stats['total_processed'] -= write_failures
+            self.stats['total_errors'] += write_failures
+        
+        # Results and failures are written: analyzed reviews have left the backlog, the rest go back to it
+        try:
+            self.work_queue.release([review['id'] for review in reviews])
+        except Exception as e:
+            print(f"⚠️ Could not release leases (they expire on their own): {e}")
         
         batch_time = time.time() - batch_stats['start_time']
         self.stats['batches_completed'] += 1
@@ -320,45 +317,44 @@ Return only valid JSON without any markdown formatting."""
         
         batch_count = 0
         
-        while True:
-            # Check if we should stop
-            if max_batches and batch_count >= max_batches:
-                print(f"\n🛑 Reached maximum batch limit: {max_batches}")
-                break
-            
-            # Get next batch
-            reviews = self.get_prioritized_batch(self.batch_size)
-            
-            if not reviews:
-                print(f"\n🎉 All {self.target_company} reviews processed!")
-                break
-            
-            batch_count += 1
-            print(f"\n📦 {self.target_company} BATCH {batch_count}")
-            print(f"Current Year: {self.stats['current_year']}")
-            
-            # Process batch
-            batch_stats = self.process_batch(reviews)
-            
-            # Show progress
-            elapsed_time = datetime.now() - self.stats['start_time']
-            processing_rate = self.stats['total_processed'] / elapsed_time.total_seconds() * 60
-            
-            print(f"\n📊 {self.target_company} PROGRESS")
-            print(f"   Total Processed: {self.stats['total_processed']:,}")
-            print(f"   Total Errors: {self.stats['total_errors']:,}")
-            print(f"   Batches Completed: {self.stats['batches_completed']}")
-            print(f"   Processing Rate: {processing_rate:.1f} reviews/minute")
-            print(f"   Elapsed Time: {elapsed_time}")
-            
-            if self.stats['total_processed'] > 0:
-                success_rate = (self.stats['total_processed'] / (self.stats['total_processed'] + self.stats['total_errors'])) * 100
-                print(f"   Success Rate: {success_rate:.1f}%")
-            
-            # Delay between batches
-            if reviews and len(reviews) == self.batch_size:
-                print(f"⏸️ Waiting {self.processing_delay}s before next {self.target_company} batch...")
-                time.sleep(self.processing_delay)
+        # Hand back any leases still held, even when interrupted
+        try:
+            while True:
+                # Check if we should stop
+                if max_batches and batch_count >= max_batches:
+                    print(f"\n🛑 Reached maximum batch limit: {max_batches}")
+                    break
+                
+                # Get next batch
+                reviews = self.get_prioritized_batch(self.batch_size)
+                
+                if not reviews:
+                    print(f"\n🎉 All {self.target_company} reviews processed!")
+                    break
+                
+                batch_count += 1
+                print(f"\n📦 {self.target_company} BATCH {batch_count}")
+                print(f"Current Year: {self.stats['current_year']}")
+                
+                # Process batch
+                batch_stats = self.process_batch(reviews)
+                
+                # Show progress
+                elapsed_time = datetime.now() - self.stats['start_time']
+                processing_rate = self.stats['total_processed'] / elapsed_time.total_seconds() * 60
+                
+                print(f"\n📊 {self.target_company} PROGRESS")
+                print(f"   Total Processed: {self.stats['total_processed']:,}")
+                print(f"   Total Errors: {self.stats['total_errors']:,}")
+                print(f"   Batches Completed: {self.stats['batches_completed']}")
+                print(f"   Processing Rate: {processing_rate:.1f} reviews/minute")
+                print(f"   Elapsed Time: {elapsed_time}")
+                
+                if self.stats['total_processed'] > 0:
+                    success_rate = (self.stats['total_processed'] / (self.stats['total_processed'] + self.stats['total_errors'])) * 100
+                    print(f"   Success Rate: {success_rate:.1f}%")
+        finally:
+            self.work_queue.close()
         
         # Final summary
         total_time = datetime.now() - self.stats['start_time']
@@ -366,6 +362,8 @@ Return only valid JSON without any markdown formatting."""
         print(f"Total Processed: {self.stats['total_processed']:,}")
         print(f"Total Errors: {self.stats['total_errors']:,}")
         print(f"Total Time: {total_time}")
+        cache_stats = self.cache.stats()
+        print(f"Cache Hits: {cache_stats['hits']:,} ({cache_stats['hit_rate'] * 100:.1f}%)")
         if total_time.total_seconds() > 0:
             print(f"Average Rate: {self.stats['total_processed'] / total_time.total_seconds() * 60:.1f} reviews/minute")
 
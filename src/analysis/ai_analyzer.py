@@ -26,19 +26,242 @@ load_dotenv(env_path)
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database.manager import DatabaseManager, get_db_manager
+from database.metadata_registry import get_metadata_registry
+from analysis.analysis_cache import AnalysisCache, get_analysis_cache
+from analysis.rate_limiter import create_chat_completion, get_openai_rate_limiter
+from analysis.work_queue import AnalysisWorkQueue
 
 logger = logging.getLogger(__name__)
 
+ANALYSIS_MODEL = "gpt-4o-mini"  # Using the efficient model for analysis
+ANALYSIS_MAX_TOKENS = 300
+ANALYSIS_SYSTEM_PROMPT = "You are an expert business analyst. Respond only with valid JSON."
+PROCESSING_VERSION = '2.1'
+ANALYSIS_REVIEW_CHARS = 300
+
+# Bump when the prompt or schema changes so cached analyses are not reused
+PROMPT_VERSION = 'comprehensive-2.1'
+
+def build_analysis_prompt(review_text: str, product_name: str = "antivirus software") -> str:
+    """Build the single-review analysis prompt"""
+    return f"""Analyze this review for {product_name}. JSON only:
+
+{{
+    "sentiment": {{"score": 0.5, "label": "positive", "confidence": 0.8}},
+    "topics": ["performance"],
+    "issues_mentioned": [],
+    "business_intelligence": {{"priority_level": "low", "requires_response": false, "churn_risk": "low", "upsell_opportunity": false}},
+    "intent_analysis": {{"primary_intent": "praise", "switching_intent": false, "recommendation_intent": true}},
+    "summary": "Brief summary"
+}}
+
+Review: "{review_text[:ANALYSIS_REVIEW_CHARS]}"""
+
+def build_analysis_messages(review_text: str, product_name: str = "antivirus software") -> List[Dict[str, str]]:
+    """Build the chat messages for a single-review analysis request"""
+    return [
+        {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+        {"role": "user", "content": build_analysis_prompt(review_text, product_name)}
+    ]
+
+def extract_json_text(response_text: str) -> str:
+    """Strip markdown fences and surrounding chatter from a model response"""
+    response_text = response_text.strip()
+    
+    # Try to clean up the response if it has extra text
+    if response_text.startswith('```json'):
+        response_text = response_text.replace('```json', '').replace('```', '').strip()
+    elif response_text.startswith('```'):
+        response_text = response_text.replace('```', '').strip()
+    
+    # Find JSON in the response
+    json_start = response_text.find('{')
+    json_end = response_text.rfind('}') + 1
+    
+    if json_start >= 0 and json_end > json_start:
+        return response_text[json_start:json_end]
+    return response_text
+
+def normalize_analysis(result: Dict[str, Any], model: str) -> Dict[str, Any]:
+    """Add metadata and fill in defaults for missing analysis sections"""
+    result['ai_model_used'] = model
+    result['processing_timestamp'] = datetime.now(timezone.utc).isoformat()
+    
+    # Validate required fields and add defaults if missing
+    if 'sentiment' not in result:
+        result['sentiment'] = {'score': 0.0, 'label': 'neutral', 'confidence': 0.0}
+    if 'business_intelligence' not in result:
+        result['business_intelligence'] = {
+            'priority_level': 'low',
+            'requires_response': False,
+            'churn_risk': 'low',
+            'upsell_opportunity': False
+        }
+    if 'intent_analysis' not in result:
+        result['intent_analysis'] = {
+            'primary_intent': 'unknown',
+            'switching_intent': False,
+            'recommendation_intent': False
+        }
+    
+    return result
+
+def parse_analysis_response(response_text: str, model: str) -> Dict[str, Any]:
+    """Parse a single-review analysis response. Raises json.JSONDecodeError on bad output."""
+    return normalize_analysis(json.loads(extract_json_text(response_text)), model)
+
+# Batched analysis: several reviews share one request and one copy of the schema prompt
+BATCH_COMPLETION_TOKENS_PER_REVIEW = 150
+BATCH_TOKEN_BUDGET = 4000
+BATCH_MAX_REVIEWS = 20
+
+ANALYSIS_RESULT_SCHEMA = """{
+    "review_id": 123,
+    "sentiment": {"score": 0.5, "label": "positive", "confidence": 0.8},
+    "topics": ["performance"],
+    "issues_mentioned": [],
+    "business_intelligence": {"priority_level": "low", "requires_response": false, "churn_risk": "low", "upsell_opportunity": false},
+    "intent_analysis": {"primary_intent": "praise", "switching_intent": false, "recommendation_intent": true},
+    "summary": "Brief summary"
+}"""
+
+def build_batch_analysis_prompt(reviews: List[Dict[str, Any]], product_name: str = "antivirus software") -> str:
+    """Build one prompt covering several reviews, each tagged with its review id"""
+    tagged = [{'review_id': r['id'], 'text': (r.get('content') or '')[:ANALYSIS_REVIEW_CHARS]} for r in reviews]
+    return f"""Analyze each of these {len(tagged)} reviews for {product_name}.
+Respond with a JSON array only, one object per review, echoing its review_id:
+
+[{ANALYSIS_RESULT_SCHEMA}]
+
+Reviews:
+{json.dumps(tagged, ensure_ascii=False)}"""
+
+def build_batch_analysis_messages(reviews: List[Dict[str, Any]], product_name: str = "antivirus software") -> List[Dict[str, str]]:
+    """Build the chat messages for a batched analysis request"""
+    return [
+        {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+        {"role": "user", "content": build_batch_analysis_prompt(reviews, product_name)}
+    ]
+
+def batch_completion_tokens(batch_size: int) -> int:
+    """Completion token budget for a batch of the given size"""
+    return BATCH_COMPLETION_TOKENS_PER_REVIEW * batch_size
+
+def parse_batch_analysis_response(response_text: str, review_ids: List[Any], model: str) -> Dict[Any, Dict[str, Any]]:
+    """Parse a batched response into {review_id: analysis}; ids missing from the reply are omitted"""
+    response_text = response_text.strip()
+    if response_text.startswith('```'):
+        response_text = response_text.replace('```json', '').replace('```', '').strip()
+    
+    array_start = response_text.find('[')
+    array_end = response_text.rfind(']') + 1
+    if array_start >= 0 and array_end > array_start:
+        response_text = response_text[array_start:array_end]
+    
+    items = json.loads(response_text)
+    if isinstance(items, dict):
+        items = [items]
+    
+    # Models sometimes echo ids as strings; match on the string form
+    wanted = {str(review_id): review_id for review_id in review_ids}
+    results = {}
+    
+    for item in items:
+        if not isinstance(item, dict) or str(item.get('review_id')) not in wanted:
+            continue
+        review_id = wanted[str(item.pop('review_id'))]
+        results[review_id] = normalize_analysis(item, model)
+    
+    return results
+
+def plan_review_batches(reviews: List[Dict[str, Any]], token_budget: int = BATCH_TOKEN_BUDGET,
+                        max_batch_size: int = BATCH_MAX_REVIEWS) -> List[List[Dict[str, Any]]]:
+    """Split reviews into batches whose estimated prompt + completion tokens stay under the budget"""
+    fixed_tokens = len(ANALYSIS_SYSTEM_PROMPT + ANALYSIS_RESULT_SCHEMA) // 4 + 50
+    batches = []
+    current = []
+    current_tokens = fixed_tokens
+    
+    for review in reviews:
+        # ~4 characters per token, plus the review_id/text wrapper and its share of the completion
+        review_tokens = len((review.get('content') or '')[:ANALYSIS_REVIEW_CHARS]) // 4 + 15 + BATCH_COMPLETION_TOKENS_PER_REVIEW
+        
+        if current and (current_tokens + review_tokens > token_budget or len(current) >= max_batch_size):
+            batches.append(current)
+            current = []
+            current_tokens = fixed_tokens
+        
+        current.append(review)
+        current_tokens += review_tokens
+    
+    if current:
+        batches.append(current)
+    
+    return batches
+
+def analysis_cache_key(review_text: str, product_name: str, model: str) -> str:
+    """Cache key for a comprehensive analysis (shared by single and batched prompts)"""
+    return AnalysisCache.make_key((review_text or '')[:ANALYSIS_REVIEW_CHARS], product_name, PROMPT_VERSION, model)
+
+def build_review_updates(analysis: Dict[str, Any], duration_ms: int = 1000) -> Dict[str, Any]:
+    """Map an analysis result onto the AI columns of the reviews table"""
+    sentiment_data = analysis.get('sentiment', {})
+    business_data = analysis.get('business_intelligence', {})
+    
+    return {
+        'sentiment_score': sentiment_data.get('score', 0.0),
+        'sentiment_label': sentiment_data.get('label', 'neutral'),
+        'confidence_score': sentiment_data.get('confidence', 0.0),
+        'key_topics': analysis.get('topics', []),
+        'issues_mentioned': analysis.get('issues_mentioned', []),
+        'features_mentioned': analysis.get('features_mentioned', []),
+        'competitive_mentions': analysis.get('competitive_mentions', []),
+        'suggested_improvements': analysis.get('suggested_improvements', ''),
+        'priority_level': business_data.get('priority_level', 'low'),
+        'requires_response': business_data.get('requires_response', False),
+        'ai_model_used': analysis.get('ai_model_used', 'unknown'),
+        'processing_version': PROCESSING_VERSION,
+        'processing_duration_ms': duration_ms
+    }
+
+def build_analysis_record(review_id: int, analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """Map an analysis result onto a review_analysis row"""
+    business_data = analysis.get('business_intelligence', {})
+    intent_data = analysis.get('intent_analysis', {})
+    topics_data = analysis.get('topics', [])
+    
+    return {
+        'review_id': review_id,
+        'emotion_scores': analysis.get('emotions', {}),
+        'aspect_sentiment': analysis.get('aspect_sentiment', {}),
+        'subjectivity_score': 0.5,  # Default value
+        'primary_topic': topics_data[0] if topics_data else 'general',
+        'topic_distribution': {},
+        'intent_type': intent_data.get('primary_intent', 'unknown'),
+        'action_required': business_data.get('requires_response', False),
+        'escalation_needed': business_data.get('priority_level', 'low') in ['high', 'critical'],
+        'competitor_mentions': analysis.get('competitive_mentions', []),
+        'switching_intent': intent_data.get('switching_intent', False),
+        'churn_risk_score': {'low': 0.2, 'medium': 0.5, 'high': 0.8}.get(
+            business_data.get('churn_risk', 'low'), 0.2
+        ),
+        'upsell_opportunity': business_data.get('upsell_opportunity', False)
+    }
+
 class OpenAIAnalyzer:
     """Advanced AI analysis using OpenAI API"""
     
     def __init__(self):
-        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-        self.model = "gpt-4o-mini"  # Using the efficient model for analysis
+        # Retries go through the shared rate limiter, not the SDK's own backoff
+        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'), max_retries=0)
+        self.rate_limiter = get_openai_rate_limiter()
+        self.model = ANALYSIS_MODEL
+        self.cache = get_analysis_cache()
         
         # Test connection
         try:
-            test_response = self.client.chat.completions.create(
+            test_response = self.chat_completion(
+                label="connection test",
                 model=self.model,
                 messages=[{"role": "user", "content": "Test"}],
                 max_tokens=5
@@ -48,72 +271,29 @@ class OpenAIAnalyzer:
             logger.error(f"❌ OpenAI API connection failed: {e}")
             raise
     
+    def chat_completion(self, label: str = 'request', **kwargs):
+        """Chat completion paced by the shared OpenAI rate limiter (429s are retried)"""
+        return create_chat_completion(self.client, self.rate_limiter, label=label, **kwargs)
+    
     def analyze_review_comprehensive(self, review_text: str, product_name: str = "antivirus software") -> Dict[str, Any]:
         """Comprehensive review analysis using OpenAI"""
         
-        prompt = f"""Analyze this review for {product_name}. JSON only:
-
-{{
-    "sentiment": {{"score": 0.5, "label": "positive", "confidence": 0.8}},
-    "topics": ["performance"],
-    "issues_mentioned": [],
-    "business_intelligence": {{"priority_level": "low", "requires_response": false, "churn_risk": "low", "upsell_opportunity": false}},
-    "intent_analysis": {{"primary_intent": "praise", "switching_intent": false, "recommendation_intent": true}},
-    "summary": "Brief summary"
-}}
-
-Review: "{review_text[:300]}"""
+        cache_key = analysis_cache_key(review_text, product_name, self.model)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         try:
-            response = self.client.chat.completions.create(
+            response = self.chat_completion(
+                label="review analysis",
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert business analyst. Respond only with valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=300,  # Reduced for speed
+                messages=build_analysis_messages(review_text, product_name),
+                max_tokens=ANALYSIS_MAX_TOKENS,  # Reduced for speed
                 temperature=0.1
             )
             
-            response_text = response.choices[0].message.content.strip()
-            
-            # Try to clean up the response if it has extra text
-            if response_text.startswith('```json'):
-                response_text = response_text.replace('```json', '').replace('```', '').strip()
-            elif response_text.startswith('```'):
-                response_text = response_text.replace('```', '').strip()
-            
-            # Find JSON in the response
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
-            
-            if json_start >= 0 and json_end > json_start:
-                json_text = response_text[json_start:json_end]
-                result = json.loads(json_text)
-            else:
-                result = json.loads(response_text)
-            
-            # Add metadata
-            result['ai_model_used'] = self.model
-            result['processing_timestamp'] = datetime.now(timezone.utc).isoformat()
-            
-            # Validate required fields and add defaults if missing
-            if 'sentiment' not in result:
-                result['sentiment'] = {'score': 0.0, 'label': 'neutral', 'confidence': 0.0}
-            if 'business_intelligence' not in result:
-                result['business_intelligence'] = {
-                    'priority_level': 'low',
-                    'requires_response': False,
-                    'churn_risk': 'low',
-                    'upsell_opportunity': False
-                }
-            if 'intent_analysis' not in result:
-                result['intent_analysis'] = {
-                    'primary_intent': 'unknown',
-                    'switching_intent': False,
-                    'recommendation_intent': False
-                }
-            
+            result = parse_analysis_response(response.choices[0].message.content, self.model)
+            self.cache.set(cache_key, result)
             return result
             
         except json.JSONDecodeError as e:
@@ -125,32 +305,71 @@ Review: "{review_text[:300]}"""
             # return self._fallback_analysis(review_text)  # COMMENTED OUT FOR SPEED
             return None  # Skip failed reviews
     
+    def analyze_reviews_batched(self, reviews: List[Dict[str, Any]], product_name: str = "antivirus software",
+                                token_budget: int = BATCH_TOKEN_BUDGET,
+                                max_batch_size: int = BATCH_MAX_REVIEWS) -> Dict[Any, Dict[str, Any]]:
+        """Analyze many reviews with one request per token-budgeted batch.
+        
+        Returns {review_id: analysis}. Reviews the model drops or mangles are
+        retried individually; reviews that still fail are left out.
+        """
+        # Identical content for the same product is answered from the cache
+        cache_keys = {r['id']: analysis_cache_key(r['content'], product_name, self.model) for r in reviews}
+        cached = self.cache.get_many(cache_keys.values())
+        results = {rid: cached[key] for rid, key in cache_keys.items() if key in cached}
+        uncached = [r for r in reviews if r['id'] not in results]
+        
+        for batch in plan_review_batches(uncached, token_budget, max_batch_size):
+            review_ids = [r['id'] for r in batch]
+            
+            if len(batch) > 1:
+                try:
+                    response = self.chat_completion(
+                        label=f"batch of {len(batch)} reviews",
+                        model=self.model,
+                        messages=build_batch_analysis_messages(batch, product_name),
+                        max_tokens=batch_completion_tokens(len(batch)),
+                        temperature=0.1
+                    )
+                    batch_results = parse_batch_analysis_response(
+                        response.choices[0].message.content, review_ids, self.model
+                    )
+                    self.cache.set_many([(cache_keys[rid], analysis) for rid, analysis in batch_results.items()])
+                    results.update(batch_results)
+                except Exception as e:
+                    logger.warning(f"⚠️ Batched analysis of {len(batch)} reviews failed, retrying individually: {e}")
+            
+            # Retry anything the batch did not cover
+            for review in batch:
+                if review['id'] in results:
+                    continue
+                analysis = self.analyze_review_comprehensive(review['content'], product_name)
+                if analysis is not None:
+                    results[review['id']] = analysis
+            
+            logger.info(f"🔄 Analyzed {len(results)}/{len(reviews)} reviews")
+        
+        return results
+    
     def batch_analyze_reviews(self, reviews: List[Dict[str, Any]], product_name: str = "antivirus software") -> List[Dict[str, Any]]:
         """Analyze multiple reviews in batch"""
+        analyses = self.analyze_reviews_batched(reviews, product_name)
         results = []
         
-        for i, review in enumerate(reviews):
-            logger.info(f"🔄 Analyzing review {i+1}/{len(reviews)}")
-            
-            try:
-                analysis = self.analyze_review_comprehensive(review['content'], product_name)
-                analysis['review_id'] = review['id']
-                results.append(analysis)
-                
-                # Rate limiting
-                if i % 10 == 0 and i > 0:
-                    logger.info(f"⏸️ Processed {i} reviews, pausing briefly...")
-                    import time
-                    time.sleep(1)
-                    
-            except Exception as e:
-                logger.error(f"❌ Failed to analyze review {review['id']}: {e}")
+        for review in reviews:
+            analysis = analyses.get(review['id'])
+            if analysis is None:
+                logger.error(f"❌ Failed to analyze review {review['id']}")
                 # Add empty result to maintain order
                 results.append({
                     'review_id': review['id'],
-                    'error': str(e),
+                    'error': 'analysis failed',
                     'sentiment': {'score': 0, 'label': 'neutral', 'confidence': 0}
                 })
+            else:
+                # Cache hits can share one dict across duplicate reviews
+                analysis = dict(analysis, review_id=review['id'])
+                results.append(analysis)
         
         return results
     
@@ -261,7 +480,8 @@ class TopicExtractor:
         """
         
         try:
-            response = self.openai_analyzer.client.chat.completions.create(
+            response = self.openai_analyzer.chat_completion(
+                label="trending topics",
                 model=self.openai_analyzer.model,
                 messages=[
                     {"role": "system", "content": "You are an expert business analyst specializing in customer feedback trend analysis for cybersecurity products."},
@@ -312,110 +532,34 @@ class ReviewProcessor:
     
     def __init__(self):
         self.db_manager = get_db_manager()
+        self.metadata = get_metadata_registry()
         self.openai_analyzer = OpenAIAnalyzer()
         self.topic_extractor = TopicExtractor()
     
-    def process_unprocessed_reviews(self, batch_size: int = 50) -> Dict[str, Any]:
+    def process_unprocessed_reviews(self, batch_size: int = 50, concurrency: Optional[int] = None,
+                                    reviews_per_request: int = 1) -> Dict[str, Any]:
         """Process reviews that haven't been analyzed yet"""
+        from analysis.async_processor import AsyncReviewProcessor
         
-        # Get unprocessed reviews
-        reviews = self.db_manager.get_unprocessed_reviews(limit=batch_size)
-        
-        if not reviews:
-            logger.info("✅ No unprocessed reviews found")
-            return {'processed': 0, 'errors': 0}
-        
-        logger.info(f"🔄 Processing {len(reviews)} unprocessed reviews")
-        
-        processed_count = 0
-        error_count = 0
-        
-        for review in reviews:
-            try:
-                # Get product info for context
-                products = self.db_manager.get_products()
-                product = next((p for p in products if p['id'] == review['product_id']), None)
-                product_name = f"{product['name']} by {product['company']}" if product else "antivirus software"
-                
-                # Perform AI analysis
-                analysis = self.openai_analyzer.analyze_review_comprehensive(
-                    review['content'], 
-                    product_name
-                )
-                
-                # Skip if analysis failed (None returned)
-                if analysis is None:
-                    logger.warning(f"⚠️ Skipping review {review['id']} - analysis failed")
-                    error_count += 1
-                    continue
-                
-                # Prepare update data for reviews table
-                sentiment_data = analysis.get('sentiment', {})
-                business_data = analysis.get('business_intelligence', {})
-                intent_data = analysis.get('intent_analysis', {})
-                
-                review_updates = {
-                    'sentiment_score': sentiment_data.get('score', 0.0),
-                    'sentiment_label': sentiment_data.get('label', 'neutral'),
-                    'confidence_score': sentiment_data.get('confidence', 0.0),
-                    'key_topics': analysis.get('topics', []),
-                    'issues_mentioned': analysis.get('issues_mentioned', []),
-                    'features_mentioned': analysis.get('features_mentioned', []),
-                    'competitive_mentions': analysis.get('competitive_mentions', []),
-                    'suggested_improvements': analysis.get('suggested_improvements', ''),
-                    'priority_level': business_data.get('priority_level', 'low'),
-                    'requires_response': business_data.get('requires_response', False),
-                    'ai_model_used': analysis.get('ai_model_used', 'unknown'),
-                    'processing_version': '2.1',
-                    'processing_duration_ms': 1000  # Approximate
-                }
-                
-                # Update review record
-                self.db_manager.mark_review_processed(review['id'], review_updates)
-                
-                # Insert detailed analysis
-                emotions_data = analysis.get('emotions', {})
-                aspect_sentiment_data = analysis.get('aspect_sentiment', {})
-                topics_data = analysis.get('topics', [])
-                
-                analysis_data = {
-                    'review_id': review['id'],
-                    'emotion_scores': emotions_data,
-                    'aspect_sentiment': aspect_sentiment_data,
-                    'subjectivity_score': 0.5,  # Default value
-                    'primary_topic': topics_data[0] if topics_data else 'general',
-                    'topic_distribution': {},
-                    'intent_type': intent_data.get('primary_intent', 'unknown'),
-                    'action_required': business_data.get('requires_response', False),
-                    'escalation_needed': business_data.get('priority_level', 'low') in ['high', 'critical'],
-                    'competitor_mentions': analysis.get('competitive_mentions', []),
-                    'switching_intent': intent_data.get('switching_intent', False),
-                    'churn_risk_score': {'low': 0.2, 'medium': 0.5, 'high': 0.8}.get(
-                        business_data.get('churn_risk', 'low'), 0.2
-                    ),
-                    'upsell_opportunity': business_data.get('upsell_opportunity', False)
-                }
-                
-                # Insert into review_analysis table
-                try:
-                    self.db_manager.supabase.table('review_analysis').insert(analysis_data).execute()
-                except Exception as e:
-                    logger.warning(f"⚠️ Failed to insert detailed analysis for review {review['id']}: {e}")
-                
-                processed_count += 1
-                logger.info(f"✅ Processed review {review['id']} ({processed_count}/{len(reviews)})")
-                
-            except Exception as e:
-                logger.error(f"❌ Failed to process review {review['id']}: {e}")
-                error_count += 1
-        
-        result = {
-            'processed': processed_count,
-            'errors': error_count,
-            'total_reviews': len(reviews)
-        }
+        # Claim unprocessed reviews; other workers skip them while this batch holds the lease
+        with AnalysisWorkQueue(self.db_manager) as work_queue:
+            reviews = work_queue.claim(batch_size)
+            
+            if not reviews:
+                logger.info("✅ No unprocessed reviews found")
+                return {'processed': 0, 'errors': 0}
+            
+            logger.info(f"🔄 Processing {len(reviews)} unprocessed reviews")
+            
+            # Get product info for context
+            product_names = self.metadata.product_labels()
+            
+            # Analyze concurrently; results are written back while later reviews are in flight
+            engine = AsyncReviewProcessor(db_manager=self.db_manager, model=self.openai_analyzer.model,
+                                          concurrency=concurrency, reviews_per_request=reviews_per_request)
+            result = engine.process_reviews(reviews, product_names)
         
-        logger.info(f"🎉 Processing complete: {processed_count} processed, {error_count} errors")
+        logger.info(f"🎉 Processing complete: {result['processed']} processed, {result['errors']} errors")
         return result
     
     def generate_insights_report(self, product_id: int = None, days: int = 30) -> Dict[str, Any]:
@@ -457,6 +601,9 @@ def main():
                        default='process', help='Action to perform')
     parser.add_argument('--batch_size', type=int, default=50, 
                        help='Batch size for processing')
+    parser.add_argument('--concurrency', type=int, help='Maximum concurrent OpenAI requests (default: adaptive)')
+    parser.add_argument('--reviews_per_request', type=int, default=1,
+                       help='Pack up to N reviews into each OpenAI request')
     parser.add_argument('--product_id', type=int, help='Product ID for insights')
     parser.add_argument('--days', type=int, default=30, help='Days for insights')
     
@@ -473,7 +620,8 @@ def main():
         
     elif args.action == 'process':
         # Process unprocessed reviews
-        result = processor.process_unprocessed_reviews(args.batch_size)
+        result = processor.process_unprocessed_reviews(args.batch_size, concurrency=args.concurrency,
+                                                       reviews_per_request=args.reviews_per_request)
         print(f"✅ Processed {result['processed']} reviews with {result['errors']} errors")
         
     elif args.action == 'insights':
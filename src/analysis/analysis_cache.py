@@ -0,0 +1,201 @@
+"""
+Persistent cache for AI analysis results
+Keyed by normalized review content, product context, prompt version and model
+so duplicate and re-ingested reviews are never sent to the API twice
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_CACHE_PATH = os.path.join(project_root, '.cache', 'analysis_cache.sqlite3')
+
+
+def normalize_content(content: str) -> str:
+    """Case-fold and collapse whitespace so trivially different copies share a key"""
+    return ' '.join((content or '').split()).casefold()
+
+
+class AnalysisCache:
+    """SQLite-backed analysis cache with TTL and LRU eviction"""
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None,
+                 ttl_days: Optional[float] = None):
+        self.path = path or os.getenv('ANALYSIS_CACHE_PATH', DEFAULT_CACHE_PATH)
+        self.max_entries = max_entries or int(os.getenv('ANALYSIS_CACHE_MAX_ENTRIES', 500000))
+        self.ttl_seconds = (ttl_days or float(os.getenv('ANALYSIS_CACHE_TTL_DAYS', 180))) * 86400
+
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        # One connection shared across threads; the lock serializes access
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_cache (
+                cache_key TEXT PRIMARY KEY,
+                analysis TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL
+            )
+        """)
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_analysis_cache_lru ON analysis_cache(last_accessed)')
+        self._conn.commit()
+
+        self.hits = 0
+        self.misses = 0
+        self._writes_since_evict = 0
+
+    @staticmethod
+    def make_key(content: str, product_context: str, prompt_version: str, model: str) -> str:
+        """Build the cache key for one analysis request"""
+        material = json.dumps([prompt_version, model, product_context or '', normalize_content(content)])
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached analysis for a key, or None"""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Return {key: analysis} for every key that is cached and not expired"""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+
+        now = time.time()
+        found = {}
+
+        with self._lock:
+            # SQLite caps bound parameters, so look up in chunks
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT cache_key, analysis FROM analysis_cache "
+                    f"WHERE cache_key IN ({placeholders}) AND created_at >= ?",
+                    (*chunk, now - self.ttl_seconds)
+                ).fetchall()
+                for cache_key, analysis in rows:
+                    found[cache_key] = json.loads(analysis)
+
+            if found:
+                self._conn.executemany(
+                    "UPDATE analysis_cache SET last_accessed = ? WHERE cache_key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+
+        return found
+
+    def set(self, key: str, analysis: Dict[str, Any]):
+        """Store one analysis result"""
+        self.set_many([(key, analysis)])
+
+    def set_many(self, items: List[Tuple[str, Dict[str, Any]]]):
+        """Store several analysis results"""
+        if not items:
+            return
+
+        now = time.time()
+        rows = [(key, json.dumps(analysis, default=str), now, now) for key, analysis in items]
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO analysis_cache (cache_key, analysis, created_at, last_accessed) "
+                "VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+            self._writes_since_evict += len(rows)
+
+            if self._writes_since_evict >= 1000:
+                self._evict_locked()
+
+    def evict(self) -> int:
+        """Drop expired entries, then least-recently-used entries beyond max_entries"""
+        with self._lock:
+            return self._evict_locked()
+
+    def _evict_locked(self) -> int:
+        self._writes_since_evict = 0
+        removed = self._conn.execute(
+            "DELETE FROM analysis_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+        ).rowcount
+
+        overflow = self._conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            removed += self._conn.execute(
+                "DELETE FROM analysis_cache WHERE cache_key IN "
+                "(SELECT cache_key FROM analysis_cache ORDER BY last_accessed ASC LIMIT ?)",
+                (overflow,)
+            ).rowcount
+
+        self._conn.commit()
+        if removed:
+            logger.info(f"🧹 Analysis cache evicted {removed} entries")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process plus the current cache size"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': entries,
+            'path': self.path
+        }
+
+    def clear(self):
+        """Remove every cached analysis"""
+        with self._lock:
+            self._conn.execute("DELETE FROM analysis_cache")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_shared_cache: Optional[AnalysisCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_analysis_cache() -> AnalysisCache:
+    """Process-wide cache instance shared by all analyzers"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = AnalysisCache()
+        return _shared_cache
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="AI analysis cache maintenance")
+    parser.add_argument('--action', choices=['stats', 'evict', 'clear'], default='stats')
+    args = parser.parse_args()
+
+    cache = get_analysis_cache()
+    if args.action == 'evict':
+        print(f"🧹 Evicted {cache.evict()} entries")
+    elif args.action == 'clear':
+        cache.clear()
+        print("🧹 Cache cleared")
+    print(json.dumps(cache.stats(), indent=2))
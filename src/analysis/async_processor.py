@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+Async Review Analysis Engine
+Concurrent OpenAI analysis with rate limiting and a pipelined database writer
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+import aiohttp
+
+# Local imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from analysis.ai_analyzer import (
+    ANALYSIS_MODEL, ANALYSIS_MAX_TOKENS, BATCH_TOKEN_BUDGET, build_analysis_messages, parse_analysis_response,
+    build_batch_analysis_messages, batch_completion_tokens, parse_batch_analysis_response, plan_review_batches,
+    build_review_updates, build_analysis_record, analysis_cache_key
+)
+from analysis.analysis_cache import get_analysis_cache
+from analysis.rate_limiter import AdaptiveRateLimiter, estimate_tokens, get_openai_rate_limiter, is_retryable_status
+from database.manager import BulkResultWriter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = 'https://api.openai.com/v1'
+
+# (review, analysis, duration_ms) tuples handed from the analysis workers to the writer
+AnalysisResult = Tuple[Dict[str, Any], Dict[str, Any], int]
+
+
+class CompletionError(Exception):
+    """An analysis that failed for good.
+
+    Transient failures (rate limits, 5xx or network errors outlasting the
+    retries) say nothing about the review itself, so only the others count
+    towards its attempts and dead-lettering.
+    """
+
+    def __init__(self, message: str, transient: bool = False):
+        super().__init__(message)
+        self.transient = transient
+
+
+class AsyncReviewProcessor:
+    """Analyzes reviews concurrently and streams results to a writer stage"""
+
+    def __init__(self, db_manager=None, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 model: str = ANALYSIS_MODEL, concurrency: Optional[int] = None,
+                 requests_per_minute: Optional[int] = None, tokens_per_minute: Optional[int] = None,
+                 write_batch_size: int = 500, max_retries: int = 3,
+                 reviews_per_request: int = 1, token_budget: int = BATCH_TOKEN_BUDGET, use_cache: bool = True,
+                 result_writer: Optional[Callable[[List[AnalysisResult]], int]] = None,
+                 rate_limiter: Optional[AdaptiveRateLimiter] = None):
+        self.db_manager = db_manager
+        self.api_key = api_key or os.getenv('OPENAI_API_KEY')
+        self.base_url = (base_url or os.getenv('OPENAI_BASE_URL') or DEFAULT_BASE_URL).rstrip('/')
+        self.model = model
+        # Explicit limits get a private limiter (concurrency is then both the
+        # starting and the largest window); otherwise share the process-wide one
+        if rate_limiter is None and (concurrency or requests_per_minute or tokens_per_minute):
+            rate_limiter = AdaptiveRateLimiter(
+                requests_per_minute or int(os.getenv('OPENAI_REQUESTS_PER_MINUTE', 500)),
+                tokens_per_minute or int(os.getenv('OPENAI_TOKENS_PER_MINUTE', 200000)),
+                initial_concurrency=concurrency, max_concurrency=concurrency
+            )
+        self.rate_limiter = rate_limiter or get_openai_rate_limiter()
+        # Enough workers to fill the largest window the limiter may open
+        self.concurrency = self.rate_limiter.max_concurrency
+        self.write_batch_size = write_batch_size
+        self.max_retries = max_retries
+        self.reviews_per_request = reviews_per_request
+        self.token_budget = token_budget
+        self.result_writer = result_writer or self.write_results
+        self.bulk_writer = BulkResultWriter(db_manager, flush_size=write_batch_size) if db_manager else None
+        self.cache = get_analysis_cache() if use_cache else None
+
+        self.stats = {'analyzed': 0, 'written': 0, 'errors': 0, 'transient_errors': 0, 'retries': 0, 'cache_hits': 0}
+        # (review_id, error) for non-transient failures; recorded for backoff/dead-lettering
+        self.failures: List[Tuple[int, str]] = []
+
+    async def _chat_completion(self, session: aiohttp.ClientSession, messages: List[Dict[str, str]],
+                               max_tokens: int, label: str) -> str:
+        """Send one chat completion, retrying on rate limits and transient errors.
+        
+        Raises CompletionError once the request has failed for good.
+        """
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": 0.1
+        }
+        prompt_text = "".join(m['content'] for m in messages)
+        last_error = 'no response'
+
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire(estimate_tokens(prompt_text, max_tokens))
+            status, headers = None, None
+
+            try:
+                async with session.post(
+                    f"{self.base_url}/chat/completions",
+                    headers={'Authorization': f'Bearer {self.api_key}', 'Content-Type': 'application/json'},
+                    json=payload
+                ) as response:
+                    status, headers = response.status, response.headers
+                    if is_retryable_status(status):
+                        # The limiter pauses every caller for Retry-After on a 429
+                        logger.warning(f"⏸️ API returned {status} for {label}, retrying")
+                        last_error = f"HTTP {status}"
+                        self.stats['retries'] += 1
+                        retry_delay = 0 if status == 429 else self.rate_limiter.retry_delay(attempt)
+                    else:
+                        data = await response.json()
+                        if status != 200:
+                            logger.error(f"❌ API error for {label}: {data}")
+                            raise CompletionError(f"HTTP {status}: {data}")
+                        return data['choices'][0]['message']['content']
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"⚠️ Request failed for {label}: {e}")
+                last_error = f"{type(e).__name__}: {e}"
+                self.stats['retries'] += 1
+                retry_delay = self.rate_limiter.retry_delay(attempt)
+            finally:
+                self.rate_limiter.release(status, headers)
+
+            await asyncio.sleep(retry_delay)
+
+        logger.error(f"❌ Giving up on {label} after {self.max_retries + 1} attempts")
+        raise CompletionError(f"Gave up after {self.max_retries + 1} attempts: {last_error}", transient=True)
+
+    async def analyze_review(self, session: aiohttp.ClientSession, review: Dict[str, Any],
+                             product_name: str, errors: Optional[Dict[Any, CompletionError]] = None) -> Optional[Dict[str, Any]]:
+        """Analyze a single review; on failure returns None and notes the reason in `errors`"""
+        errors = {} if errors is None else errors
+        try:
+            content = await self._chat_completion(
+                session, build_analysis_messages(review['content'], product_name),
+                ANALYSIS_MAX_TOKENS, f"review {review['id']}"
+            )
+        except CompletionError as e:
+            errors[review['id']] = e
+            return None
+
+        try:
+            analysis = parse_analysis_response(content, self.model)
+        except json.JSONDecodeError as e:
+            logger.error(f"❌ Failed to parse OpenAI response for review {review['id']}: {e}")
+            errors[review['id']] = CompletionError(f"Unparseable response: {e}")
+            return None
+
+        if self.cache is not None:
+            self.cache.set(analysis_cache_key(review['content'], product_name, self.model), analysis)
+        return analysis
+
+    async def analyze_batch(self, session: aiohttp.ClientSession, batch: List[Dict[str, Any]],
+                            product_name: str, errors: Optional[Dict[Any, CompletionError]] = None) -> Dict[Any, Dict[str, Any]]:
+        """Analyze several reviews in one request; reviews missing from the reply are retried individually"""
+        results = {}
+
+        if len(batch) > 1:
+            review_ids = [r['id'] for r in batch]
+            try:
+                content = await self._chat_completion(
+                    session, build_batch_analysis_messages(batch, product_name),
+                    batch_completion_tokens(len(batch)), f"batch of {len(batch)} reviews"
+                )
+            except CompletionError as e:
+                logger.warning(f"⚠️ Batched request failed, retrying {len(batch)} reviews individually: {e}")
+                content = None
+            if content is not None:
+                try:
+                    results = parse_batch_analysis_response(content, review_ids, self.model)
+                    if self.cache is not None:
+                        by_id = {r['id']: r for r in batch}
+                        self.cache.set_many([
+                            (analysis_cache_key(by_id[rid]['content'], product_name, self.model), analysis)
+                            for rid, analysis in results.items()
+                        ])
+                except json.JSONDecodeError as e:
+                    logger.warning(f"⚠️ Failed to parse batched response, retrying {len(batch)} reviews individually: {e}")
+
+        missing = [r for r in batch if r['id'] not in results]
+        if missing:
+            singles = await asyncio.gather(*(self.analyze_review(session, r, product_name, errors) for r in missing))
+            for review, analysis in zip(missing, singles):
+                if analysis is not None:
+                    results[review['id']] = analysis
+
+        return results
+
+    def write_results(self, results: List[AnalysisResult]) -> int:
+        """Queue a batch of analysis results for bulk write-back (runs in a worker thread).
+        
+        Returns the number of rows written by any flush this triggered; the
+        remainder is flushed by the size/time thresholds or at the end of the run.
+        """
+        return self.bulk_writer.add_many([
+            (review['id'], build_review_updates(analysis, duration_ms), build_analysis_record(review['id'], analysis))
+            for review, analysis, duration_ms in results
+        ])
+
+    async def _analysis_worker(self, session: aiohttp.ClientSession, review_queue: asyncio.Queue,
+                               result_queue: asyncio.Queue, product_names: Dict[int, str]):
+        """Pull review batches off the input queue and push finished analyses to the writer"""
+        while True:
+            batch = await review_queue.get()
+            try:
+                product_name = product_names.get(batch[0].get('product_id'), "antivirus software")
+                started = time.monotonic()
+                errors: Dict[Any, CompletionError] = {}
+                analyses = await self.analyze_batch(session, batch, product_name, errors)
+                duration_ms = int((time.monotonic() - started) * 1000 / len(batch))
+
+                for review in batch:
+                    analysis = analyses.get(review['id'])
+                    if analysis is None:
+                        logger.warning(f"⚠️ Skipping review {review['id']} - analysis failed")
+                        self.stats['errors'] += 1
+                        error = errors.get(review['id']) or CompletionError('Missing from analysis reply')
+                        if error.transient:
+                            self.stats['transient_errors'] += 1
+                        else:
+                            self.failures.append((review['id'], str(error)))
+                    else:
+                        self.stats['analyzed'] += 1
+                        await result_queue.put((review, analysis, duration_ms))
+            except Exception as e:
+                logger.error(f"❌ Failed to process batch starting at review {batch[0].get('id')}: {e}")
+                self.stats['errors'] += len(batch)
+                self.failures.extend((review['id'], f"{type(e).__name__}: {e}") for review in batch)
+            finally:
+                review_queue.task_done()
+
+    def _lookup_cached(self, reviews: List[Dict[str, Any]],
+                       product_names: Dict[int, str]) -> Tuple[List[AnalysisResult], List[Dict[str, Any]]]:
+        """Split reviews into cached results and reviews that still need an API call"""
+        if self.cache is None or not reviews:
+            return [], reviews
+
+        keys = {
+            r['id']: analysis_cache_key(
+                r['content'], product_names.get(r.get('product_id'), "antivirus software"), self.model
+            )
+            for r in reviews
+        }
+        cached = self.cache.get_many(keys.values())
+
+        hits = [(r, cached[keys[r['id']]], 0) for r in reviews if keys[r['id']] in cached]
+        misses = [r for r in reviews if keys[r['id']] not in cached]
+
+        self.stats['cache_hits'] += len(hits)
+        self.stats['analyzed'] += len(hits)
+        if hits:
+            logger.info(f"💾 {len(hits)}/{len(reviews)} reviews answered from the analysis cache")
+        return hits, misses
+
+    def _plan_requests(self, reviews: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Group reviews into per-request batches (one review per request unless batching is enabled)"""
+        if self.reviews_per_request <= 1:
+            return [[review] for review in reviews]
+
+        # A batch shares one product context, so group by product first
+        by_product: Dict[Any, List[Dict[str, Any]]] = {}
+        for review in reviews:
+            by_product.setdefault(review.get('product_id'), []).append(review)
+
+        batches = []
+        for product_reviews in by_product.values():
+            batches.extend(plan_review_batches(product_reviews, self.token_budget, self.reviews_per_request))
+        return batches
+
+    async def _writer(self, result_queue: asyncio.Queue):
+        """Drain the result queue in batches so writes overlap with analysis"""
+        loop = asyncio.get_running_loop()
+        done = False
+
+        while not done:
+            batch = []
+            item = await result_queue.get()
+            if item is None:
+                break
+            batch.append(item)
+
+            # Grab whatever else is already waiting, up to the batch size
+            while len(batch) < self.write_batch_size and not result_queue.empty():
+                item = result_queue.get_nowait()
+                if item is None:
+                    done = True
+                    break
+                batch.append(item)
+
+            self.stats['written'] += await loop.run_in_executor(None, self.result_writer, batch)
+
+    async def process_reviews_async(self, reviews: List[Dict[str, Any]],
+                                    product_names: Optional[Dict[int, str]] = None) -> Dict[str, Any]:
+        """Run the analysis pipeline over a list of reviews"""
+        product_names = product_names or {}
+        self.failures = []
+        review_queue: asyncio.Queue = asyncio.Queue()
+        result_queue: asyncio.Queue = asyncio.Queue(maxsize=self.write_batch_size * 4)
+
+        cached_results, uncached = self._lookup_cached(reviews, product_names)
+        requests = self._plan_requests(uncached)
+        for batch in requests:
+            review_queue.put_nowait(batch)
+
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=60)
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            writer = asyncio.create_task(self._writer(result_queue))
+            for cached_result in cached_results:
+                await result_queue.put(cached_result)
+
+            workers = [
+                asyncio.create_task(self._analysis_worker(session, review_queue, result_queue, product_names))
+                for _ in range(min(self.concurrency, max(len(requests), 1)))
+            ]
+
+            await review_queue.join()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+            await result_queue.put(None)
+            await writer
+
+        loop = asyncio.get_running_loop()
+        if self.bulk_writer is not None:
+            self.stats['written'] += await loop.run_in_executor(None, self.bulk_writer.flush)
+            self.stats['errors'] += self.bulk_writer.failed
+
+        # Failed reviews back off (and are eventually dead-lettered) instead of heading the next batch
+        dead_lettered = 0
+        if self.failures and self.db_manager is not None:
+            try:
+                recorded = await loop.run_in_executor(None, self.db_manager.record_analysis_failures, self.failures)
+                dead_lettered = recorded['dead_lettered']
+            except Exception as e:
+                logger.error(f"❌ Could not record {len(self.failures)} analysis failures: {e}")
+
+        return {
+            'processed': self.stats['written'],
+            'errors': self.stats['errors'],
+            'transient_errors': self.stats['transient_errors'],
+            'total_reviews': len(reviews),
+            'retries': self.stats['retries'],
+            'cache_hits': self.stats['cache_hits'],
+            'dead_lettered': dead_lettered
+        }
+
+    def process_reviews(self, reviews: List[Dict[str, Any]],
+                        product_names: Optional[Dict[int, str]] = None) -> Dict[str, Any]:
+        """Synchronous entry point for the analysis pipeline"""
+        return asyncio.run(self.process_reviews_async(reviews, product_names))
+
+
+def run_benchmark(num_reviews: int, concurrency: int, latency_ms: int, port: int,
+                  reviews_per_request: int = 1) -> Dict[str, Any]:
+    """Benchmark serial vs concurrent analysis against the local stub server"""
+    from analysis.stub_openai_server import start_stub_server
+
+    reviews = [
+        {'id': i, 'product_id': 1, 'content': f"Benchmark review {i}: scans are fast but the VPN drops sometimes."}
+        for i in range(num_reviews)
+    ]
+
+    async def _run(run_concurrency: int) -> float:
+        runner = await start_stub_server(port=port, latency_ms=latency_ms)
+        try:
+            processor = AsyncReviewProcessor(
+                api_key='stub', base_url=f"http://127.0.0.1:{port}/v1",
+                concurrency=run_concurrency, requests_per_minute=1000000, tokens_per_minute=1000000000,
+                reviews_per_request=reviews_per_request, use_cache=False,
+                result_writer=lambda batch: len(batch)
+            )
+            started = time.monotonic()
+            await processor.process_reviews_async(reviews)
+            return time.monotonic() - started
+        finally:
+            await runner.cleanup()
+
+    serial_seconds = asyncio.run(_run(1))
+    concurrent_seconds = asyncio.run(_run(concurrency))
+
+    return {
+        'reviews': num_reviews,
+        'latency_ms': latency_ms,
+        'serial_rate': num_reviews / serial_seconds,
+        'concurrent_rate': num_reviews / concurrent_seconds,
+        'concurrency': concurrency,
+        'speedup': serial_seconds / concurrent_seconds
+    }
+
+
+def main():
+    """CLI for async review processing"""
+    parser = argparse.ArgumentParser(description="Async AI Review Analysis Engine")
+    parser.add_argument('--batch_size', type=int, default=500, help='Reviews to fetch and process')
+    parser.add_argument('--concurrency', type=int, help='Maximum concurrent API requests (default: adaptive)')
+    parser.add_argument('--reviews_per_request', type=int, default=1,
+                        help='Pack up to N reviews into each request (batched prompts)')
+    parser.add_argument('--benchmark', action='store_true', help='Benchmark against the local stub server')
+    parser.add_argument('--latency_ms', type=int, default=800, help='Stub server latency for benchmarks')
+    parser.add_argument('--port', type=int, default=8089, help='Stub server port for benchmarks')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.benchmark:
+        result = run_benchmark(args.batch_size, args.concurrency or 32, args.latency_ms, args.port,
+                               args.reviews_per_request)
+        print(f"📊 {result['reviews']} reviews @ {result['latency_ms']}ms simulated latency")
+        print(f"🐢 Serial:     {result['serial_rate']:.1f} reviews/second")
+        print(f"🚀 Concurrent: {result['concurrent_rate']:.1f} reviews/second (concurrency={result['concurrency']})")
+        print(f"⚡ Speedup:    {result['speedup']:.1f}x")
+        return
+
+    from analysis.ai_analyzer import ReviewProcessor
+
+    processor = ReviewProcessor()
+    started = datetime.now()
+    result = processor.process_unprocessed_reviews(args.batch_size, concurrency=args.concurrency,
+                                                  reviews_per_request=args.reviews_per_request)
+    elapsed = (datetime.now() - started).total_seconds()
+    print(f"✅ Processed {result['processed']} reviews with {result['errors']} errors in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
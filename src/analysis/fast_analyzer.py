@@ -14,18 +14,41 @@ import json
 
 # Local imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from database.manager import get_db_manager
+from database.manager import BulkResultWriter, get_db_manager
+from analysis.analysis_cache import AnalysisCache, get_analysis_cache
+from analysis.rate_limiter import estimate_tokens, get_openai_rate_limiter, is_retryable_status
+from analysis.work_queue import AnalysisWorkQueue
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Bump when the fast prompt changes so cached analyses are not reused
+PROMPT_VERSION = 'fast-1.0'
+
+
+class AnalysisFailure(Exception):
+    """An analysis that failed for good; transient ones (rate limits, 5xx or
+    network errors outlasting the retries) are not charged to the review"""
+    
+    def __init__(self, message: str, transient: bool = False):
+        super().__init__(message)
+        self.transient = transient
+
 class FastAIAnalyzer:
     """Optimized AI analyzer with minimal API calls"""
     
     def __init__(self):
         self.api_key = os.getenv('OPENAI_API_KEY')
         self.db_manager = get_db_manager()
+        self.cache = get_analysis_cache()
+        self.result_writer = BulkResultWriter(self.db_manager, flush_size=500)
+        self.work_queue = AnalysisWorkQueue(self.db_manager)
+        self.rate_limiter = get_openai_rate_limiter()
+        self.max_retries = 3
+        self.failed = 0
+        self.dead_lettered = 0
+        self.transient_errors = 0
     
     async def analyze_review_batch(self, reviews, session):
         """Analyze multiple reviews with simplified prompts"""
@@ -40,6 +63,11 @@ class FastAIAnalyzer:
     async def analyze_single_review(self, review, session):
         """Fast single review analysis"""
         
+        cache_key = AnalysisCache.make_key(review['content'][:200], '', PROMPT_VERSION, 'gpt-4o-mini')
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return dict(cached, review_id=review['id'])
+        
         # Simplified prompt for speed
         prompt = f'''Rate this review sentiment (1-5) and extract 2-3 key topics. JSON only:
 {{"sentiment_score": 3.5, "sentiment_label": "positive", "topics": ["performance"], "priority": "low"}}
@@ -56,15 +84,25 @@ Review: "{review['content'][:200]}"'''
             "temperature": 0.1
         }
         
-        try:
-            async with session.post(
-                'https://api.openai.com/v1/chat/completions',
-                headers={'Authorization': f'Bearer {self.api_key}', 'Content-Type': 'application/json'},
-                json=payload
-            ) as response:
-                data = await response.json()
-                
-                if response.status == 200:
+        estimated_tokens = estimate_tokens(prompt, payload['max_tokens'])
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire(estimated_tokens)
+            status, headers, data = None, None, None
+            try:
+                async with session.post(
+                    'https://api.openai.com/v1/chat/completions',
+                    headers={'Authorization': f'Bearer {self.api_key}', 'Content-Type': 'application/json'},
+                    json=payload
+                ) as response:
+                    status, headers = response.status, response.headers
+                    data = await response.json()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"Request failed for review {review['id']}: {e}")
+            finally:
+                self.rate_limiter.release(status, headers)
+            
+            if status == 200:
+                try:
                     content = data['choices'][0]['message']['content']
                     
                     # Quick JSON extraction
@@ -72,51 +110,42 @@ Review: "{review['content'][:200]}"'''
                         content = content.split('```')[1].replace('json', '').strip()
                     
                     result = json.loads(content)
+                    self.cache.set(cache_key, result)
                     result['review_id'] = review['id']
                     return result
-                else:
-                    logger.error(f"API error: {data}")
-                    return self.fallback_analysis(review)
-                    
-        except Exception as e:
-            logger.error(f"Analysis failed for review {review['id']}: {e}")
-            return self.fallback_analysis(review)
+                except Exception as e:
+                    logger.error(f"Analysis failed for review {review['id']}: {e}")
+                    raise AnalysisFailure(f"Unparseable response: {type(e).__name__}: {e}")
+            
+            if not is_retryable_status(status) or attempt == self.max_retries:
+                logger.error(f"API error for review {review['id']}: {data if status else 'no response'}")
+                # Rate limits and outages outlasting the retries are not the review's fault
+                raise AnalysisFailure(f"HTTP {status}" if status else 'no response',
+                                      transient=is_retryable_status(status))
+            
+            # 429s wait inside the limiter (Retry-After); other failures back off here
+            if status != 429:
+                await asyncio.sleep(self.rate_limiter.retry_delay(attempt))
     
-    def fallback_analysis(self, review):
-        """Quick fallback without AI"""
-        content = review['content'].lower()
-        
-        # Simple sentiment detection
-        positive_words = ['good', 'great', 'excellent', 'amazing', 'love', 'perfect', 'best']
-        negative_words = ['bad', 'terrible', 'awful', 'hate', 'worst', 'horrible', 'useless']
+    def update_reviews_batch(self, reviews, results):
+        """Queue review updates for bulk write-back; returns the number queued.
         
-        pos_count = sum(1 for word in positive_words if word in content)
-        neg_count = sum(1 for word in negative_words if word in content)
-        
-        if pos_count > neg_count:
-            sentiment_score = 4.0
-            sentiment_label = "positive"
-        elif neg_count > pos_count:
-            sentiment_score = 2.0
-            sentiment_label = "negative"
-        else:
-            sentiment_score = 3.0
-            sentiment_label = "neutral"
-        
-        return {
-            'review_id': review['id'],
-            'sentiment_score': sentiment_score,
-            'sentiment_label': sentiment_label,
-            'topics': ['general'],
-            'priority': 'low'
-        }
-    
-    def update_reviews_batch(self, results):
-        """Update multiple reviews in database efficiently"""
+        Failed analyses are never written as results: review-caused failures
+        are recorded for backoff and dead-lettering, transient ones are left
+        unprocessed for the next run once their leases are released.
+        """
         updates = []
+        failures = []
         
-        for result in results:
-            if isinstance(result, dict) and 'review_id' in result:
+        for review, result in zip(reviews, results):
+            if isinstance(result, AnalysisFailure):
+                if result.transient:
+                    self.transient_errors += 1
+                else:
+                    failures.append((review['id'], str(result)))
+            elif isinstance(result, Exception):
+                failures.append((review['id'], f"{type(result).__name__}: {result}"))
+            elif isinstance(result, dict) and 'review_id' in result:
                 update_data = {
                     'sentiment_score': result.get('sentiment_score', 3.0),
                     'sentiment_label': result.get('sentiment_label', 'neutral'),
@@ -125,14 +154,18 @@ Review: "{review['content'][:200]}"'''
                     'ai_model_used': 'gpt-4o-mini-fast',
                     'processed_at': datetime.utcnow().isoformat()
                 }
-                
-                # Update review
-                try:
-                    self.db_manager.supabase.table('reviews').update(update_data).eq('id', result['review_id']).execute()
-                    updates.append(result['review_id'])
-                except Exception as e:
-                    logger.error(f"Failed to update review {result['review_id']}: {e}")
+                updates.append((result['review_id'], update_data, None))
         
+        # Flushed to the database every 500 results (or 5 seconds)
+        self.result_writer.add_many(updates)
+        
+        if failures:
+            try:
+                recorded = self.db_manager.record_analysis_failures(failures)
+                self.failed += recorded['recorded']
+                self.dead_lettered += recorded['dead_lettered']
+            except Exception as e:
+                logger.error(f"❌ Could not record {len(failures)} analysis failures: {e}")
         return len(updates)
 
 async def fast_process_reviews():
@@ -143,64 +176,75 @@ async def fast_process_reviews():
     
     analyzer = FastAIAnalyzer()
     
-    # Get unprocessed reviews
-    unprocessed = analyzer.db_manager.get_unprocessed_reviews(limit=1000)
-    total_reviews = len(unprocessed)
-    
-    if total_reviews == 0:
-        print("✅ No unprocessed reviews found!")
-        return
-    
-    print(f"📊 Found {total_reviews} unprocessed reviews")
-    print(f"⚡ Using optimized fast processing")
-    
-    # Process in larger batches for speed
-    batch_size = 10  # Process 10 reviews simultaneously
-    total_processed = 0
-    start_time = datetime.now()
-    
-    # Create aiohttp session for async processing
-    connector = aiohttp.TCPConnector(limit=20)
-    timeout = aiohttp.ClientTimeout(total=30)
-    
-    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+    # Claimed reviews stay leased to this run; leaving the block hands them back
+    # (after the buffered results are written) even when the run fails
+    with analyzer.work_queue:
+        unprocessed = analyzer.work_queue.claim(1000)
+        total_reviews = len(unprocessed)
         
-        for i in range(0, total_reviews, batch_size):
-            batch = unprocessed[i:i + batch_size]
-            batch_num = (i // batch_size) + 1
-            
-            print(f"📦 Batch {batch_num}: Processing {len(batch)} reviews...")
-            
-            # Analyze batch asynchronously
-            results = await analyzer.analyze_review_batch(batch, session)
-            
-            # Update database
-            updated_count = analyzer.update_reviews_batch(results)
-            total_processed += updated_count
-            
-            # Progress update
-            progress_pct = (total_processed / total_reviews) * 100
-            elapsed = datetime.now() - start_time
-            rate = total_processed / elapsed.total_seconds() if elapsed.total_seconds() > 0 else 0
-            
-            print(f"✅ Batch {batch_num}: {updated_count}/{len(batch)} updated")
-            print(f"📈 Progress: {total_processed}/{total_reviews} ({progress_pct:.1f}%)")
-            print(f"⚡ Rate: {rate:.1f} reviews/second")
-            
-            if total_processed < total_reviews:
-                remaining = total_reviews - total_processed
-                eta_seconds = remaining / rate if rate > 0 else 0
-                print(f"🕐 ETA: {eta_seconds/60:.1f} minutes")
+        if total_reviews == 0:
+            print("✅ No unprocessed reviews found!")
+            return
+        
+        print(f"📊 Found {total_reviews} unprocessed reviews")
+        print(f"⚡ Using optimized fast processing")
+        
+        # The shared rate limiter decides how many of each batch are in flight at once
+        batch_size = 100
+        total_processed = 0
+        start_time = datetime.now()
+        
+        try:
+            # Create aiohttp session for async processing
+            connector = aiohttp.TCPConnector(limit=analyzer.rate_limiter.max_concurrency)
+            timeout = aiohttp.ClientTimeout(total=30)
             
-            # Small delay to avoid rate limits
-            await asyncio.sleep(0.5)
+            async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+                
+                for i in range(0, total_reviews, batch_size):
+                    batch = unprocessed[i:i + batch_size]
+                    batch_num = (i // batch_size) + 1
+                    
+                    print(f"📦 Batch {batch_num}: Processing {len(batch)} reviews...")
+                    
+                    # Analyze batch asynchronously
+                    results = await analyzer.analyze_review_batch(batch, session)
+                    
+                    # Update database
+                    updated_count = analyzer.update_reviews_batch(batch, results)
+                    total_processed += updated_count
+                    
+                    # Progress update
+                    progress_pct = (total_processed / total_reviews) * 100
+                    elapsed = datetime.now() - start_time
+                    rate = total_processed / elapsed.total_seconds() if elapsed.total_seconds() > 0 else 0
+                    
+                    print(f"✅ Batch {batch_num}: {updated_count}/{len(batch)} updated")
+                    print(f"📈 Progress: {total_processed}/{total_reviews} ({progress_pct:.1f}%)")
+                    print(f"⚡ Rate: {rate:.1f} reviews/second")
+                    
+                    if total_processed < total_reviews:
+                        remaining = total_reviews - total_processed
+                        eta_seconds = remaining / rate if rate > 0 else 0
+                        print(f"🕐 ETA: {eta_seconds/60:.1f} minutes")
+        finally:
+            # Write out the tail of the buffered updates before the leases are released
+            analyzer.result_writer.flush()
+        if analyzer.result_writer.failed:
+            print(f"⚠️ {analyzer.result_writer.failed} updates failed to write and remain unprocessed")
     
     # Final summary
     elapsed = datetime.now() - start_time
     print(f"\n🎉 FAST ANALYSIS COMPLETE!")
     print(f"📊 Total processed: {total_processed}/{total_reviews}")
+    if analyzer.failed:
+        print(f"❌ Failed: {analyzer.failed} (retried later with backoff, {analyzer.dead_lettered} dead-lettered)")
+    if analyzer.transient_errors:
+        print(f"⏸️ Rate limited or unreachable: {analyzer.transient_errors} (left in the backlog)")
     print(f"⏱️ Total time: {elapsed}")
     print(f"🚀 Average rate: {total_processed/elapsed.total_seconds():.1f} reviews/second")
+    cache_stats = analyzer.cache.stats()
+    print(f"💾 Cache hits: {cache_stats['hits']} ({cache_stats['hit_rate'] * 100:.1f}%)")
 
 def main():
     """Run fast analysis"""
@@ -0,0 +1,288 @@
+"""
+Rate limiting primitives for OpenAI API calls
+Adaptive limiter shared by every analyzer: local token buckets for
+requests-per-minute and tokens-per-minute, corrected by the x-ratelimit-*
+response headers, a global pause for Retry-After, and an AIMD concurrency
+window
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from typing import Any, Mapping, Optional
+
+import openai
+
+logger = logging.getLogger(__name__)
+
+# Concurrency window bounds; the window starts at MAX_CONCURRENT_REQUESTS
+OPENAI_MAX_CONCURRENCY = int(os.getenv('OPENAI_MAX_CONCURRENCY', 32))
+OPENAI_INITIAL_CONCURRENCY = int(os.getenv('MAX_CONCURRENT_REQUESTS', 5))
+
+# Multiplicative decrease factor on a 429, and how long one decrease covers
+# (a burst of 429s from requests already in flight counts as one signal)
+AIMD_DECREASE_FACTOR = 0.5
+AIMD_DECREASE_HOLDOFF = 2.0
+
+# How often a caller waiting for a free concurrency slot re-checks
+SLOT_POLL_INTERVAL = 0.02
+
+MAX_BACKOFF_SECONDS = 60.0
+
+def parse_retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Seconds from retry-after-ms / Retry-After (delta-seconds form only)"""
+    if not headers:
+        return None
+    for name, scale in (('retry-after-ms', 0.001), ('retry-after', 1.0)):
+        value = headers.get(name)
+        if value:
+            try:
+                return max(0.0, float(value) * scale)
+            except ValueError:
+                continue
+    return None
+
+
+def _header_number(headers: Mapping[str, str], name: str) -> Optional[float]:
+    value = headers.get(name)
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class TokenBucket:
+    """Reservation-style token bucket refilled continuously at a per-minute rate.
+
+    Not tied to an event loop: reserve() takes the tokens immediately (the
+    level may go negative) and returns how long the caller must wait, so the
+    same bucket serves threads and any number of asyncio loops. Callers must
+    hold the owning limiter's lock.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.set_rate(rate_per_minute, capacity)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+
+    def set_rate(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+
+    def _refill(self):
+        """Add tokens earned since the last refill"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate_per_second)
+        self._updated_at = now
+
+    def reserve(self, amount: float = 1.0) -> float:
+        """Take `amount` tokens; returns seconds until they are actually earned"""
+        # A single request larger than the bucket would otherwise wait forever
+        amount = min(amount, self.capacity)
+        self._refill()
+        self._tokens -= amount
+        return max(0.0, -self._tokens / self.rate_per_second)
+
+    def clamp(self, remaining: float):
+        """Never believe we have more than the server says is left"""
+        self._refill()
+        self._tokens = min(self._tokens, remaining)
+
+    @property
+    def available(self) -> float:
+        """Tokens currently available (without waiting)"""
+        self._refill()
+        return self._tokens
+
+
+class AdaptiveRateLimiter:
+    """Thread- and event-loop-safe OpenAI limiter with an AIMD concurrency window.
+
+    Every call is bracketed by acquire()/acquire_sync() and release(). The
+    requests and tokens buckets start from the configured per-minute quotas
+    and are re-rated from x-ratelimit-limit-* and clamped to
+    x-ratelimit-remaining-* on every response, so pacing follows the real
+    account quota. A 429 pauses all callers for Retry-After (exponential
+    backoff when absent) and halves the window; each success at a full window
+    grows it by one request per window's worth of responses.
+    """
+
+    def __init__(self, requests_per_minute: int = 500, tokens_per_minute: int = 200000,
+                 initial_concurrency: Optional[int] = None, max_concurrency: Optional[int] = None,
+                 min_concurrency: int = 1):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency or OPENAI_MAX_CONCURRENCY
+        self.min_concurrency = min_concurrency
+        self.concurrency = float(min(initial_concurrency or OPENAI_INITIAL_CONCURRENCY, self.max_concurrency))
+        self.in_flight = 0
+        self._blocked_until = 0.0
+        self._last_decrease = 0.0
+        self._consecutive_429s = 0
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'rate_limited': 0, 'waited_seconds': 0.0}
+
+    def _try_acquire(self, estimated_tokens: int) -> Optional[float]:
+        """Take a slot and reserve quota; None means no slot yet, else seconds to wait"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                return None
+            if self.in_flight >= max(self.min_concurrency, int(self.concurrency)):
+                return None
+            self.in_flight += 1
+            self.stats['requests'] += 1
+            return max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+
+    def _slot_wait(self) -> float:
+        with self._lock:
+            return max(SLOT_POLL_INTERVAL, self._blocked_until - time.monotonic())
+
+    def _record_wait(self, started: float):
+        with self._lock:
+            self.stats['waited_seconds'] += time.monotonic() - started
+
+    async def acquire(self, estimated_tokens: int = 0):
+        """Wait for a concurrency slot and the request's quota (asyncio callers)"""
+        started = time.monotonic()
+        while True:
+            delay = self._try_acquire(estimated_tokens)
+            if delay is not None:
+                break
+            await asyncio.sleep(self._slot_wait())
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self._record_wait(started)
+
+    def acquire_sync(self, estimated_tokens: int = 0):
+        """Wait for a concurrency slot and the request's quota (threaded callers)"""
+        started = time.monotonic()
+        while True:
+            delay = self._try_acquire(estimated_tokens)
+            if delay is not None:
+                break
+            time.sleep(self._slot_wait())
+        if delay > 0:
+            time.sleep(delay)
+        self._record_wait(started)
+
+    def release(self, status: Optional[int] = None, headers: Optional[Mapping[str, str]] = None):
+        """Free the slot and learn from the response (status None: no response at all)"""
+        with self._lock:
+            now = time.monotonic()
+            window_full = self.in_flight >= int(self.concurrency)
+            self.in_flight = max(0, self.in_flight - 1)
+            if headers:
+                self._apply_headers(headers)
+
+            if status == 429:
+                self.stats['rate_limited'] += 1
+                self._consecutive_429s += 1
+                pause = parse_retry_after(headers)
+                if pause is None:
+                    pause = min(MAX_BACKOFF_SECONDS, 2.0 ** self._consecutive_429s)
+                self._blocked_until = max(self._blocked_until, now + pause)
+                if now - self._last_decrease >= AIMD_DECREASE_HOLDOFF:
+                    self._last_decrease = now
+                    self.concurrency = max(float(self.min_concurrency), self.concurrency * AIMD_DECREASE_FACTOR)
+                    logger.warning(f"⏸️ OpenAI rate limited: pausing {pause:.1f}s, "
+                                   f"concurrency window now {int(self.concurrency)}")
+            elif status is not None and 200 <= status < 300:
+                self._consecutive_429s = 0
+                # Additive increase: +1 slot per window of successful responses
+                if window_full and self.concurrency < self.max_concurrency:
+                    self.concurrency = min(float(self.max_concurrency), self.concurrency + 1.0 / self.concurrency)
+
+    def _apply_headers(self, headers: Mapping[str, str]):
+        # x-ratelimit-reset-* is the time to a full refill, not to the next
+        # request, so pacing comes from the clamped buckets' refill rate instead
+        for kind, bucket in (('requests', self.requests), ('tokens', self.tokens)):
+            limit = _header_number(headers, f'x-ratelimit-limit-{kind}')
+            if limit and limit != bucket.capacity:
+                bucket.set_rate(limit)
+            remaining = _header_number(headers, f'x-ratelimit-remaining-{kind}')
+            if remaining is not None:
+                bucket.clamp(remaining)
+
+    def retry_delay(self, attempt: int) -> float:
+        """Backoff before retrying a 5xx or connection error (429s wait inside acquire)"""
+        return min(MAX_BACKOFF_SECONDS, 2.0 ** attempt)
+
+
+# Kept for callers that still refer to the previous fixed-rate limiter
+OpenAIRateLimiter = AdaptiveRateLimiter
+
+
+def estimate_tokens(text: str, max_completion_tokens: int = 0) -> int:
+    """Rough token estimate (~4 characters per token) plus the completion budget"""
+    return len(text) // 4 + max_completion_tokens
+
+
+def is_retryable_status(status: Optional[int]) -> bool:
+    return status is None or status == 429 or status >= 500
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """SDK errors that reflect API availability rather than the request itself"""
+    if isinstance(error, openai.APIStatusError):
+        return is_retryable_status(error.status_code)
+    return isinstance(error, openai.APIConnectionError)
+
+
+_shared_limiter: Optional[AdaptiveRateLimiter] = None
+_shared_limiter_lock = threading.Lock()
+
+
+def get_openai_rate_limiter() -> AdaptiveRateLimiter:
+    """Process-wide limiter, so every analyzer draws on the same account quota"""
+    global _shared_limiter
+    with _shared_limiter_lock:
+        if _shared_limiter is None:
+            _shared_limiter = AdaptiveRateLimiter(
+                int(os.getenv('OPENAI_REQUESTS_PER_MINUTE', 500)),
+                int(os.getenv('OPENAI_TOKENS_PER_MINUTE', 200000))
+            )
+        return _shared_limiter
+
+
+def create_chat_completion(client: openai.OpenAI, limiter: Optional[AdaptiveRateLimiter] = None,
+                           max_retries: int = 3, label: str = 'request', **kwargs) -> Any:
+    """client.chat.completions.create() paced by the limiter, retrying 429s and 5xx.
+
+    Build the client with max_retries=0 so the SDK does not retry behind the
+    limiter's back. Raises the last error once retries are exhausted.
+    """
+    limiter = limiter or get_openai_rate_limiter()
+    prompt_text = "".join(str(m.get('content', '')) for m in kwargs.get('messages', []))
+    estimated = estimate_tokens(prompt_text, kwargs.get('max_tokens') or 0)
+
+    for attempt in range(max_retries + 1):
+        limiter.acquire_sync(estimated)
+        released = False
+        try:
+            raw = client.chat.completions.with_raw_response.create(**kwargs)
+            limiter.release(raw.status_code, raw.headers)
+            released = True
+            return raw.parse()
+        except openai.APIStatusError as e:
+            limiter.release(e.status_code, e.response.headers)
+            released = True
+            if not is_retryable_status(e.status_code) or attempt == max_retries:
+                raise
+            logger.warning(f"⏸️ API returned {e.status_code} for {label}, retrying")
+            if e.status_code != 429:
+                time.sleep(limiter.retry_delay(attempt))
+        except openai.APIConnectionError as e:
+            limiter.release(None)
+            released = True
+            if attempt == max_retries:
+                raise
+            logger.warning(f"⚠️ Request failed for {label}: {e}")
+            time.sleep(limiter.retry_delay(attempt))
+        finally:
+            # Any other error (bad kwargs, response validation, interrupts) must
+            # not leak the slot: the limiter is shared by the whole process
+            if not released:
+                limiter.release(None)
@@ -29,9 +29,8 @@ def run_ai_analysis():
         db_manager = get_db_manager()
         processor = ReviewProcessor()
         
-        # Check how many unprocessed reviews we have
-        unprocessed = db_manager.get_unprocessed_reviews(limit=10000)  # Get count
-        total_unprocessed = len(unprocessed)
+        # Check how many unprocessed reviews we have (excluding ones backing off or dead-lettered)
+        total_unprocessed = db_manager.count_analysis_backlog()
         
         print(f"📊 Found {total_unprocessed} unprocessed reviews")
         
@@ -57,9 +56,13 @@ def run_ai_analysis():
         print(f"\n🚀 Starting analysis in batches of {batch_size}...")
         start_time = datetime.now()
         
-        while total_processed < total_unprocessed:
-            batch_num = (total_processed // batch_size) + 1
-            remaining = total_unprocessed - total_processed
+        total_dead_lettered = 0
+        batch_num = 0
+        
+        # Failed reviews are pushed back, so each batch fetches new rows
+        while total_processed + total_errors < total_unprocessed:
+            batch_num += 1
+            remaining = total_unprocessed - total_processed - total_errors
             current_batch_size = min(batch_size, remaining)
             
             print(f"\n📦 Batch {batch_num}: Processing {current_batch_size} reviews...")
@@ -74,14 +77,20 @@ def run_ai_analysis():
             
             total_processed += batch_processed
             total_errors += batch_errors
+            total_dead_lettered += result.get('dead_lettered', 0)
             
             print(f"✅ Batch {batch_num} complete: {batch_processed} processed, {batch_errors} errors")
             
-            # If we didn't process any reviews, we're done
-            if batch_processed == 0:
+            # If the batch found no reviews at all, we're done
+            if batch_processed == 0 and batch_errors == 0:
                 print("ℹ️ No more reviews to process")
                 break
             
+            # Rate limits or outages outlasting the retries: stop rather than spin on them
+            if batch_processed == 0 and batch_errors == result.get('transient_errors', 0):
+                print("⚠️ Every request in the batch failed transiently; stopping (rerun later)")
+                break
+            
             # Show time estimates
             elapsed = datetime.now() - start_time
             if total_processed > 0:
@@ -97,7 +106,9 @@ def run_ai_analysis():
         elapsed = datetime.now() - start_time
         print(f"\n🎉 ANALYSIS COMPLETE!")
         print(f"📊 Total processed: {total_processed}")
-        print(f"❌ Total errors: {total_errors}")
+        print(f"❌ Total errors: {total_errors} (retried later with backoff)")
+        if total_dead_lettered:
+            print(f"☠️ Dead-lettered: {total_dead_lettered} (requeue with requeue_dead_lettered_reviews)")
         print(f"⏱️ Total time: {elapsed}")
         print(f"🚀 Average rate: {total_processed/elapsed.total_seconds():.2f} reviews/second")
         
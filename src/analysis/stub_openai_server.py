@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Local stub for the OpenAI chat-completions endpoint
+Returns canned analysis JSON after a simulated latency so the analysis
+pipeline can be benchmarked offline without spending API quota
+"""
+
+import json
+import time
+import random
+import asyncio
+import argparse
+import logging
+from typing import Any
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+CANNED_ANALYSIS = {
+    "sentiment": {"score": 0.4, "label": "positive", "confidence": 0.8},
+    "topics": ["performance", "protection"],
+    "issues_mentioned": [],
+    "business_intelligence": {"priority_level": "low", "requires_response": False,
+                              "churn_risk": "low", "upsell_opportunity": False},
+    "intent_analysis": {"primary_intent": "praise", "switching_intent": False, "recommendation_intent": True},
+    "summary": "Stub analysis"
+}
+
+
+def canned_response(prompt: str) -> Any:
+    """Single analysis object, or one entry per review_id for batched prompts"""
+    marker = prompt.rfind('Reviews:\n[')
+    if marker < 0:
+        return CANNED_ANALYSIS
+
+    try:
+        tagged = json.loads(prompt[marker + len('Reviews:\n'):])
+    except json.JSONDecodeError:
+        return CANNED_ANALYSIS
+    return [{'review_id': item.get('review_id'), **CANNED_ANALYSIS} for item in tagged]
+
+
+def build_app(latency_ms: int = 800, jitter_ms: int = 200, error_rate: float = 0.0,
+              requests_per_minute: int = 0) -> web.Application:
+    """Create the stub application.
+
+    requests_per_minute > 0 enforces a quota like the real API: a token
+    bucket of that size, x-ratelimit-* headers on every response, and a 429
+    with Retry-After once it is empty.
+    """
+    quota = {'tokens': float(requests_per_minute), 'updated_at': time.monotonic()}
+
+    def take_request() -> dict:
+        """Rate-limit headers for this request; includes Retry-After when refused"""
+        if not requests_per_minute:
+            return {}
+        now = time.monotonic()
+        rate = requests_per_minute / 60.0
+        quota['tokens'] = min(requests_per_minute, quota['tokens'] + (now - quota['updated_at']) * rate)
+        quota['updated_at'] = now
+        headers = {'x-ratelimit-limit-requests': str(requests_per_minute)}
+        if quota['tokens'] < 1:
+            wait = (1 - quota['tokens']) / rate
+            headers.update({'x-ratelimit-remaining-requests': '0', 'x-ratelimit-reset-requests': f"{wait:.3f}s",
+                            'Retry-After': f"{wait:.3f}"})
+            return headers
+        quota['tokens'] -= 1
+        headers.update({'x-ratelimit-remaining-requests': str(int(quota['tokens'])),
+                        'x-ratelimit-reset-requests': f"{(requests_per_minute - quota['tokens']) / rate:.3f}s"})
+        return headers
+
+    async def chat_completions(request: web.Request) -> web.Response:
+        payload = await request.json()
+        quota_headers = take_request()
+        await asyncio.sleep(max(0, latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000)
+
+        if 'Retry-After' in quota_headers or (error_rate and random.random() < error_rate):
+            return web.json_response(
+                {"error": {"message": "Rate limit reached (stub)", "type": "requests"}},
+                status=429, headers={'Retry-After': '1', **quota_headers}
+            )
+
+        messages = payload.get('messages', [])
+        prompt_chars = sum(len(m.get('content', '')) for m in messages)
+        content = json.dumps(canned_response(messages[-1].get('content', '') if messages else ''))
+
+        return web.json_response({
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "model": payload.get('model', 'stub'),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_chars // 4, "completion_tokens": len(content) // 4,
+                      "total_tokens": (prompt_chars + len(content)) // 4}
+        }, headers=quota_headers)
+
+    app = web.Application()
+    app.router.add_post('/v1/chat/completions', chat_completions)
+    return app
+
+
+async def start_stub_server(host: str = '127.0.0.1', port: int = 8089, **app_kwargs) -> web.AppRunner:
+    """Start the stub in the running event loop; call `await runner.cleanup()` to stop it"""
+    runner = web.AppRunner(build_app(**app_kwargs), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+def main():
+    """Run the stub server standalone"""
+    parser = argparse.ArgumentParser(description="Stub OpenAI chat-completions server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency_ms', type=int, default=800, help='Simulated response latency')
+    parser.add_argument('--jitter_ms', type=int, default=200, help='Random latency jitter')
+    parser.add_argument('--error_rate', type=float, default=0.0, help='Fraction of requests answered with 429')
+    parser.add_argument('--requests_per_minute', type=int, default=0, help='Enforced request quota (0: unlimited)')
+
+    args = parser.parse_args()
+    print(f"🧪 Stub OpenAI server on http://{args.host}:{args.port}/v1 (set OPENAI_BASE_URL to use it)")
+    web.run_app(build_app(args.latency_ms, args.jitter_ms, args.error_rate, args.requests_per_minute), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@ import json
 # Local imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database.manager import get_db_manager
+from database.metadata_registry import get_metadata_registry
 
 def show_analysis_results():
     """Show comprehensive analysis results"""
@@ -20,14 +21,45 @@ def show_analysis_results():
     print("=" * 60)
     
     db_manager = get_db_manager()
+    products = get_metadata_registry().products()
+    product_map = {p['id']: f"{p['name']} ({p['company']})" for p in products}
     
-    # Get processed reviews
-    all_reviews = db_manager.get_reviews(limit=2000)
-    processed_reviews = [r for r in all_reviews if r.get('processed_at')]
+    # Stream processed reviews page by page, skipping the large content column
+    total_processed = 0
+    sentiment_counts = Counter()
+    topic_counts = Counter()
+    priority_counts = Counter()
+    product_reviews = Counter()
+    product_positive = Counter()
+    score_total = 0.0
+    score_count = 0
+    
+    for review in db_manager.iter_reviews(
+        filters={'processed_at__isnull': False},
+        columns=['product_id', 'sentiment_label', 'sentiment_score', 'key_topics', 'priority_level']
+    ):
+        total_processed += 1
+        sentiment = review.get('sentiment_label') or 'unknown'
+        sentiment_counts[sentiment] += 1
+        priority_counts[review.get('priority_level') or 'low'] += 1
+        
+        if review.get('sentiment_score'):
+            score_total += float(review['sentiment_score'])
+            score_count += 1
+        
+        topics = review.get('key_topics', [])
+        if isinstance(topics, list):
+            topic_counts.update(topics)
+        
+        product_name = product_map.get(review.get('product_id'))
+        if product_name:
+            product_reviews[product_name] += 1
+            if sentiment == 'positive':
+                product_positive[product_name] += 1
     
-    print(f"✅ Total Reviews Analyzed: {len(processed_reviews)}")
+    print(f"✅ Total Reviews Analyzed: {total_processed}")
     
-    if not processed_reviews:
+    if not total_processed:
         print("❌ No processed reviews found")
         return
     
@@ -35,72 +67,37 @@ def show_analysis_results():
     print(f"\n😊 SENTIMENT ANALYSIS:")
     print("-" * 30)
     
-    sentiments = [r.get('sentiment_label', 'unknown') for r in processed_reviews]
-    sentiment_counts = Counter(sentiments)
-    
     for sentiment, count in sentiment_counts.most_common():
-        percentage = (count / len(processed_reviews)) * 100
+        percentage = (count / total_processed) * 100
         print(f"{sentiment.title():>10}: {count:>4} ({percentage:.1f}%)")
     
     # Average sentiment score
-    scores = [r.get('sentiment_score', 0) for r in processed_reviews if r.get('sentiment_score')]
-    if scores:
-        avg_score = sum(scores) / len(scores)
+    if score_count:
+        avg_score = score_total / score_count
         print(f"{'Average':>10}: {avg_score:.2f}/5.0")
     
     # Topic Analysis
     print(f"\n🏷️ TOP TOPICS MENTIONED:")
     print("-" * 30)
     
-    all_topics = []
-    for review in processed_reviews:
-        topics = review.get('key_topics', [])
-        if isinstance(topics, list):
-            all_topics.extend(topics)
-    
-    topic_counts = Counter(all_topics)
     for topic, count in topic_counts.most_common(10):
-        percentage = (count / len(processed_reviews)) * 100
+        percentage = (count / total_processed) * 100
         print(f"{topic.title():>15}: {count:>4} ({percentage:.1f}%)")
     
     # Priority Analysis
     print(f"\n🚨 PRIORITY LEVELS:")
     print("-" * 30)
     
-    priorities = [r.get('priority_level', 'low') for r in processed_reviews]
-    priority_counts = Counter(priorities)
-    
     for priority, count in priority_counts.most_common():
-        percentage = (count / len(processed_reviews)) * 100
+        percentage = (count / total_processed) * 100
         print(f"{priority.title():>10}: {count:>4} ({percentage:.1f}%)")
     
     # Product Breakdown
     print(f"\n📱 BY PRODUCT:")
     print("-" * 30)
     
-    products = db_manager.get_products()
-    product_map = {p['id']: f"{p['name']} ({p['company']})" for p in products}
-    
-    product_reviews = {}
-    product_sentiments = {}
-    
-    for review in processed_reviews:
-        pid = review.get('product_id')
-        if pid in product_map:
-            product_name = product_map[pid]
-            
-            # Count reviews
-            product_reviews[product_name] = product_reviews.get(product_name, 0) + 1
-            
-            # Track sentiment
-            sentiment = review.get('sentiment_label', 'neutral')
-            if product_name not in product_sentiments:
-                product_sentiments[product_name] = []
-            product_sentiments[product_name].append(sentiment)
-    
-    for product, count in sorted(product_reviews.items(), key=lambda x: x[1], reverse=True):
-        sentiments = product_sentiments[product]
-        positive_pct = (sentiments.count('positive') / len(sentiments)) * 100 if sentiments else 0
+    for product, count in product_reviews.most_common():
+        positive_pct = (product_positive[product] / count) * 100
         
         product_short = product[:35] + "..." if len(product) > 35 else product
         print(f"{product_short:<38}: {count:>4} reviews ({positive_pct:.0f}% positive)")
@@ -109,11 +106,15 @@ def show_analysis_results():
     print(f"\n🕐 RECENT ACTIVITY:")
     print("-" * 30)
     
-    recent_reviews = [r for r in processed_reviews if r.get('processed_at')][-10:]
+    recent_reviews = db_manager.iter_reviews(
+        filters={'processed_at__isnull': False},
+        columns=['sentiment_label', 'sentiment_score', 'content'],
+        page_size=10, limit=10
+    )
     for review in recent_reviews:
         review_id = review.get('id', 'N/A')
         sentiment = review.get('sentiment_label', 'neutral')
-        score = review.get('sentiment_score', 0)
+        score = float(review.get('sentiment_score') or 0)
         content_preview = review.get('content', '')[:50] + "..." if review.get('content') else ''
         
         print(f"Review {review_id}: {sentiment} ({score:.1f}) - {content_preview}")
@@ -128,7 +129,7 @@ def show_insights_by_product():
     print("=" * 60)
     
     db_manager = get_db_manager()
-    products = db_manager.get_products()
+    products = get_metadata_registry().products()
     
     for product in products[:5]:  # Show top 5 products
         print(f"\n🔍 {product['name']} by {product['company']}")
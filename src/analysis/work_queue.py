@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Analysis Work Queue
+Lease-based claims on the review analysis backlog, so any number of analysis
+workers (threads, terminals or hosts) can drain it without two of them paying
+for the same review; leases are kept alive by a heartbeat thread and expire
+when a worker dies
+"""
+
+import os
+import sys
+import uuid
+import socket
+import logging
+import threading
+from typing import Dict, List, Optional
+
+# Local imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.manager import ANALYSIS_LEASE_SECONDS, DatabaseManager, get_db_manager
+
+logger = logging.getLogger(__name__)
+
+
+def make_worker_id() -> str:
+    """Unique per queue: host, process and a random suffix"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class AnalysisWorkQueue:
+    """Claims backlog reviews for one worker and holds them until released.
+
+    claim() leases reviews with claim_analysis_batch; while any are held a
+    daemon thread renews them every heartbeat_interval seconds (a third of the
+    lease by default). release() hands reviews back once their results and
+    failures are written: analyzed ones have left the backlog, the rest are
+    claimable again right away. close() stops the heartbeat and releases
+    everything still held.
+    """
+
+    def __init__(self, db_manager: Optional[DatabaseManager] = None, worker_id: Optional[str] = None,
+                 lease_seconds: Optional[int] = None, heartbeat_interval: Optional[float] = None):
+        self.db_manager = db_manager or get_db_manager()
+        self.worker_id = worker_id or make_worker_id()
+        self.lease_seconds = lease_seconds or ANALYSIS_LEASE_SECONDS
+        self.heartbeat_interval = heartbeat_interval or self.lease_seconds / 3
+        self._held: set = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+        self.stats = {'claimed': 0, 'released': 0, 'lost': 0}
+
+    @property
+    def held(self) -> List[int]:
+        with self._lock:
+            return list(self._held)
+
+    def claim(self, limit: int, product_ids: Optional[List[int]] = None, year: Optional[int] = None) -> List[Dict]:
+        """Lease up to `limit` backlog reviews (optionally for some products / one year)"""
+        reviews = self.db_manager.claim_analysis_batch(self.worker_id, limit, self.lease_seconds,
+                                                       product_ids=product_ids, year=year)
+        if reviews:
+            with self._lock:
+                self._held.update(review['id'] for review in reviews)
+            self.stats['claimed'] += len(reviews)
+            self._start_heartbeat()
+        return reviews
+
+    def release(self, review_ids: Optional[List[int]] = None) -> int:
+        """Give back some (or all) held reviews; call after their results are written"""
+        with self._lock:
+            ids = list(self._held) if review_ids is None else [i for i in review_ids if i in self._held]
+            self._held.difference_update(ids)
+        if not ids:
+            return 0
+        released = self.db_manager.release_analysis_leases(self.worker_id, ids)
+        self.stats['released'] += released
+        return released
+
+    def renew(self) -> int:
+        """Extend every held lease now; returns leases still held"""
+        ids = self.held
+        if not ids:
+            return 0
+        renewed = set(self.db_manager.renew_analysis_leases(self.worker_id, ids, self.lease_seconds))
+        with self._lock:
+            # Ignore ids released while the renewal was in flight
+            lost = (set(ids) - renewed) & self._held
+            self._held -= lost
+        if lost:
+            self.stats['lost'] += len(lost)
+            logger.warning(f"⚠️ {len(lost)} analysis leases expired before renewal and may be re-analyzed "
+                           f"elsewhere (raise ANALYSIS_LEASE_SECONDS?)")
+        return len(renewed)
+
+    def _start_heartbeat(self):
+        with self._lock:
+            if self._heartbeat is not None and self._heartbeat.is_alive():
+                return
+            self._stop.clear()
+            self._heartbeat = threading.Thread(target=self._heartbeat_loop, name=f"lease-heartbeat-{self.worker_id}",
+                                               daemon=True)
+            self._heartbeat.start()
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.heartbeat_interval):
+            try:
+                self.renew()
+            except Exception as e:
+                # The next beat retries; leases only lapse after lease_seconds
+                logger.error(f"❌ Lease heartbeat failed: {e}")
+
+    def close(self) -> int:
+        """Stop the heartbeat and release every lease still held"""
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join(timeout=5)
+        try:
+            return self.release()
+        except Exception as e:
+            logger.error(f"❌ Could not release {len(self._held)} analysis leases (they expire on their own): {e}")
+            return 0
+
+    def __enter__(self) -> 'AnalysisWorkQueue':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
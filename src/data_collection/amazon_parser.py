@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Amazon Review Page Parser
+lxml extractor with precompiled XPath selectors. Takes raw HTML bytes and
+returns plain dicts, so pages can be parsed in a worker process while the
+next page downloads
+"""
+
+import os
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional
+
+from lxml import etree, html as lxml_html
+
+logger = logging.getLogger(__name__)
+
+# Parser processes shared by every Amazon scraper in this process. 0 parses
+# inline on the fetch threads (the default on single-core hosts, where
+# handing pages to another process only adds IPC)
+AMAZON_PARSE_WORKERS = int(os.getenv('AMAZON_PARSE_WORKERS', min(2, (os.cpu_count() or 1) - 1)))
+
+
+def _has_class(name: str) -> str:
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+
+# Compiled once; equivalent to the BeautifulSoup find() calls they replace
+_REVIEWS = etree.XPath('//div[@data-hook="review"]')
+_USER_NAME = etree.XPath(f'(.//span[{_has_class("a-profile-name")}])[1]')
+_RATING = etree.XPath('(.//i[@data-hook="review-star-rating"])[1]')
+_TITLE = etree.XPath('(.//a[@data-hook="review-title"])[1]')
+_BODY = etree.XPath('(.//span[@data-hook="review-body"])[1]')
+_DATE = etree.XPath('(.//span[@data-hook="review-date"])[1]')
+_HELPFUL = etree.XPath('(.//span[@data-hook="helpful-vote-statement"])[1]')
+_VERIFIED = etree.XPath('(.//span[@data-hook="avp-badge"])[1]')
+
+
+def _first_text(selector: etree.XPath, element) -> Optional[str]:
+    matches = selector(element)
+    return matches[0].text_content() if matches else None
+
+
+def parse_review_date(date_text: str) -> Optional[datetime]:
+    """Amazon format: "Reviewed in the United States on March 15, 2024" """
+    if 'on ' not in date_text:
+        return None
+    try:
+        return datetime.strptime(date_text.split('on ')[-1].strip(), '%B %d, %Y').replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+def parse_review_page(content: bytes) -> List[Dict[str, Any]]:
+    """Extract every review on an Amazon product-reviews page.
+
+    review_id is None when the element has no id; review_date is None when
+    the date cannot be parsed. Reviews that fail to parse are skipped.
+    """
+    if not content:
+        return []
+    document = lxml_html.fromstring(content)
+
+    reviews = []
+    for element in _REVIEWS(document):
+        try:
+            rating_text = _first_text(_RATING, element) or '1 out of 5 stars'
+            title = _first_text(_TITLE, element)
+            helpful_text = _first_text(_HELPFUL, element)
+            helpful_digits = ''.join(filter(str.isdigit, helpful_text)) if helpful_text else ''
+
+            reviews.append({
+                'review_id': element.get('id'),
+                'user_name': (_first_text(_USER_NAME, element) or 'Anonymous').strip(),
+                # "4.0 out of 5 stars"
+                'rating': int(float(rating_text.split()[0])),
+                'title': title.strip() if title is not None else None,
+                'content': (_first_text(_BODY, element) or '').strip(),
+                'review_date': parse_review_date(_first_text(_DATE, element) or ''),
+                'helpful_count': int(helpful_digits) if helpful_digits else 0,
+                'verified_purchase': bool(_VERIFIED(element))
+            })
+        except Exception as e:
+            logger.warning(f"⚠️ Error parsing Amazon review: {e}")
+    return reviews
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_parse_pool() -> Optional[ProcessPoolExecutor]:
+    """Shared parser process pool, created on first use (None when AMAZON_PARSE_WORKERS=0)"""
+    global _pool
+    if AMAZON_PARSE_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn: collection runs on many threads, which fork does not survive safely
+            _pool = ProcessPoolExecutor(max_workers=AMAZON_PARSE_WORKERS,
+                                        mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def parse_review_page_pooled(content: bytes) -> List[Dict[str, Any]]:
+    """Parse in the shared process pool (inline when pooling is disabled)"""
+    pool = get_parse_pool()
+    if pool is None:
+        return parse_review_page(content)
+    return pool.submit(parse_review_page, content).result()
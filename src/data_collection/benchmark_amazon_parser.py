@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Amazon Parser Benchmark
+Parse throughput of the lxml extractor (inline and in the process pool)
+against the BeautifulSoup html.parser extraction it replaced, over saved
+Amazon review pages
+"""
+
+import os
+import sys
+import glob
+import time
+import random
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Any
+
+from bs4 import BeautifulSoup
+
+# Local imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_collection.amazon_parser import parse_review_page
+
+
+def parse_review_page_bs4(content: bytes) -> List[Dict[str, Any]]:
+    """Previous extraction: BeautifulSoup with the pure-Python html.parser"""
+    soup = BeautifulSoup(content, 'html.parser')
+    reviews = []
+    for review_elem in soup.find_all('div', {'data-hook': 'review'}):
+        user_elem = review_elem.find('span', class_='a-profile-name')
+        rating_elem = review_elem.find('i', {'data-hook': 'review-star-rating'})
+        title_elem = review_elem.find('a', {'data-hook': 'review-title'})
+        content_elem = review_elem.find('span', {'data-hook': 'review-body'})
+        date_elem = review_elem.find('span', {'data-hook': 'review-date'})
+        helpful_elem = review_elem.find('span', {'data-hook': 'helpful-vote-statement'})
+        reviews.append({
+            'review_id': review_elem.get('id'),
+            'user_name': user_elem.text.strip() if user_elem else 'Anonymous',
+            'rating': rating_elem.text if rating_elem else None,
+            'title': title_elem.text.strip() if title_elem else None,
+            'content': content_elem.text.strip() if content_elem else '',
+            'date_text': date_elem.text if date_elem else '',
+            'helpful_text': helpful_elem.text if helpful_elem else None,
+            'verified_purchase': review_elem.find('span', {'data-hook': 'avp-badge'}) is not None
+        })
+    return reviews
+
+
+def synthetic_page(page: int, reviews_per_page: int) -> bytes:
+    """Amazon-shaped review page, padded with navigation markup like the real thing"""
+    rng = random.Random(page)
+    navigation = ''.join(f'<li class="nav-item"><a href="/c/{i}">Category {i}</a></li>' for i in range(300))
+    reviews = []
+    for i in range(reviews_per_page):
+        body = ' '.join(rng.choice(['scan', 'virus', 'slow', 'great', 'renewal', 'support', 'price'])
+                        for _ in range(rng.randint(20, 120)))
+        reviews.append(f'''
+        <div id="R{page:04d}{i:03d}" data-hook="review" class="a-section review aok-relative">
+          <div class="a-profile"><span class="a-profile-name">Customer {i}</span></div>
+          <i data-hook="review-star-rating" class="a-icon a-icon-star"><span>{rng.randint(1, 5)}.0 out of 5 stars</span></i>
+          <a data-hook="review-title" class="a-link-normal"><span>Review title {i}</span></a>
+          <span data-hook="review-date" class="a-size-base">Reviewed in the United States on March {1 + i % 28}, 2024</span>
+          <span data-hook="avp-badge" class="a-size-mini">Verified Purchase</span>
+          <span data-hook="review-body" class="a-size-base review-text"><span>{body}</span></span>
+          <span data-hook="helpful-vote-statement">{rng.randint(1, 99)} people found this helpful</span>
+        </div>''')
+    return (f'<html><head><title>Reviews</title></head><body><ul class="nav">{navigation}</ul>'
+            f'<div id="cm_cr-review_list">{"".join(reviews)}</div></body></html>').encode('utf-8')
+
+
+def load_pages(fixtures: str, synthetic: int, reviews_per_page: int) -> List[bytes]:
+    if fixtures:
+        paths = sorted(glob.glob(os.path.join(fixtures, '*.html')))
+        if not paths:
+            raise SystemExit(f"❌ No .html fixtures found in {fixtures}")
+        pages = []
+        for path in paths:
+            with open(path, 'rb') as f:
+                pages.append(f.read())
+        return pages
+    return [synthetic_page(page, reviews_per_page) for page in range(synthetic)]
+
+
+def measure(name: str, pages: List[bytes], run: Callable[[List[bytes]], List[List[Dict]]]) -> float:
+    start = time.perf_counter()
+    results = run(pages)
+    elapsed = time.perf_counter() - start
+    review_count = sum(len(result) for result in results)
+    print(f"{name:<28} {elapsed:>8.2f}s {len(pages) / elapsed:>10.1f} pages/s {review_count / elapsed:>10.0f} reviews/s")
+    return elapsed
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Benchmark Amazon review page parsing")
+    parser.add_argument('--fixtures', help='Directory of saved Amazon review pages (*.html)')
+    parser.add_argument('--synthetic', type=int, default=100, help='Synthetic pages to generate when no fixtures are given')
+    parser.add_argument('--reviews_per_page', type=int, default=10, help='Reviews per synthetic page')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='Parser processes for the pooled run')
+    args = parser.parse_args()
+
+    pages = load_pages(args.fixtures, args.synthetic, args.reviews_per_page)
+    source = args.fixtures or 'synthetic pages'
+    print(f"📄 {len(pages)} pages from {source}, {sum(map(len, pages)) / 1024 / 1024:.1f} MB")
+
+    bs4_counts = [len(parse_review_page_bs4(page)) for page in pages[:5]]
+    lxml_counts = [len(parse_review_page(page)) for page in pages[:5]]
+    if bs4_counts != lxml_counts:
+        print(f"⚠️ Extractors disagree on review counts: bs4 {bs4_counts} vs lxml {lxml_counts}")
+
+    baseline = measure('bs4 html.parser', pages, lambda p: [parse_review_page_bs4(page) for page in p])
+    inline = measure('lxml (inline)', pages, lambda p: [parse_review_page(page) for page in p])
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        # Warm the workers so process start-up is not counted
+        list(pool.map(parse_review_page, pages[:args.workers]))
+        pooled = measure(f'lxml ({args.workers} processes)', pages, lambda p: list(pool.map(parse_review_page, p)))
+
+    print(f"🚀 lxml inline: {baseline / inline:.1f}x, pooled: {baseline / pooled:.1f}x vs bs4 html.parser")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+In-process Collection API
+Importable entry point for running review collections from Python: resolves
+products, runs fetches concurrently on the collection scheduler's platform
+pools, and returns structured results instead of log text
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Any, Optional
+
+# Local imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from database.manager import DatabaseManager, get_db_manager
+from database.metadata_registry import MetadataRegistry, get_metadata_registry
+from collection_scheduler import CollectionScheduler, CollectionTask, SCRAPER_KEYS, get_platform_rate_limits
+
+logger = logging.getLogger(__name__)
+
+# ReviewCollectionManager scraper keys -> database platform names
+PLATFORM_NAMES = {key: name for name, key in SCRAPER_KEYS.items()}
+
+
+@dataclass
+class FetchRequest:
+    """One platform/app collection, identified by product_id or product name (and company)"""
+    platform: str
+    app_id: str
+    product_name: Optional[str] = None
+    company: Optional[str] = None
+    product_id: Optional[int] = None
+    max_reviews: int = 1000
+    # Passed through to collect_reviews (country, language, site, max_pages, incremental, ...)
+    options: Dict[str, Any] = field(default_factory=lambda: {'country': 'us'})
+
+
+@dataclass
+class CollectionResult:
+    """Outcome of one fetch; failures are reported here rather than raised"""
+    success: bool
+    platform: str
+    app_id: str
+    max_reviews: int
+    product_id: Optional[int] = None
+    job_id: Optional[int] = None
+    reviews_collected: int = 0
+    total_found: int = 0
+    error: Optional[str] = None
+    elapsed_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class CollectionClient:
+    """Runs collections in this process on long-lived platform pools.
+
+    One client resolves products through the metadata registry and keeps
+    one scheduler, whose worker threads each hold a warm
+    ReviewCollectionManager (scrapers and their HTTP sessions) between calls,
+    all sharing the process-wide DatabaseManager and its connection pool.
+    Platforms run in parallel under their hourly rate limits.
+    """
+
+    def __init__(self, db_manager: Optional[DatabaseManager] = None, workers_per_platform: Optional[int] = None,
+                 rate_limits: Optional[Dict[str, int]] = None):
+        self.db_manager = db_manager or get_db_manager()
+        self.metadata = get_metadata_registry() if db_manager is None else MetadataRegistry(db_manager)
+        self.scheduler = CollectionScheduler(rate_limits or get_platform_rate_limits(self.db_manager),
+                                             workers_per_platform)
+
+    def resolve_product_id(self, product_name: str, company: Optional[str] = None) -> Optional[int]:
+        """Product ID by name (and company) from the metadata registry"""
+        product = self.metadata.product_by_name(product_name, company)
+        if not product:
+            # Products added since the registry loaded
+            self.metadata.invalidate('products')
+            product = self.metadata.product_by_name(product_name, company)
+        if not product:
+            return None
+        logger.info(f"✅ Found product: {product['name']} by {product['company']} (ID: {product['id']})")
+        return product['id']
+
+    def _display_name(self, platform_name: str) -> str:
+        platform = self.metadata.platform_by_name(platform_name)
+        return (platform.get('display_name') or platform_name) if platform else platform_name
+
+    def _failed(self, request: FetchRequest, error: str) -> Future:
+        logger.error(f"❌ {request.platform}/{request.app_id}: {error}")
+        future: Future = Future()
+        future.set_result(CollectionResult(success=False, platform=request.platform, app_id=request.app_id,
+                                           max_reviews=request.max_reviews, product_id=request.product_id,
+                                           error=error))
+        return future
+
+    def submit(self, request: FetchRequest) -> Future:
+        """Start a fetch in the background; the future resolves to a CollectionResult"""
+        if request.platform not in PLATFORM_NAMES:
+            raise ValueError(f"Unsupported platform: {request.platform}. Supported: {', '.join(PLATFORM_NAMES)}")
+        if not request.app_id:
+            raise ValueError("app_id is required")
+
+        product_id = request.product_id
+        try:
+            if not product_id:
+                if not request.product_name:
+                    return self._failed(request, "Either product_id or product_name must be provided")
+                product_id = self.resolve_product_id(request.product_name, request.company)
+                if not product_id:
+                    return self._failed(request, f"Product '{request.product_name}' not found. "
+                                                 f"Please add it to the database first.")
+            platform_name = PLATFORM_NAMES[request.platform]
+            task = CollectionTask(
+                product_id=product_id,
+                product_name=request.product_name or str(product_id),
+                platform_name=platform_name,
+                platform_display_name=self._display_name(platform_name),
+                app_id=request.app_id
+            )
+        except Exception as e:
+            return self._failed(request, str(e))
+
+        started_at = time.time()
+        result_future: Future = Future()
+
+        def finish(task_future: Future):
+            result = CollectionResult(success=False, platform=request.platform, app_id=request.app_id,
+                                      max_reviews=request.max_reviews, product_id=product_id,
+                                      elapsed_seconds=round(time.time() - started_at, 2))
+            try:
+                collected = task_future.result()
+                result.success = True
+                result.job_id = collected.get('job_id')
+                result.reviews_collected = collected.get('reviews_collected', 0)
+                result.total_found = collected.get('total_found', result.reviews_collected)
+            except Exception as e:
+                logger.error(f"❌ Collection failed for {request.platform}/{request.app_id}: {e}")
+                result.error = str(e)
+            result_future.set_result(result)
+
+        self.scheduler.submit(task, max_reviews=request.max_reviews, **request.options).add_done_callback(finish)
+        return result_future
+
+    def fetch(self, platform: str, app_id: str, **kwargs) -> CollectionResult:
+        """Collect one platform/app and wait for the result (kwargs as FetchRequest / collect_reviews)"""
+        return self.submit(build_request(platform, app_id, **kwargs)).result()
+
+    def fetch_many(self, requests: List[FetchRequest]) -> List[CollectionResult]:
+        """Run several fetches concurrently; results come back in request order"""
+        start_time = time.time()
+        futures = [self.submit(request) for request in requests]
+        results = [future.result() for future in futures]
+        collected = sum(result.reviews_collected for result in results)
+        logger.info(f"⏱️ {len(requests)} fetches finished in {time.time() - start_time:.1f}s: {collected} reviews collected")
+        return results
+
+    def close(self):
+        self.scheduler.shutdown()
+
+    def __enter__(self) -> 'CollectionClient':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def build_request(platform: str, app_id: str, product_name: Optional[str] = None, company: Optional[str] = None,
+                  product_id: Optional[int] = None, max_reviews: Optional[int] = None,
+                  country: Optional[str] = None, **options) -> FetchRequest:
+    """FetchRequest from fetch()-style keyword arguments; None options are dropped"""
+    options = {key: value for key, value in options.items() if value is not None}
+    options['country'] = country or 'us'
+    return FetchRequest(platform=platform, app_id=app_id, product_name=product_name, company=company,
+                        product_id=product_id, max_reviews=max_reviews or 1000, options=options)
+
+
+_client: Optional[CollectionClient] = None
+_client_lock = threading.Lock()
+
+
+def get_collection_client() -> CollectionClient:
+    """Process-wide client, created on first use"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = CollectionClient()
+        return _client
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Concurrent Collection Scheduler
+Runs one worker pool per platform so Apple, Google and Amazon are scraped in
+parallel, each held to its own hourly request limit by a token bucket
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Callable
+
+# Local imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from database.manager import DatabaseManager
+from database.metadata_registry import PLATFORM_KEYS
+from incremental_fetch_reviews import ReviewCollectionManager, INCREMENTAL_OVERLAP
+
+logger = logging.getLogger(__name__)
+
+# Database platform names -> ReviewCollectionManager scraper keys
+SCRAPER_KEYS = {name: key for key, name in PLATFORM_KEYS.items()}
+
+DEFAULT_RATE_LIMIT_PER_HOUR = 1000
+
+
+class HourlyTokenBucket:
+    """Thread-safe token bucket refilled continuously at a per-hour rate"""
+
+    def __init__(self, rate_per_hour: float, capacity: Optional[float] = None):
+        self.rate_per_hour = rate_per_hour
+        self.rate_per_second = rate_per_hour / 3600.0
+        # Default burst: five minutes' worth of requests
+        self.capacity = capacity or max(1.0, rate_per_hour / 12)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate_per_second)
+        self._updated_at = now
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Block until `amount` tokens are available and take them; returns seconds waited"""
+        amount = min(amount, self.capacity)
+        waited = 0.0
+
+        # Holding the lock while sleeping serves waiting threads in turn
+        with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+                delay = (amount - self._tokens) / self.rate_per_second
+                time.sleep(delay)
+                waited += delay
+
+
+@dataclass
+class CollectionTask:
+    """One (product, platform) collection unit"""
+    product_id: int
+    product_name: str
+    platform_name: str
+    platform_display_name: str
+    app_id: str
+    # From the collection watermark; saves a per-task lookup in incremental mode
+    latest_review_date: Optional[datetime] = None
+
+    @property
+    def scraper_key(self) -> str:
+        return SCRAPER_KEYS[self.platform_name]
+
+
+def get_platform_rate_limits(db_manager: DatabaseManager) -> Dict[str, int]:
+    """Hourly request limits per platform from the platforms table.
+
+    APPLE_RATE_LIMIT / GOOGLE_RATE_LIMIT / AMAZON_RATE_LIMIT override the
+    stored values, matching config.settings.
+    """
+    limits = {name: DEFAULT_RATE_LIMIT_PER_HOUR for name in SCRAPER_KEYS}
+    try:
+        for platform in db_manager.get_platforms():
+            if platform['name'] in limits and platform.get('rate_limit_per_hour'):
+                limits[platform['name']] = platform['rate_limit_per_hour']
+    except Exception as e:
+        logger.warning(f"⚠️ Could not load platform rate limits, using defaults: {e}")
+
+    for name, key in SCRAPER_KEYS.items():
+        override = os.getenv(f'{key.upper()}_RATE_LIMIT')
+        if override:
+            limits[name] = int(override)
+    return limits
+
+
+class CollectionScheduler:
+    """Schedules collection tasks onto one thread pool per platform.
+
+    Platforms run fully in parallel; within a platform, workers share that
+    platform's token bucket, so a full refresh takes as long as the slowest
+    platform rather than the sum of all of them. Each worker thread gets its
+    own ReviewCollectionManager (and therefore its own scrapers and their HTTP
+    sessions), kept for the life of the scheduler. Database access goes
+    through the process-wide DatabaseManager, so all workers share one
+    connection pool: size DB_POOL_MAX_CONNECTIONS for the total worker count.
+    """
+
+    def __init__(self, rate_limits: Dict[str, int], workers_per_platform: Optional[int] = None,
+                 manager_factory: Callable[[], ReviewCollectionManager] = ReviewCollectionManager):
+        self.workers_per_platform = workers_per_platform or int(os.getenv('COLLECTION_WORKERS_PER_PLATFORM', 2))
+        self.limiters = {name: HourlyTokenBucket(rate) for name, rate in rate_limits.items()}
+        self.manager_factory = manager_factory
+        self._local = threading.local()
+        self._pools: Dict[str, ThreadPoolExecutor] = {}
+        self._pools_lock = threading.Lock()
+
+    def _get_manager(self) -> ReviewCollectionManager:
+        """Thread-local collection manager whose scrapers share the platform buckets"""
+        manager = getattr(self._local, 'manager', None)
+        if manager is None:
+            manager = self.manager_factory()
+            for platform_name, limiter in self.limiters.items():
+                scraper = manager.scrapers.get(SCRAPER_KEYS.get(platform_name))
+                if scraper is not None:
+                    scraper.rate_limiter = limiter
+            self._local.manager = manager
+        return manager
+
+    def _run_task(self, task: CollectionTask, collect_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        logger.info(f"📱 {task.platform_display_name}: collecting {task.product_name} (ID: {task.app_id})")
+        collect_kwargs = dict(collect_kwargs)
+        if collect_kwargs.get('incremental') and not collect_kwargs.get('start_date') and task.latest_review_date:
+            collect_kwargs['start_date'] = task.latest_review_date - INCREMENTAL_OVERLAP
+            logger.info(f"📅 {task.platform_display_name}: incremental from {collect_kwargs['start_date'].strftime('%Y-%m-%d')}")
+        result = self._get_manager().collect_reviews(
+            platform=task.scraper_key,
+            app_id=task.app_id,
+            product_id=task.product_id,
+            **collect_kwargs
+        )
+        logger.info(f"✅ {task.platform_display_name}: {result['reviews_collected']} reviews collected for {task.product_name}")
+        return result
+
+    def _get_pool(self, platform_name: str) -> ThreadPoolExecutor:
+        with self._pools_lock:
+            pool = self._pools.get(platform_name)
+            if pool is None:
+                pool = ThreadPoolExecutor(max_workers=self.workers_per_platform,
+                                          thread_name_prefix=f"collect-{platform_name}")
+                self._pools[platform_name] = pool
+            return pool
+
+    def submit(self, task: CollectionTask, **collect_kwargs) -> Future:
+        """Queue one task on its platform's pool; the future resolves to collect_reviews' result.
+
+        Pools (and their workers' managers) live until shutdown(), so repeated
+        submissions reuse warm HTTP sessions and database connections.
+        """
+        return self._get_pool(task.platform_name).submit(self._run_task, task, collect_kwargs)
+
+    def shutdown(self, wait: bool = True):
+        with self._pools_lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.shutdown(wait=wait)
+
+    def __enter__(self) -> 'CollectionScheduler':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    def run(self, tasks: List[CollectionTask], **collect_kwargs) -> List[Dict[str, Any]]:
+        """Run every task and return one result dict per task, in task order"""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(tasks)
+        platforms = sorted({task.platform_name for task in tasks})
+        start_time = time.time()
+
+        futures = {self.submit(task, **collect_kwargs): index for index, task in enumerate(tasks)}
+        for future in as_completed(futures):
+            index = futures[future]
+            task = tasks[index]
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"❌ Failed to collect {task.product_name} from {task.platform_name}: {e}")
+                result = {'error': str(e), 'reviews_collected': 0}
+
+            result.update({
+                'product_id': task.product_id,
+                'platform_name': task.platform_name,
+                'platform_display_name': task.platform_display_name
+            })
+            results[index] = result
+
+        elapsed = time.time() - start_time
+        logger.info(f"⏱️ {len(tasks)} collection tasks across {len(platforms)} platforms finished in {elapsed:.1f}s")
+        return results
@@ -11,7 +11,7 @@ import logging
 import json
 import time
 from datetime import datetime, timezone
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator
 import pandas as pd
 from dataclasses import dataclass
 
@@ -25,6 +25,8 @@ import cloudscraper
 # Local imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database.manager import DatabaseManager, get_db_manager
+from database.metadata_registry import get_metadata_registry
+from data_collection.review_pipeline import ReviewPagePipeline
 
 # Setup logging
 logging.basicConfig(
@@ -33,6 +35,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Apple reviews handed to the database pipeline at a time
+APPLE_YIELD_SIZE = 100
+
 @dataclass
 class ReviewData:
     """Standardized review data structure"""
@@ -87,10 +92,14 @@ class BasePlatformScraper:
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
         })
     
-    def fetch_reviews(self, app_id: str, max_reviews: int, **kwargs) -> List[ReviewData]:
-        """Fetch reviews from the platform. Override in subclasses."""
+    def iter_review_pages(self, app_id: str, max_reviews: int, **kwargs) -> Iterator[List[ReviewData]]:
+        """Yield reviews from the platform page by page, newest first. Override in subclasses."""
         raise NotImplementedError
     
+    def fetch_reviews(self, app_id: str, max_reviews: int, **kwargs) -> List[ReviewData]:
+        """Fetch all reviews into a list (prefer iter_review_pages for large runs)"""
+        return [review for page in self.iter_review_pages(app_id, max_reviews, **kwargs) for review in page]
+    
     def get_platform_info(self) -> Dict[str, Any]:
         """Get platform information. Override in subclasses."""
         raise NotImplementedError
@@ -101,17 +110,17 @@ class GooglePlayScraper(BasePlatformScraper):
     def get_platform_info(self) -> Dict[str, Any]:
         return {'name': 'google_play', 'display_name': 'Google Play Store'}
     
-    def fetch_reviews(self, app_id: str, max_reviews: int, country: str = 'us', 
-                     language: str = 'en', **kwargs) -> List[ReviewData]:
-        """Fetch reviews from Google Play Store"""
+    def iter_review_pages(self, app_id: str, max_reviews: int, country: str = 'us', 
+                          language: str = 'en', **kwargs) -> Iterator[List[ReviewData]]:
+        """Yield Google Play reviews one API batch at a time"""
         logger.info(f"🔍 Fetching Google Play reviews for {app_id}")
         
-        all_reviews = []
+        collected = 0
         token = None
         
-        while len(all_reviews) < max_reviews:
+        while collected < max_reviews:
             try:
-                batch_size = min(2000, max_reviews - len(all_reviews))
+                batch_size = min(2000, max_reviews - collected)
                 
                 result, token = gp_reviews(
                     app_id,
@@ -127,6 +136,7 @@ class GooglePlayScraper(BasePlatformScraper):
                     break
                 
                 # Convert to standardized format
+                batch_reviews = []
                 for review in result:
                     review_data = ReviewData(
                         platform_review_id=review['reviewId'],
@@ -141,21 +151,22 @@ class GooglePlayScraper(BasePlatformScraper):
                         helpful_count=review.get('thumbsUpCount', 0),
                         version_reviewed=review.get('appVersion')
                     )
-                    all_reviews.append(review_data)
-                
-                logger.info(f"📥 Google Play: {len(all_reviews)}/{max_reviews} reviews collected")
-                
-                if token is None:
-                    break
-                    
-                # Rate limiting
-                time.sleep(0.5)
+                    batch_reviews.append(review_data)
                 
             except Exception as e:
                 logger.error(f"❌ Error fetching Google Play reviews: {e}")
                 break
-        
-        return all_reviews
+            
+            collected += len(batch_reviews)
+            yield batch_reviews
+            
+            logger.info(f"📥 Google Play: {collected}/{max_reviews} reviews collected")
+            
+            if token is None:
+                break
+            
+            # Rate limiting
+            time.sleep(0.5)
 
 class AppleStoreScraper(BasePlatformScraper):
     """Apple App Store review scraper"""
@@ -163,16 +174,19 @@ class AppleStoreScraper(BasePlatformScraper):
     def get_platform_info(self) -> Dict[str, Any]:
         return {'name': 'apple_store', 'display_name': 'Apple App Store'}
     
-    def fetch_reviews(self, app_id: str, max_reviews: int, country: str = 'us', **kwargs) -> List[ReviewData]:
-        """Fetch reviews from Apple App Store"""
+    def iter_review_pages(self, app_id: str, max_reviews: int, country: str = 'us',
+                          **kwargs) -> Iterator[List[ReviewData]]:
+        """Yield Apple App Store reviews in pages of APPLE_YIELD_SIZE"""
         logger.info(f"🔍 Fetching Apple Store reviews for {app_id}")
         
+        collected = 0
+        page = []
+        
         try:
             app = AppStoreEntry(app_id=int(app_id), country=country.lower())
-            reviews = []
             
             for idx, review in enumerate(app.reviews()):
-                if len(reviews) >= max_reviews:
+                if collected + len(page) >= max_reviews:
                     break
                 
                 review_data = ReviewData(
@@ -186,17 +200,22 @@ class AppleStoreScraper(BasePlatformScraper):
                     country_code=country.upper(),
                     version_reviewed=getattr(review, 'version', None)  # Safe attribute access
                 )
-                reviews.append(review_data)
+                page.append(review_data)
                 
-                if idx % 100 == 0:
-                    logger.info(f"📥 Apple Store: {len(reviews)}/{max_reviews} reviews collected")
-            
-            logger.info(f"✅ Apple Store: Collected {len(reviews)} reviews")
-            return reviews
+                if len(page) >= APPLE_YIELD_SIZE:
+                    collected += len(page)
+                    yield page
+                    page = []
+                    logger.info(f"📥 Apple Store: {collected}/{max_reviews} reviews collected")
             
         except Exception as e:
             logger.error(f"❌ Error fetching Apple Store reviews: {e}")
-            return []
+        
+        if page:
+            collected += len(page)
+            yield page
+        
+        logger.info(f"✅ Apple Store: Collected {collected} reviews")
 
 class AmazonScraper(BasePlatformScraper):
     """Amazon review scraper"""
@@ -204,18 +223,18 @@ class AmazonScraper(BasePlatformScraper):
     def get_platform_info(self) -> Dict[str, Any]:
         return {'name': 'amazon', 'display_name': 'Amazon'}
     
-    def fetch_reviews(self, app_id: str, max_reviews: int, site: str = 'com', 
-                     max_pages: int = 10, **kwargs) -> List[ReviewData]:
-        """Fetch reviews from Amazon"""
+    def iter_review_pages(self, app_id: str, max_reviews: int, site: str = 'com', 
+                          max_pages: int = 10, **kwargs) -> Iterator[List[ReviewData]]:
+        """Yield Amazon reviews one result page at a time"""
         logger.info(f"🔍 Fetching Amazon reviews for {app_id}")
         
         scraper = cloudscraper.create_scraper()
-        reviews = []
+        collected = 0
         
         base_url = f"https://www.amazon.{site}/product-reviews/{app_id}/"
         
         for page in range(1, max_pages + 1):
-            if len(reviews) >= max_reviews:
+            if collected >= max_reviews:
                 break
             
             try:
@@ -230,13 +249,14 @@ class AmazonScraper(BasePlatformScraper):
                     logger.info("✅ No more Amazon reviews found")
                     break
                 
+                page_reviews = []
                 for review_elem in review_elements:
-                    if len(reviews) >= max_reviews:
+                    if collected + len(page_reviews) >= max_reviews:
                         break
                     
                     try:
                         # Extract review data
-                        review_id = review_elem.get('id', f"amazon_{page}_{len(reviews)}")
+                        review_id = review_elem.get('id', f"amazon_{page}_{collected + len(page_reviews)}")
                         
                         # User info
                         user_elem = review_elem.find('span', class_='a-profile-name')
@@ -292,27 +312,30 @@ class AmazonScraper(BasePlatformScraper):
                             review_source_url=url
                         )
                         
-                        reviews.append(review_data)
+                        page_reviews.append(review_data)
                         
                     except Exception as e:
                         logger.warning(f"⚠️ Error parsing Amazon review: {e}")
                         continue
                 
-                logger.info(f"📥 Amazon: Page {page}, {len(reviews)}/{max_reviews} reviews collected")
-                time.sleep(2)  # Rate limiting for Amazon
-                
             except Exception as e:
                 logger.error(f"❌ Error fetching Amazon page {page}: {e}")
                 break
+            
+            collected += len(page_reviews)
+            yield page_reviews
+            
+            logger.info(f"📥 Amazon: Page {page}, {collected}/{max_reviews} reviews collected")
+            time.sleep(2)  # Rate limiting for Amazon
         
-        logger.info(f"✅ Amazon: Collected {len(reviews)} reviews")
-        return reviews
+        logger.info(f"✅ Amazon: Collected {collected} reviews")
 
 class ReviewCollectionManager:
     """Manages the entire review collection process"""
     
     def __init__(self):
         self.db_manager = get_db_manager()
+        self.metadata = get_metadata_registry()
         self.scrapers = {
             'google': GooglePlayScraper(self.db_manager),
             'apple': AppleStoreScraper(self.db_manager),
@@ -320,21 +343,8 @@ class ReviewCollectionManager:
         }
     
     def _get_platform_id(self, platform_name: str) -> int:
-        """Get platform ID from database"""
-        platforms = self.db_manager.get_platforms()
-        platform_map = {
-            'google': 'google_play',
-            'apple': 'apple_store', 
-            'amazon': 'amazon'
-        }
-        
-        platform_db_name = platform_map.get(platform_name, platform_name)
-        
-        for platform in platforms:
-            if platform['name'] == platform_db_name:
-                return platform['id']
-        
-        raise ValueError(f"Platform {platform_name} not found in database")
+        """Get platform ID from the metadata registry"""
+        return self.metadata.platform_id(platform_name)
     
     def collect_reviews(self, platform: str, app_id: str, product_id: int, 
                        max_reviews: int = 1000, **kwargs) -> Dict[str, Any]:
@@ -366,35 +376,19 @@ class ReviewCollectionManager:
         try:
             logger.info(f"🚀 Starting collection job {job_id} for {platform}/{app_id}")
             
-            # Fetch reviews using the appropriate scraper
+            # Stream pages from the scraper into the database as they arrive
             scraper = self.scrapers[platform]
-            reviews = scraper.fetch_reviews(app_id, max_reviews, **kwargs)
+            pipeline = ReviewPagePipeline(self.db_manager, product_id, platform_id, job_id=job_id)
+            stats = pipeline.run(scraper.iter_review_pages(app_id, max_reviews, **kwargs))
+            inserted_count = stats['inserted']
             
-            if not reviews:
+            if not stats['found']:
                 logger.warning(f"⚠️ No reviews collected for {platform}/{app_id}")
-                self.db_manager.update_collection_job(job_id, {
-                    'status': 'completed',
-                    'total_reviews_found': 0,
-                    'reviews_collected': 0,
-                    'completed_at': datetime.now(timezone.utc).isoformat()
-                })
-                return {'job_id': job_id, 'reviews_collected': 0}
-            
-            # Convert reviews to database format
-            review_dicts = []
-            for review in reviews:
-                review_dict = review.to_dict()
-                review_dict['product_id'] = product_id
-                review_dict['platform_id'] = platform_id
-                review_dicts.append(review_dict)
-            
-            # Insert reviews into database
-            inserted_count = self.db_manager.insert_reviews(review_dicts)
             
             # Update job status
             self.db_manager.update_collection_job(job_id, {
                 'status': 'completed',
-                'total_reviews_found': len(reviews),
+                'total_reviews_found': stats['found'],
                 'reviews_collected': inserted_count,
                 'completed_at': datetime.now(timezone.utc).isoformat()
             })
@@ -404,7 +398,7 @@ class ReviewCollectionManager:
             return {
                 'job_id': job_id,
                 'reviews_collected': inserted_count,
-                'total_found': len(reviews),
+                'total_found': stats['found'],
                 'platform': platform,
                 'app_id': app_id
             }
@@ -420,8 +414,7 @@ class ReviewCollectionManager:
     
     def collect_for_product_mapping(self, mapping_id: int, max_reviews: int = 1000, **kwargs):
         """Collect reviews using a product-platform mapping"""
-        mappings = self.db_manager.get_product_mappings()
-        mapping = next((m for m in mappings if m['id'] == mapping_id), None)
+        mapping = self.metadata.mapping(mapping_id)
         
         if not mapping:
             raise ValueError(f"Mapping {mapping_id} not found")
@@ -483,7 +476,7 @@ def main():
                 return 1
             
             # Try to find product in database
-            product = manager.db_manager.get_product_by_name(args.product_name, args.company)
+            product = manager.metadata.product_by_name(args.product_name, args.company)
             if product:
                 product_id = product['id']
                 logger.info(f"✅ Found product: {product['name']} by {product['company']} (ID: {product_id})")
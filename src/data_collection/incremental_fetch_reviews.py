@@ -10,21 +10,30 @@ import argparse
 import logging
 import json
 import time
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator, Tuple
 import pandas as pd
 from dataclasses import dataclass
+from types import SimpleNamespace
 
 # Third-party imports
 import requests
 from google_play_scraper import Sort, reviews as gp_reviews
 from app_store_web_scraper import AppStoreEntry
-from bs4 import BeautifulSoup
 import cloudscraper
 
 # Local imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database.manager import DatabaseManager, get_db_manager
+from database.metadata_registry import get_metadata_registry
+from data_collection.review_pipeline import ReviewPagePipeline
+from data_collection.known_reviews import KnownReviewIndex, KnownRunTracker
+from data_collection.amazon_parser import parse_review_page_pooled
+from data_collection.raw_archive import RawResponseArchive, ArchiveRun, dumps_payload, loads_payload
 
 # Setup logging
 logging.basicConfig(
@@ -33,6 +42,26 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Amazon result pages requested ahead of the page being processed
+AMAZON_PREFETCH_PAGES = max(1, int(os.getenv('AMAZON_PREFETCH_PAGES', 2)))
+# App Store review attributes kept in the raw archive
+APPLE_REVIEW_FIELDS = ('id', 'user_name', 'title', 'content', 'rating', 'date', 'version')
+# Look-back from the latest stored review when auto-detecting an incremental start date
+INCREMENTAL_OVERLAP = timedelta(days=1)
+# Reviews returned per request by the App Store reviews iterator
+APPLE_PAGE_SIZE = 20
+# Apple reviews handed to the database pipeline at a time
+APPLE_YIELD_SIZE = 100
+# Google Play partitions walked at once, and reviews requested per partition call
+GOOGLE_PARTITION_WORKERS = int(os.getenv('GOOGLE_PARTITION_WORKERS', 8))
+GOOGLE_PARTITION_BATCH = 200
+# Storefronts fetched at once in multi-country Apple collection
+APPLE_STOREFRONT_WORKERS = int(os.getenv('APPLE_STOREFRONT_WORKERS', 8))
+# Host every storefront's review feed is served from, and the minimum spacing
+# between requests to it across all storefront workers
+APPLE_REVIEWS_HOST = 'amp-api.apps.apple.com'
+APPLE_HOST_MIN_INTERVAL = float(os.getenv('APPLE_HOST_MIN_INTERVAL', 0.2))
+
 @dataclass
 class ReviewData:
     """Standardized review data structure"""
@@ -77,6 +106,34 @@ class ReviewData:
         }
         return {k: v for k, v in data.items() if v is not None}
 
+class ReviewPage(list):
+    """A page of ReviewData plus the scraper cursor needed to resume after it"""
+    
+    def __init__(self, reviews: List[ReviewData], checkpoint: Optional[Dict[str, Any]] = None):
+        super().__init__(reviews)
+        self.checkpoint = checkpoint
+
+# Attributes of google_play_scraper's continuation token, saved in checkpoints
+GOOGLE_TOKEN_FIELDS = ('token', 'lang', 'country', 'sort', 'count', 'filter_score_with', 'filter_device_with')
+
+def _token_exhausted(token: Any) -> bool:
+    """Whether a Google Play cursor has nothing left: reviews() ends the stream
+    with a token whose .token is None rather than with None itself (replayed
+    cursors carry a sequence instead of a .token)"""
+    return token is None or (hasattr(token, 'token') and token.token is None)
+
+def _partition_key(language: str, country: str, star: Optional[int]) -> str:
+    """Checkpoint key of a Google Play partition, e.g. "en-us-5" or "en-us-all" """
+    return f"{language}-{country}-{star or 'all'}"
+
+def _checkpoint(collected: int, page: List[ReviewData], **cursor) -> Dict[str, Any]:
+    """Scraper-independent checkpoint fields plus the platform cursor"""
+    return {
+        'collected': collected,
+        'last_review_date': page[-1].review_date.isoformat() if page else None,
+        **cursor
+    }
+
 class BasePlatformScraper:
     """Base class for platform-specific scrapers with incremental support"""
     
@@ -86,11 +143,54 @@ class BasePlatformScraper:
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
         })
+        # Shared per-platform token bucket, set by the collection scheduler
+        self.rate_limiter = None
+        # Raw payloads are recorded to the archive; in replay mode they are read
+        # back from it instead of the network
+        self.archive: Optional[RawResponseArchive] = None
+        self.replay = False
+        self.replay_run: Optional[str] = None
     
-    def fetch_reviews(self, app_id: str, max_reviews: int, start_date: Optional[datetime] = None, **kwargs) -> List[ReviewData]:
-        """Fetch reviews from the platform. Override in subclasses."""
+    def open_archive_run(self, app_id: str) -> Optional[ArchiveRun]:
+        """Archive run to record this collection into, or to replay it from"""
+        if self.archive is None:
+            return None
+        platform = self.get_platform_info()['name']
+        if self.replay:
+            return self.archive.open_run(platform, app_id, self.replay_run)
+        return self.archive.start_run(platform, app_id)
+    
+    def throttle(self, default_delay: float):
+        """Wait before the next platform request.
+        
+        Uses the shared rate limiter when one is attached; standalone runs keep
+        the fixed delay. Replays never wait.
+        """
+        if self.replay:
+            return
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        elif default_delay:
+            time.sleep(default_delay)
+    
+    def iter_review_pages(self, app_id: str, max_reviews: int, start_date: Optional[datetime] = None,
+                          resume_from: Optional[Dict[str, Any]] = None,
+                          known_ids: Optional[KnownReviewIndex] = None, known_stop_run: Optional[int] = None,
+                          **kwargs) -> Iterator[ReviewPage]:
+        """Yield reviews from the platform page by page, newest first. Override in subclasses.
+        
+        Each page carries a checkpoint; passing one back as resume_from continues
+        right after that page, with max_reviews counting from the original start.
+        Reviews in known_ids are skipped, and fetching stops after known_stop_run
+        consecutive known reviews.
+        """
         raise NotImplementedError
     
+    def fetch_reviews(self, app_id: str, max_reviews: int, start_date: Optional[datetime] = None, **kwargs) -> List[ReviewData]:
+        """Fetch all reviews into a list (prefer iter_review_pages for large runs)"""
+        return [review for page in self.iter_review_pages(app_id, max_reviews, start_date=start_date, **kwargs)
+                for review in page]
+    
     def get_platform_info(self) -> Dict[str, Any]:
         """Get platform information. Override in subclasses."""
         raise NotImplementedError
@@ -98,47 +198,151 @@ class BasePlatformScraper:
     def get_latest_review_date(self, product_id: int, platform_id: int) -> Optional[datetime]:
         """Get the latest review date for incremental loading"""
         try:
-            query = """
-            SELECT MAX(review_date) as latest_date 
-            FROM reviews 
-            WHERE product_id = %s AND platform_id = %s
-            """
-            result = self.db_manager.execute_sql(query, (product_id, platform_id))
-            if result and result[0]['latest_date']:
-                return datetime.fromisoformat(result[0]['latest_date'].replace('Z', '+00:00'))
+            watermark = self.db_manager.get_collection_watermark(product_id, platform_id)
+            if watermark:
+                return watermark['latest_review_date']
         except Exception as e:
             logger.warning(f"Could not get latest review date: {e}")
         return None
 
+class HostPoliteness:
+    """Minimum spacing between requests to the same host, shared across threads"""
+    
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+    
+    def wait(self, host: str):
+        # Reserve the next slot under the lock, sleep outside it
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+host_politeness = HostPoliteness(APPLE_HOST_MIN_INTERVAL)
+
+def _is_before(review_date: datetime, start_date: Optional[datetime]) -> bool:
+    """Timezone-safe check whether a review predates the incremental start date"""
+    if not start_date:
+        return False
+    if start_date.tzinfo is None:
+        start_date = start_date.replace(tzinfo=timezone.utc)
+    if hasattr(review_date, 'tzinfo') and review_date.tzinfo is None:
+        review_date = review_date.replace(tzinfo=timezone.utc)
+    return review_date < start_date
+
 class GooglePlayScraper(BasePlatformScraper):
     """Google Play Store review scraper with incremental support"""
     
     def get_platform_info(self) -> Dict[str, Any]:
         return {'name': 'google_play', 'display_name': 'Google Play Store'}
     
-    def fetch_reviews(self, app_id: str, max_reviews: int, country: str = 'us', 
-                     language: str = 'en', start_date: Optional[datetime] = None, **kwargs) -> List[ReviewData]:
-        """Fetch reviews from Google Play Store with optional start date filtering"""
+    def _fetch_batch(self, app_id: str, language: str, country: str, count: int, token: Any,
+                     archive_run: Optional[ArchiveRun], replayed: Optional[Iterator],
+                     star: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Any]:
+        """One reviews() call, live (and archived) or replayed; returns (reviews, next token)"""
+        if replayed is not None:
+            # Archived batches come back in the order they were fetched
+            entry, payload = next(replayed, (None, None))
+            result = loads_payload(payload) if payload is not None else []
+            return result, SimpleNamespace(sequence=entry['sequence']) if entry and entry.get('has_more') else None
+        
+        request_token = getattr(token, 'token', None)
+        result, token = gp_reviews(
+            app_id,
+            lang=language,
+            country=country,
+            sort=Sort.NEWEST,
+            count=count,
+            filter_score_with=star,
+            continuation_token=token
+        )
+        if archive_run is not None:
+            archive_run.record(
+                {'lang': language, 'country': country, 'count': count, 'star': star, 'token': request_token},
+                dumps_payload(result), has_more=not _token_exhausted(token)
+            )
+        return result, token
+    
+    @staticmethod
+    def _to_review_data(review: Dict[str, Any], review_date: datetime, country: str, language: str) -> ReviewData:
+        return ReviewData(
+            platform_review_id=review['reviewId'],
+            user_name=review.get('userName', 'Anonymous'),
+            user_id=review.get('userImage'),
+            title=None,
+            content=review['content'],
+            rating=review['score'],
+            review_date=review_date,
+            country_code=country.upper(),
+            language_code=language,
+            helpful_count=review.get('thumbsUpCount', 0),
+            version_reviewed=review.get('appVersion')
+        )
+    
+    @staticmethod
+    def _review_date(review: Dict[str, Any]) -> datetime:
+        review_date = review['at']
+        if hasattr(review_date, 'tzinfo') and review_date.tzinfo is None:
+            review_date = review_date.replace(tzinfo=timezone.utc)
+        return review_date
+    
+    @staticmethod
+    def _token_state(token: Any) -> Optional[Dict[str, Any]]:
+        if _token_exhausted(token):
+            return None
+        return {field: getattr(token, field) for field in GOOGLE_TOKEN_FIELDS if hasattr(token, field)}
+    
+    def iter_review_pages(self, app_id: str, max_reviews: int, country: str = 'us', 
+                          language: str = 'en', start_date: Optional[datetime] = None,
+                          resume_from: Optional[Dict[str, Any]] = None,
+                          known_ids: Optional[KnownReviewIndex] = None, known_stop_run: Optional[int] = None,
+                          stars: Optional[List[int]] = None, locales: Optional[List[str]] = None,
+                          **kwargs) -> Iterator[ReviewPage]:
+        """Yield Google Play reviews one API batch at a time, with optional start date filtering.
+        
+        Passing stars (e.g. [1, 2, 3, 4, 5]) and/or locales ("lang:country"
+        strings) splits collection into partitions walked concurrently.
+        """
+        if stars or locales:
+            yield from self._iter_partitioned_pages(app_id, max_reviews, country, language, start_date,
+                                                    resume_from, known_ids, known_stop_run, stars, locales)
+            return
+        
         logger.info(f"🔍 Fetching Google Play reviews for {app_id}")
         if start_date:
             logger.info(f"📅 Incremental mode: Starting from {start_date.strftime('%Y-%m-%d')}")
         
-        all_reviews = []
+        collected = 0
         token = None
         reviews_before_start_date = 0
+        known = KnownRunTracker(known_ids, known_stop_run)
+        archive_run = self.open_archive_run(app_id)
+        replayed = iter(archive_run) if self.replay else None
         
-        while len(all_reviews) < max_reviews:
+        if resume_from:
+            if resume_from.get('exhausted'):
+                logger.info("✅ Google Play: saved checkpoint is already at the end")
+                return
+            collected = resume_from.get('collected', 0)
+            reviews_before_start_date = resume_from.get('reviews_before_start_date', 0)
+            if resume_from.get('continuation_token'):
+                # reviews() only reads these attributes from the token object
+                token = SimpleNamespace(**resume_from['continuation_token'])
+                logger.info(f"⏯️ Resuming Google Play after {collected} reviews")
+        
+        while collected < max_reviews:
+            stop = False
             try:
-                batch_size = min(2000, max_reviews - len(all_reviews))
+                batch_size = min(2000, max_reviews - collected)
                 
-                result, token = gp_reviews(
-                    app_id,
-                    lang=language,
-                    country=country,
-                    sort=Sort.NEWEST,
-                    count=batch_size,
-                    continuation_token=token
-                )
+                # Rate limiting (no fixed delay before the first request)
+                self.throttle(0.5 if token else 0)
+                result, token = self._fetch_batch(app_id, language, country, batch_size, token,
+                                                  archive_run, replayed)
                 
                 if not result:
                     logger.info("✅ No more Google Play reviews available")
@@ -147,60 +351,179 @@ class GooglePlayScraper(BasePlatformScraper):
                 # Convert to standardized format and filter by date
                 batch_reviews = []
                 for review in result:
-                    review_date = review['at']
+                    review_date = self._review_date(review)
                     
-                    # Ensure both dates are timezone-aware for comparison
-                    if start_date:
-                        # Make sure start_date is timezone-aware
-                        compare_start_date = start_date
-                        if start_date.tzinfo is None:
-                            compare_start_date = start_date.replace(tzinfo=timezone.utc)
-                        
-                        # Make sure review_date is timezone-aware
-                        if hasattr(review_date, 'tzinfo') and review_date.tzinfo is None:
-                            review_date = review_date.replace(tzinfo=timezone.utc)
-                        
-                        # Skip reviews older than start_date
-                        if review_date < compare_start_date:
-                            reviews_before_start_date += 1
-                            # If we're getting too many old reviews, we can break early
-                            if reviews_before_start_date > 1000:
-                                logger.info(f"📅 Found {reviews_before_start_date} reviews before start date, stopping...")
-                                return all_reviews
+                    # Skip reviews we already store; a long run of them means we're caught up
+                    if known.is_known(review['reviewId']):
+                        if known.should_stop:
+                            stop = True
+                            break
                         continue
                     
-                    review_data = ReviewData(
-                        platform_review_id=review['reviewId'],
-                        user_name=review.get('userName', 'Anonymous'),
-                        user_id=review.get('userImage'),
-                        title=None,
-                        content=review['content'],
-                        rating=review['score'],
-                        review_date=review_date,
-                        country_code=country.upper(),
-                        language_code=language,
-                        helpful_count=review.get('thumbsUpCount', 0),
-                        version_reviewed=review.get('appVersion')
-                    )
-                    batch_reviews.append(review_data)
-                
-                all_reviews.extend(batch_reviews)
-                
-                logger.info(f"📥 Google Play: {len(all_reviews)}/{max_reviews} reviews collected")
-                if reviews_before_start_date > 0:
-                    logger.info(f"📅 Skipped {reviews_before_start_date} reviews before start date")
-                
-                if token is None:
-                    break
+                    # Skip reviews older than start_date
+                    if _is_before(review_date, start_date):
+                        reviews_before_start_date += 1
+                        # If we're getting too many old reviews, we can break early
+                        if reviews_before_start_date > 1000:
+                            stop = True
+                            break
+                        continue
                     
-                # Rate limiting
-                time.sleep(0.5)
+                    batch_reviews.append(self._to_review_data(review, review_date, country, language))
                 
             except Exception as e:
                 logger.error(f"❌ Error fetching Google Play reviews: {e}")
                 break
+            
+            collected += len(batch_reviews)
+            yield ReviewPage(batch_reviews, _checkpoint(
+                collected, batch_reviews,
+                continuation_token=self._token_state(token),
+                exhausted=_token_exhausted(token),
+                reviews_before_start_date=reviews_before_start_date
+            ))
+            
+            logger.info(f"📥 Google Play: {collected}/{max_reviews} reviews collected")
+            if reviews_before_start_date > 0:
+                logger.info(f"📅 Skipped {reviews_before_start_date} reviews before start date")
+            
+            if known.should_stop:
+                logger.info(f"🗂️ Reached {known.run} consecutive known reviews, stopping...")
+                break
+            if stop:
+                logger.info(f"📅 Found {reviews_before_start_date} reviews before start date, stopping...")
+                break
+            if _token_exhausted(token):
+                break
+    
+    def _iter_partitioned_pages(self, app_id: str, max_reviews: int, country: str, language: str,
+                                start_date: Optional[datetime], resume_from: Optional[Dict[str, Any]],
+                                known_ids: Optional[KnownReviewIndex], known_stop_run: Optional[int],
+                                stars: Optional[List[int]], locales: Optional[List[str]]) -> Iterator[ReviewPage]:
+        """Walk every (language, country, star) partition concurrently, merged and deduplicated.
+        
+        Each partition keeps its own continuation token; the checkpoint stores
+        all of them, so a resumed job continues every partition where it was.
+        """
+        locale_pairs = [tuple(locale.split(':', 1)) if ':' in locale else (locale, country)
+                        for locale in (locales or [f"{language}:{country}"])]
+        partitions = [(lang, ctry.lower(), star) for lang, ctry in dict.fromkeys(locale_pairs)
+                      for star in (sorted(set(stars)) if stars else [None])]
+        logger.info(f"🔍 Fetching Google Play reviews for {app_id} across {len(partitions)} partitions")
+        if start_date:
+            logger.info(f"📅 Incremental mode: Starting from {start_date.strftime('%Y-%m-%d')}")
         
-        return all_reviews
+        collected = 0
+        states = {}
+        if resume_from:
+            collected = resume_from.get('collected', 0)
+            states = dict(resume_from.get('partitions', {}))
+            logger.info(f"⏯️ Resuming Google Play after {collected} reviews")
+        
+        archive_run = self.open_archive_run(app_id)
+        batches: queue.Queue = queue.Queue(maxsize=len(partitions) * 2)
+        stop = threading.Event()
+        seen_ids = set()
+        duplicates = 0
+        page = []
+        remaining = len(partitions)
+        
+        with ThreadPoolExecutor(max_workers=min(len(partitions), GOOGLE_PARTITION_WORKERS),
+                                thread_name_prefix='google-partition') as pool:
+            for partition in partitions:
+                key = _partition_key(*partition)
+                pool.submit(self._collect_partition, app_id, partition, states.get(key), max_reviews,
+                            start_date, known_ids, known_stop_run, archive_run, batches, stop)
+            try:
+                while remaining and collected + len(page) < max_reviews:
+                    key, state, batch = batches.get()
+                    if batch is None:
+                        remaining -= 1
+                        continue
+                    
+                    states[key] = state
+                    for review in batch:
+                        if collected + len(page) >= max_reviews:
+                            break
+                        if review.platform_review_id in seen_ids:
+                            duplicates += 1
+                            continue
+                        seen_ids.add(review.platform_review_id)
+                        page.append(review)
+                    
+                    if len(page) >= GOOGLE_PARTITION_BATCH:
+                        collected += len(page)
+                        yield ReviewPage(page, _checkpoint(collected, page, partitions=dict(states)))
+                        page = []
+                        logger.info(f"📥 Google Play: {collected}/{max_reviews} reviews collected")
+                
+                if page or states:
+                    collected += len(page)
+                    yield ReviewPage(page, _checkpoint(collected, page, partitions=dict(states)))
+            finally:
+                # Workers notice within one put timeout and exit
+                stop.set()
+        
+        if duplicates:
+            logger.info(f"🔁 Skipped {duplicates} reviews returned by more than one partition")
+        logger.info(f"✅ Google Play: Collected {collected} reviews from {len(partitions)} partitions")
+    
+    def _collect_partition(self, app_id: str, partition: Tuple[str, str, Optional[int]], state: Optional[Dict[str, Any]], max_reviews: int,
+                           start_date: Optional[datetime], known_ids: Optional[KnownReviewIndex],
+                           known_stop_run: Optional[int], archive_run: Optional[ArchiveRun],
+                           batches: queue.Queue, stop: threading.Event):
+        """Partition worker: puts (key, token state, [ReviewData]) per batch, then (key, state, None)"""
+        language, country, star = partition
+        key = _partition_key(language, country, star)
+        state = dict(state or {'continuation_token': None, 'exhausted': False})
+        
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        replayed = None
+        if self.replay:
+            replayed = ((entry, archive_run.archive.get(entry['sha256'])) for entry in archive_run.entries()
+                        if (entry['request'].get('lang'), entry['request'].get('country'),
+                            entry['request'].get('star')) == partition)
+        token = SimpleNamespace(**state['continuation_token']) if state.get('continuation_token') else None
+        known = KnownRunTracker(known_ids, known_stop_run)
+        reviews_before_start_date = 0
+        fetched = 0
+        
+        try:
+            while not state['exhausted'] and not stop.is_set() and fetched < max_reviews:
+                self.throttle(0.5 if token else 0)
+                result, token = self._fetch_batch(app_id, language, country, GOOGLE_PARTITION_BATCH, token,
+                                                  archive_run, replayed, star)
+                state = {'continuation_token': self._token_state(token), 'exhausted': _token_exhausted(token) or not result}
+                fetched += len(result)
+                
+                batch_reviews = []
+                for review in result:
+                    review_date = self._review_date(review)
+                    if known.is_known(review['reviewId']):
+                        if known.should_stop:
+                            break
+                        continue
+                    if _is_before(review_date, start_date):
+                        reviews_before_start_date += 1
+                        continue
+                    batch_reviews.append(self._to_review_data(review, review_date, country, language))
+                
+                if not put((key, state, batch_reviews)):
+                    return
+                if known.should_stop or reviews_before_start_date > 1000:
+                    break
+        except Exception as e:
+            logger.error(f"❌ Error fetching Google Play reviews ({key}): {e}")
+        finally:
+            put((key, state, None))
 
 class AppleStoreScraper(BasePlatformScraper):
     """Apple App Store review scraper with incremental support"""
@@ -208,38 +531,66 @@ class AppleStoreScraper(BasePlatformScraper):
     def get_platform_info(self) -> Dict[str, Any]:
         return {'name': 'apple_store', 'display_name': 'Apple App Store'}
     
-    def fetch_reviews(self, app_id: str, max_reviews: int, country: str = 'us', 
-                     start_date: Optional[datetime] = None, **kwargs) -> List[ReviewData]:
-        """Fetch reviews from Apple App Store with optional start date filtering"""
+    def iter_review_pages(self, app_id: str, max_reviews: int, country: str = 'us', 
+                          start_date: Optional[datetime] = None, resume_from: Optional[Dict[str, Any]] = None,
+                          known_ids: Optional[KnownReviewIndex] = None, known_stop_run: Optional[int] = None,
+                          countries: Optional[List[str]] = None, **kwargs) -> Iterator[ReviewPage]:
+        """Yield Apple App Store reviews in pages of APPLE_YIELD_SIZE, with optional start date filtering.
+        
+        The App Store iterator has no cursor, so resuming replays the feed up to
+        the saved offset without re-inserting anything. Passing several
+        countries collects those storefronts concurrently.
+        """
+        if countries and len(countries) > 1:
+            yield from self._iter_storefront_pages(app_id, max_reviews, countries, start_date, resume_from,
+                                                   known_ids, known_stop_run)
+            return
+        country = countries[0] if countries else country
+        
         logger.info(f"🔍 Fetching Apple Store reviews for {app_id}")
         if start_date:
             logger.info(f"📅 Incremental mode: Starting from {start_date.strftime('%Y-%m-%d')}")
         
+        collected = 0
+        page = []
+        reviews_before_start_date = 0
+        offset = 0
+        known = KnownRunTracker(known_ids, known_stop_run)
+        
+        if resume_from:
+            collected = resume_from.get('collected', 0)
+            offset = resume_from.get('offset', 0)
+            reviews_before_start_date = resume_from.get('reviews_before_start_date', 0)
+            logger.info(f"⏯️ Resuming Apple Store after {collected} reviews (feed offset {offset})")
+        
+        idx = offset - 1
+        archive_run = self.open_archive_run(app_id)
         try:
-            app = AppStoreEntry(app_id=int(app_id), country=country.lower())
-            reviews = []
-            reviews_before_start_date = 0
-            
-            for idx, review in enumerate(app.reviews()):
-                if len(reviews) >= max_reviews:
+            for idx, review in enumerate(self._iter_app_reviews(app_id, country, archive_run)):
+                if collected + len(page) >= max_reviews:
                     break
                 
+                # The iterator fetches one page per APPLE_PAGE_SIZE reviews
+                if idx % APPLE_PAGE_SIZE == 0 and idx:
+                    self.throttle(0)
+                    self.wait_for_host()
+                
+                if idx < offset:
+                    continue
+                
+                # Skip reviews we already store; a long run of them means we're caught up
+                if known.is_known(review.id):
+                    if known.should_stop:
+                        logger.info(f"🗂️ Reached {known.run} consecutive known reviews, stopping...")
+                        break
+                    continue
+                
                 # Check date filter
-                if start_date:
-                    # Ensure both dates are timezone-aware for comparison
-                    compare_start_date = start_date
-                    if start_date.tzinfo is None:
-                        compare_start_date = start_date.replace(tzinfo=timezone.utc)
-                    
-                    review_date = review.date
-                    if hasattr(review_date, 'tzinfo') and review_date.tzinfo is None:
-                        review_date = review_date.replace(tzinfo=timezone.utc)
-                    
-                    if review_date < compare_start_date:
-                        reviews_before_start_date += 1
-                        if reviews_before_start_date > 1000:
-                            logger.info(f"📅 Found {reviews_before_start_date} reviews before start date, stopping...")
-                            break
+                if _is_before(review.date, start_date):
+                    reviews_before_start_date += 1
+                    if reviews_before_start_date > 1000:
+                        logger.info(f"📅 Found {reviews_before_start_date} reviews before start date, stopping...")
+                        break
                     continue
                 
                 review_data = ReviewData(
@@ -253,184 +604,346 @@ class AppleStoreScraper(BasePlatformScraper):
                     country_code=country.upper(),
                     version_reviewed=getattr(review, 'version', None)
                 )
-                reviews.append(review_data)
+                page.append(review_data)
                 
-                if idx % 100 == 0:
-                    logger.info(f"📥 Apple Store: {len(reviews)}/{max_reviews} reviews collected")
+                if len(page) >= APPLE_YIELD_SIZE:
+                    collected += len(page)
+                    yield ReviewPage(page, _checkpoint(
+                        collected, page, offset=idx + 1, reviews_before_start_date=reviews_before_start_date
+                    ))
+                    page = []
+                    logger.info(f"📥 Apple Store: {collected}/{max_reviews} reviews collected")
                     if reviews_before_start_date > 0:
                         logger.info(f"📅 Skipped {reviews_before_start_date} reviews before start date")
             
-            logger.info(f"✅ Apple Store: Collected {len(reviews)} reviews")
-            return reviews
-            
         except Exception as e:
             logger.error(f"❌ Error fetching Apple Store reviews: {e}")
-            return []
+        
+        if page:
+            collected += len(page)
+            yield ReviewPage(page, _checkpoint(
+                collected, page, offset=idx + 1, reviews_before_start_date=reviews_before_start_date
+            ))
+        
+        logger.info(f"✅ Apple Store: Collected {collected} reviews")
+
+    def wait_for_host(self):
+        """Per-host politeness, shared by every storefront worker"""
+        if not self.replay:
+            host_politeness.wait(APPLE_REVIEWS_HOST)
+    
+    def _iter_storefront_pages(self, app_id: str, max_reviews: int, countries: List[str],
+                               start_date: Optional[datetime], resume_from: Optional[Dict[str, Any]],
+                               known_ids: Optional[KnownReviewIndex], known_stop_run: Optional[int]) -> Iterator[ReviewPage]:
+        """Collect several storefronts at once, merged into pages of APPLE_YIELD_SIZE.
+        
+        Each storefront is walked by its own worker, so collection takes about
+        as long as the slowest storefront. Reviews are tagged with their
+        storefront's country and deduplicated by review id. The checkpoint
+        keeps one feed offset per country.
+        """
+        countries = list(dict.fromkeys(country.lower() for country in countries))
+        logger.info(f"🔍 Fetching Apple Store reviews for {app_id} from {len(countries)} storefronts: {', '.join(countries)}")
+        if start_date:
+            logger.info(f"📅 Incremental mode: Starting from {start_date.strftime('%Y-%m-%d')}")
+        
+        collected = 0
+        offsets = {country: 0 for country in countries}
+        if resume_from:
+            collected = resume_from.get('collected', 0)
+            offsets.update(resume_from.get('offsets', {}))
+            logger.info(f"⏯️ Resuming Apple Store after {collected} reviews")
+        
+        archive_run = self.open_archive_run(app_id)
+        reviews_queue: queue.Queue = queue.Queue(maxsize=APPLE_YIELD_SIZE * 2)
+        stop = threading.Event()
+        seen_ids = set()
+        duplicates = 0
+        page = []
+        remaining = len(countries)
+        
+        with ThreadPoolExecutor(max_workers=min(len(countries), APPLE_STOREFRONT_WORKERS),
+                                thread_name_prefix='apple-storefront') as pool:
+            for country in countries:
+                pool.submit(self._collect_storefront, app_id, country, offsets[country], start_date,
+                            known_ids, known_stop_run, archive_run, reviews_queue, stop)
+            try:
+                while remaining and collected + len(page) < max_reviews:
+                    country, idx, review = reviews_queue.get()
+                    if review is None:
+                        remaining -= 1
+                        continue
+                    
+                    offsets[country] = idx + 1
+                    if review.platform_review_id in seen_ids:
+                        duplicates += 1
+                        continue
+                    seen_ids.add(review.platform_review_id)
+                    page.append(review)
+                    
+                    if len(page) >= APPLE_YIELD_SIZE:
+                        collected += len(page)
+                        yield ReviewPage(page, _checkpoint(collected, page, offsets=dict(offsets)))
+                        page = []
+                        logger.info(f"📥 Apple Store: {collected}/{max_reviews} reviews collected")
+                
+                if page:
+                    collected += len(page)
+                    yield ReviewPage(page, _checkpoint(collected, page, offsets=dict(offsets)))
+            finally:
+                # Workers notice within one put timeout and exit
+                stop.set()
+        
+        if duplicates:
+            logger.info(f"🔁 Skipped {duplicates} reviews listed in more than one storefront")
+        logger.info(f"✅ Apple Store: Collected {collected} reviews from {len(countries)} storefronts")
+    
+    def _collect_storefront(self, app_id: str, country: str, offset: int, start_date: Optional[datetime],
+                            known_ids: Optional[KnownReviewIndex], known_stop_run: Optional[int],
+                            archive_run: Optional[ArchiveRun], reviews_queue: queue.Queue, stop: threading.Event):
+        """Storefront worker: puts (country, feed index, ReviewData) on the queue, then (country, None, None)"""
+        
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    reviews_queue.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        known = KnownRunTracker(known_ids, known_stop_run)
+        reviews_before_start_date = 0
+        try:
+            for idx, review in enumerate(self._iter_app_reviews(app_id, country, archive_run)):
+                if stop.is_set():
+                    break
+                if idx % APPLE_PAGE_SIZE == 0 and idx:
+                    self.throttle(0)
+                    self.wait_for_host()
+                if idx < offset:
+                    continue
+                
+                if known.is_known(review.id):
+                    if known.should_stop:
+                        break
+                    continue
+                if _is_before(review.date, start_date):
+                    reviews_before_start_date += 1
+                    if reviews_before_start_date > 1000:
+                        break
+                    continue
+                
+                if not put((country, idx, ReviewData(
+                    platform_review_id=review.id,
+                    user_name=review.user_name or 'Anonymous',
+                    user_id=None,
+                    title=review.title,
+                    content=review.content,
+                    rating=review.rating,
+                    review_date=review.date,
+                    country_code=country.upper(),
+                    version_reviewed=getattr(review, 'version', None)
+                ))):
+                    break
+        except Exception as e:
+            logger.error(f"❌ Error fetching Apple Store reviews ({country.upper()}): {e}")
+        finally:
+            put((country, None, None))
+    
+    def _iter_app_reviews(self, app_id: str, country: str, archive_run: Optional[ArchiveRun]) -> Iterator[Any]:
+        """App Store reviews, live (archived one feed page at a time) or replayed"""
+        if self.replay:
+            for entry, payload in archive_run:
+                if entry['request'].get('country', country) != country:
+                    continue
+                for review in loads_payload(payload):
+                    yield SimpleNamespace(**review)
+            return
+        
+        app = AppStoreEntry(app_id=int(app_id), country=country.lower())
+        buffer = []
+        offset = 0
+        
+        def flush():
+            nonlocal buffer, offset
+            if archive_run is not None and buffer:
+                archive_run.record({'country': country, 'offset': offset}, dumps_payload(buffer))
+                offset += len(buffer)
+                buffer = []
+        
+        try:
+            for review in app.reviews():
+                buffer.append({field: getattr(review, field, None) for field in APPLE_REVIEW_FIELDS})
+                if len(buffer) >= APPLE_PAGE_SIZE:
+                    flush()
+                yield review
+        finally:
+            # Also runs when the caller stops early
+            flush()
 
 class AmazonScraper(BasePlatformScraper):
-    """Amazon review scraper with incremental support"""
+    """Amazon review scraper with incremental support.
+    
+    Pages are pipelined: up to AMAZON_PREFETCH_PAGES requests are in flight
+    on one reused session while earlier pages are parsed in the shared lxml
+    parser pool, so parsing page N overlaps the download of page N+1.
+    """
+    
+    def __init__(self, db_manager: DatabaseManager):
+        super().__init__(db_manager)
+        # One cloudscraper session reused across pages and collection runs
+        self.session = cloudscraper.create_scraper()
     
     def get_platform_info(self) -> Dict[str, Any]:
         return {'name': 'amazon', 'display_name': 'Amazon'}
     
-    def fetch_reviews(self, app_id: str, max_reviews: int, site: str = 'com', 
-                     max_pages: int = 10, start_date: Optional[datetime] = None, **kwargs) -> List[ReviewData]:
-        """Fetch reviews from Amazon with optional start date filtering"""
+    def _fetch_and_parse(self, url: str, archive_run: Optional[ArchiveRun]) -> List[Dict[str, Any]]:
+        if self.replay:
+            # Pages missing from the run read as empty, ending the collection
+            return parse_review_page_pooled(archive_run.find(url=url) or b'')
+        
+        response = self.session.get(url)
+        response.raise_for_status()
+        if archive_run is not None:
+            archive_run.record({'url': url}, response.content, status_code=response.status_code)
+        return parse_review_page_pooled(response.content)
+    
+    def iter_review_pages(self, app_id: str, max_reviews: int, site: str = 'com', 
+                          max_pages: int = 10, start_date: Optional[datetime] = None,
+                          resume_from: Optional[Dict[str, Any]] = None,
+                          known_ids: Optional[KnownReviewIndex] = None, known_stop_run: Optional[int] = None,
+                          **kwargs) -> Iterator[ReviewPage]:
+        """Yield Amazon reviews one result page at a time, with optional start date filtering"""
         logger.info(f"🔍 Fetching Amazon reviews for {app_id}")
         if start_date:
             logger.info(f"📅 Incremental mode: Starting from {start_date.strftime('%Y-%m-%d')}")
         
-        scraper = cloudscraper.create_scraper()
-        reviews = []
+        collected = 0
         reviews_before_start_date = 0
+        first_page = 1
+        known = KnownRunTracker(known_ids, known_stop_run)
+        
+        if resume_from:
+            collected = resume_from.get('collected', 0)
+            first_page = resume_from.get('next_page', 1)
+            reviews_before_start_date = resume_from.get('reviews_before_start_date', 0)
+            logger.info(f"⏯️ Resuming Amazon at page {first_page} after {collected} reviews")
         
         base_url = f"https://www.amazon.{site}/product-reviews/{app_id}/"
+        archive_run = self.open_archive_run(app_id)
+        in_flight = deque()
+        next_page = first_page
         
-        for page in range(1, max_pages + 1):
-            if len(reviews) >= max_reviews:
-                break
-            
+        with ThreadPoolExecutor(max_workers=AMAZON_PREFETCH_PAGES, thread_name_prefix='amazon-fetch') as fetcher:
             try:
-                url = f"{base_url}?pageNumber={page}&sortBy=recent"
-                response = scraper.get(url)
-                response.raise_for_status()
-                
-                soup = BeautifulSoup(response.content, 'html.parser')
-                review_elements = soup.find_all('div', {'data-hook': 'review'})
-                
-                if not review_elements:
-                    logger.info("✅ No more Amazon reviews found")
-                    break
-                
-                page_reviews_before_start = 0
-                for review_elem in review_elements:
-                    if len(reviews) >= max_reviews:
+                while collected < max_reviews:
+                    # Keep the prefetch window full
+                    while len(in_flight) < AMAZON_PREFETCH_PAGES and next_page <= max_pages:
+                        # Rate limiting for Amazon (no fixed delay before the first page)
+                        self.throttle(2 if next_page > first_page else 0)
+                        url = f"{base_url}?pageNumber={next_page}&sortBy=recent"
+                        in_flight.append((next_page, url, fetcher.submit(self._fetch_and_parse, url, archive_run)))
+                        next_page += 1
+                    
+                    if not in_flight:
                         break
+                    page, url, future = in_flight.popleft()
                     
                     try:
-                        # Extract review data
-                        review_id = review_elem.get('id', f"amazon_{page}_{len(reviews)}")
-                        
-                        # User info
-                        user_elem = review_elem.find('span', class_='a-profile-name')
-                        user_name = user_elem.text.strip() if user_elem else 'Anonymous'
-                        
-                        # Rating
-                        rating_elem = review_elem.find('i', {'data-hook': 'review-star-rating'})
-                        rating_text = rating_elem.text if rating_elem else '1 out of 5 stars'
-                        rating = int(rating_text.split()[0]) if rating_text else 1
-                        
-                        # Title
-                        title_elem = review_elem.find('a', {'data-hook': 'review-title'})
-                        title = title_elem.text.strip() if title_elem else None
+                        parsed_reviews = future.result()
+                    except Exception as e:
+                        logger.error(f"❌ Error fetching Amazon page {page}: {e}")
+                        break
+                    
+                    if not parsed_reviews:
+                        logger.info("✅ No more Amazon reviews found")
+                        break
+                    
+                    page_reviews = []
+                    page_reviews_before_start = 0
+                    for parsed in parsed_reviews:
+                        if collected + len(page_reviews) >= max_reviews:
+                            break
                         
-                        # Content
-                        content_elem = review_elem.find('span', {'data-hook': 'review-body'})
-                        content = content_elem.text.strip() if content_elem else ''
+                        review_id = parsed['review_id'] or f"amazon_{page}_{collected + len(page_reviews)}"
                         
-                        # Date
-                        date_elem = review_elem.find('span', {'data-hook': 'review-date'})
-                        date_text = date_elem.text if date_elem else ''
+                        # Skip reviews we already store; a long run of them means we're caught up
+                        if known.is_known(review_id):
+                            if known.should_stop:
+                                break
+                            continue
                         
-                        # Parse date (Amazon format: "Reviewed in the United States on March 15, 2024")
-                        review_date = datetime.now(timezone.utc)
-                        if 'on ' in date_text:
-                            try:
-                                date_part = date_text.split('on ')[-1]
-                                review_date = datetime.strptime(date_part, '%B %d, %Y').replace(tzinfo=timezone.utc)
-                            except:
-                                pass
+                        review_date = parsed['review_date'] or datetime.now(timezone.utc)
                         
                         # Check date filter
-                        if start_date:
-                            # Ensure both dates are timezone-aware for comparison
-                            compare_start_date = start_date
-                            if start_date.tzinfo is None:
-                                compare_start_date = start_date.replace(tzinfo=timezone.utc)
-                            
-                            if hasattr(review_date, 'tzinfo') and review_date.tzinfo is None:
-                                review_date = review_date.replace(tzinfo=timezone.utc)
-                            
-                            if review_date < compare_start_date:
-                                reviews_before_start_date += 1
-                                page_reviews_before_start += 1
-                                continue
-                        
-                        # Helpful votes
-                        helpful_elem = review_elem.find('span', {'data-hook': 'helpful-vote-statement'})
-                        helpful_count = 0
-                        if helpful_elem:
-                            helpful_text = helpful_elem.text
-                            helpful_count = int(''.join(filter(str.isdigit, helpful_text))) if helpful_text else 0
-                        
-                        # Verified purchase
-                        verified_elem = review_elem.find('span', {'data-hook': 'avp-badge'})
-                        verified_purchase = verified_elem is not None
+                        if _is_before(review_date, start_date):
+                            reviews_before_start_date += 1
+                            page_reviews_before_start += 1
+                            continue
                         
-                        review_data = ReviewData(
+                        page_reviews.append(ReviewData(
                             platform_review_id=review_id,
-                            user_name=user_name,
+                            user_name=parsed['user_name'],
                             user_id=None,
-                            title=title,
-                            content=content,
-                            rating=rating,
+                            title=parsed['title'],
+                            content=parsed['content'],
+                            rating=parsed['rating'],
                             review_date=review_date,
-                            helpful_count=helpful_count,
-                            verified_purchase=verified_purchase,
+                            helpful_count=parsed['helpful_count'],
+                            verified_purchase=parsed['verified_purchase'],
                             review_source_url=url
-                        )
-                        
-                        reviews.append(review_data)
-                        
-                    except Exception as e:
-                        logger.warning(f"⚠️ Error parsing Amazon review: {e}")
-                        continue
-                
-                # If this entire page was before start_date, we can stop
-                if start_date and page_reviews_before_start == len(review_elements):
-                    logger.info(f"📅 Page {page} entirely before start date, stopping...")
-                    break
-                
-                logger.info(f"📥 Amazon: Page {page}, {len(reviews)}/{max_reviews} reviews collected")
-                if reviews_before_start_date > 0:
-                    logger.info(f"📅 Skipped {reviews_before_start_date} reviews before start date")
-                
-                time.sleep(2)  # Rate limiting for Amazon
-                
-            except Exception as e:
-                logger.error(f"❌ Error fetching Amazon page {page}: {e}")
-                break
+                        ))
+                    
+                    collected += len(page_reviews)
+                    yield ReviewPage(page_reviews, _checkpoint(
+                        collected, page_reviews, next_page=page + 1, reviews_before_start_date=reviews_before_start_date
+                    ))
+                    
+                    if known.should_stop:
+                        logger.info(f"🗂️ Reached {known.run} consecutive known reviews, stopping...")
+                        break
+                    
+                    # If this entire page was before start_date, we can stop
+                    if start_date and page_reviews_before_start == len(parsed_reviews):
+                        logger.info(f"📅 Page {page} entirely before start date, stopping...")
+                        break
+                    
+                    logger.info(f"📥 Amazon: Page {page}, {collected}/{max_reviews} reviews collected")
+                    if reviews_before_start_date > 0:
+                        logger.info(f"📅 Skipped {reviews_before_start_date} reviews before start date")
+            finally:
+                # Drop prefetched pages we no longer need
+                for _, _, future in in_flight:
+                    future.cancel()
         
-        logger.info(f"✅ Amazon: Collected {len(reviews)} reviews")
-        return reviews
+        logger.info(f"✅ Amazon: Collected {collected} reviews")
 
 class ReviewCollectionManager:
     """Manages the entire review collection process with incremental support"""
     
-    def __init__(self):
+    def __init__(self, archive: Optional[RawResponseArchive] = None, replay: bool = False,
+                 replay_run: Optional[str] = None):
         self.db_manager = get_db_manager()
+        self.metadata = get_metadata_registry()
         self.scrapers = {
             'google': GooglePlayScraper(self.db_manager),
             'apple': AppleStoreScraper(self.db_manager),
             'amazon': AmazonScraper(self.db_manager)
         }
+        
+        # Raw payloads are archived unless RAW_ARCHIVE_ENABLED=false; replays always read the archive
+        if archive is None and (replay or os.getenv('RAW_ARCHIVE_ENABLED', 'true').lower() == 'true'):
+            archive = RawResponseArchive()
+        self.replay = replay
+        for scraper in self.scrapers.values():
+            scraper.archive = archive
+            scraper.replay = replay
+            scraper.replay_run = replay_run
     
     def _get_platform_id(self, platform_name: str) -> int:
-        """Get platform ID from database"""
-        platforms = self.db_manager.get_platforms()
-        platform_map = {
-            'google': 'google_play',
-            'apple': 'apple_store', 
-            'amazon': 'amazon'
-        }
-        
-        platform_db_name = platform_map.get(platform_name, platform_name)
-        
-        for platform in platforms:
-            if platform['name'] == platform_db_name:
-                return platform['id']
-        
-        raise ValueError(f"Platform {platform_name} not found in database")
+        """Get platform ID from the metadata registry"""
+        return self.metadata.platform_id(platform_name)
     
     def get_last_review_date(self, product_id: int, platform: str) -> Optional[datetime]:
         """Get the date of the most recent review for incremental loading"""
@@ -454,7 +967,7 @@ class ReviewCollectionManager:
             start_date = self.get_last_review_date(product_id, platform)
             if start_date:
                 # Add a small buffer to avoid missing reviews
-                start_date = start_date - timedelta(days=1)
+                start_date = start_date - INCREMENTAL_OVERLAP
                 logger.info(f"📅 Incremental mode: Auto-detected start date as {start_date.strftime('%Y-%m-%d')}")
             else:
                 logger.info("📅 No previous reviews found, running full collection")
@@ -463,7 +976,7 @@ class ReviewCollectionManager:
         job_data = {
             'product_id': product_id,
             'platform_id': platform_id,
-            'job_type': 'incremental_collection' if incremental else 'full_collection',
+            'job_type': 'replay' if self.replay else 'incremental_collection' if incremental else 'full_collection',
             'parameters': {
                 'app_id': app_id,
                 'max_reviews': max_reviews,
@@ -474,7 +987,48 @@ class ReviewCollectionManager:
             'started_at': datetime.now(timezone.utc).isoformat()
         }
         
+        known_ids = KnownReviewIndex.load(self.db_manager, product_id, platform_id) if incremental else None
         job = self.db_manager.create_collection_job(job_data)
+        return self._run_job(job, platform, app_id, product_id, platform_id, max_reviews, start_date,
+                             known_ids=known_ids, **kwargs)
+    
+    def resume_collection(self, job_id: int) -> Dict[str, Any]:
+        """Continue an interrupted collection job from its last saved checkpoint"""
+        job = self.db_manager.get_collection_job(job_id)
+        if not job:
+            raise ValueError(f"Collection job {job_id} not found")
+        if job['status'] == 'completed':
+            raise ValueError(f"Collection job {job_id} already completed")
+        
+        platform = self.metadata.platform_key(job['platform_id'])
+        if platform not in self.scrapers:
+            raise ValueError(f"Unsupported platform for job {job_id}: {platform}")
+        
+        kwargs = dict(job.get('parameters') or {})
+        checkpoint = kwargs.pop('checkpoint', None)
+        app_id = kwargs.pop('app_id')
+        max_reviews = kwargs.pop('max_reviews', 1000)
+        start_date = kwargs.pop('start_date', None)
+        if start_date:
+            start_date = datetime.fromisoformat(start_date)
+        
+        if checkpoint:
+            logger.info(f"⏯️ Resuming job {job_id} from checkpoint: {checkpoint['collected']} reviews already collected")
+        else:
+            logger.info(f"⏯️ Job {job_id} has no checkpoint, restarting from the beginning")
+        
+        known_ids = None
+        if job.get('job_type') == 'incremental_collection':
+            known_ids = KnownReviewIndex.load(self.db_manager, job['product_id'], job['platform_id'])
+        
+        self.db_manager.update_collection_job(job_id, {'status': 'running', 'error_message': None})
+        return self._run_job(job, platform, app_id, job['product_id'], job['platform_id'], max_reviews,
+                             start_date, resume_from=checkpoint, known_ids=known_ids, **kwargs)
+    
+    def _run_job(self, job: Dict[str, Any], platform: str, app_id: str, product_id: int, platform_id: int,
+                 max_reviews: int, start_date: Optional[datetime], resume_from: Optional[Dict[str, Any]] = None,
+                 known_ids: Optional[KnownReviewIndex] = None, **kwargs) -> Dict[str, Any]:
+        """Stream a job's reviews into the database, checkpointing after every page"""
         job_id = job['id']
         
         try:
@@ -482,35 +1036,26 @@ class ReviewCollectionManager:
             if start_date:
                 logger.info(f"📅 Start date: {start_date.strftime('%Y-%m-%d %H:%M:%S')}")
             
-            # Fetch reviews using the appropriate scraper
+            # Stream pages from the scraper into the database as they arrive
             scraper = self.scrapers[platform]
-            reviews = scraper.fetch_reviews(app_id, max_reviews, start_date=start_date, **kwargs)
+            pipeline = ReviewPagePipeline(
+                self.db_manager, product_id, platform_id, job_id=job_id,
+                job_parameters=job.get('parameters'),
+                found=(job.get('total_reviews_found') or 0) if resume_from else 0,
+                inserted=(job.get('reviews_collected') or 0) if resume_from else 0
+            )
+            stats = pipeline.run(scraper.iter_review_pages(
+                app_id, max_reviews, start_date=start_date, resume_from=resume_from, known_ids=known_ids, **kwargs
+            ))
+            inserted_count = stats['inserted']
             
-            if not reviews:
+            if not stats['found']:
                 logger.warning(f"⚠️ No reviews collected for {platform}/{app_id}")
-                self.db_manager.update_collection_job(job_id, {
-                    'status': 'completed',
-                    'total_reviews_found': 0,
-                    'reviews_collected': 0,
-                    'completed_at': datetime.now(timezone.utc).isoformat()
-                })
-                return {'job_id': job_id, 'reviews_collected': 0}
-            
-            # Convert reviews to database format
-            review_dicts = []
-            for review in reviews:
-                review_dict = review.to_dict()
-                review_dict['product_id'] = product_id
-                review_dict['platform_id'] = platform_id
-                review_dicts.append(review_dict)
-            
-            # Insert reviews into database (this should handle duplicates)
-            inserted_count = self.db_manager.insert_reviews(review_dicts)
             
             # Update job status
             self.db_manager.update_collection_job(job_id, {
                 'status': 'completed',
-                'total_reviews_found': len(reviews),
+                'total_reviews_found': stats['found'],
                 'reviews_collected': inserted_count,
                 'completed_at': datetime.now(timezone.utc).isoformat()
             })
@@ -520,7 +1065,7 @@ class ReviewCollectionManager:
             return {
                 'job_id': job_id,
                 'reviews_collected': inserted_count,
-                'total_found': len(reviews),
+                'total_found': stats['found'],
                 'platform': platform,
                 'app_id': app_id,
                 'start_date': start_date.isoformat() if start_date else None
@@ -528,6 +1073,7 @@ class ReviewCollectionManager:
             
         except Exception as e:
             logger.error(f"❌ Job {job_id} failed: {e}")
+            logger.info(f"💡 Resume with: --resume {job_id}")
             self.db_manager.update_collection_job(job_id, {
                 'status': 'failed',
                 'error_message': str(e),
@@ -540,9 +1086,18 @@ def main():
     parser = argparse.ArgumentParser(description="Enhanced Review Collection System with Incremental Loading")
     
     # Platform and app identification
-    parser.add_argument('--platform', required=True, choices=['google', 'apple', 'amazon'],
+    parser.add_argument('--platform', choices=['google', 'apple', 'amazon'],
                        help='Platform to collect reviews from')
-    parser.add_argument('--app_id', required=True, help='App/Product ID on the platform')
+    parser.add_argument('--app_id', help='App/Product ID on the platform')
+    parser.add_argument('--resume', type=int, metavar='JOB_ID',
+                       help='Resume an interrupted collection job from its last checkpoint')
+    
+    # Raw response archive
+    parser.add_argument('--replay', action='store_true',
+                       help='Re-parse and insert an archived run instead of fetching from the platform')
+    parser.add_argument('--replay_run', help='Archived run ID to replay (default: latest for the app)')
+    parser.add_argument('--archive_dir', help='Raw response archive directory (default: RAW_ARCHIVE_DIR or .cache/raw_archive)')
+    parser.add_argument('--no_archive', action='store_true', help='Do not archive raw responses')
     
     # Product identification (required for database integration)
     parser.add_argument('--product_name', help='Product name (e.g., "Norton 360")')
@@ -552,13 +1107,21 @@ def main():
     # Collection parameters
     parser.add_argument('--max_reviews', type=int, default=1000, help='Maximum reviews to collect')
     parser.add_argument('--country', default='us', help='Country code for geo-specific reviews')
+    parser.add_argument('--countries', type=str,
+                       help='Comma-separated App Store countries collected concurrently (e.g., "us,gb,ca,au")')
     parser.add_argument('--language', default='en', help='Language code for reviews')
+    parser.add_argument('--stars', type=str,
+                       help='Google Play: comma-separated star ratings collected as concurrent partitions (e.g., "1,2,3,4,5")')
+    parser.add_argument('--locales', type=str,
+                       help='Google Play: comma-separated lang:country partitions (e.g., "en:us,en:gb,de:de")')
     
     # Incremental loading parameters
     parser.add_argument('--incremental', action='store_true', 
                        help='Enable incremental mode (auto-detect last review date)')
     parser.add_argument('--start_date', type=str, 
                        help='Start date for incremental loading (YYYY-MM-DD format)')
+    parser.add_argument('--known_stop_run', type=int,
+                       help='Stop after this many consecutive already-stored reviews (incremental mode)')
     parser.add_argument('--days_back', type=int, 
                        help='Number of days to go back from today for start date')
     
@@ -571,8 +1134,23 @@ def main():
     
     args = parser.parse_args()
     
+    if not args.resume and not (args.platform and args.app_id):
+        parser.error("--platform and --app_id are required unless --resume is given")
+    
     try:
-        manager = ReviewCollectionManager()
+        archive = RawResponseArchive(args.archive_dir) if args.archive_dir else None
+        manager = ReviewCollectionManager(archive=archive, replay=args.replay, replay_run=args.replay_run)
+        if args.no_archive and not args.replay:
+            for scraper in manager.scrapers.values():
+                scraper.archive = None
+        
+        if args.resume:
+            result = manager.resume_collection(args.resume)
+            logger.info("🎉 Collection completed successfully!")
+            logger.info(f"   Job ID: {result['job_id']}")
+            logger.info(f"   Reviews Collected: {result['reviews_collected']}")
+            logger.info(f"   Total Found: {result['total_found']}")
+            return 0
         
         # Determine product_id
         product_id = args.product_id
@@ -582,7 +1160,7 @@ def main():
                 return 1
             
             # Try to find product in database
-            product = manager.db_manager.get_product_by_name(args.product_name, args.company)
+            product = manager.metadata.product_by_name(args.product_name, args.company)
             if product:
                 product_id = product['id']
                 logger.info(f"✅ Found product: {product['name']} by {product['company']} (ID: {product_id})")
@@ -610,6 +1188,15 @@ def main():
             'incremental': args.incremental,
             'start_date': start_date
         }
+        if args.known_stop_run:
+            collection_params['known_stop_run'] = args.known_stop_run
+        if args.countries and args.platform == 'apple':
+            collection_params['countries'] = [c.strip() for c in args.countries.split(',') if c.strip()]
+        if args.platform == 'google':
+            if args.stars:
+                collection_params['stars'] = [int(star) for star in args.stars.split(',') if star.strip()]
+            if args.locales:
+                collection_params['locales'] = [locale.strip() for locale in args.locales.split(',') if locale.strip()]
         
         if args.platform == 'amazon':
             collection_params.update({
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Known Review Index
+Compact per-(product, platform) set of stored platform_review_ids, so the
+incremental scrapers can stop as soon as they reach reviews we already have
+"""
+
+import os
+import sys
+import logging
+from array import array
+from bisect import bisect_left
+from hashlib import blake2b
+from typing import Iterable, Optional
+
+# Local imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.manager import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+# Consecutive already-stored reviews after which a scraper stops
+DEFAULT_KNOWN_STOP_RUN = int(os.getenv('KNOWN_REVIEW_STOP_RUN', 50))
+
+
+class KnownReviewIndex:
+    """Sorted array of 64-bit hashes of platform_review_ids.
+
+    Eight bytes per stored review (a million reviews fit in 8 MB) and a
+    binary search per lookup. A false positive needs a 64-bit hash
+    collision, and even then only shortens a stopping run by one review.
+    """
+
+    def __init__(self, hashes: Iterable[int] = ()):
+        self._hashes = array('q', sorted(set(hashes)))
+
+    @staticmethod
+    def hash_id(review_id: str) -> int:
+        digest = blake2b(str(review_id).encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'big', signed=True)
+
+    @classmethod
+    def from_ids(cls, review_ids: Iterable[str]) -> 'KnownReviewIndex':
+        return cls(cls.hash_id(review_id) for review_id in review_ids)
+
+    @classmethod
+    def load(cls, db_manager: DatabaseManager, product_id: int, platform_id: int) -> 'KnownReviewIndex':
+        """Build the index from the reviews already stored for a product/platform"""
+        index = cls.from_ids(db_manager.get_platform_review_ids(product_id, platform_id))
+        logger.info(f"🗂️ Loaded {len(index)} known review IDs for product {product_id}, platform {platform_id}")
+        return index
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def __contains__(self, review_id: str) -> bool:
+        value = self.hash_id(review_id)
+        position = bisect_left(self._hashes, value)
+        return position < len(self._hashes) and self._hashes[position] == value
+
+
+class KnownRunTracker:
+    """Counts consecutive known reviews in a newest-first stream.
+
+    Reviews arrive newest first, so a long run of IDs we already store means
+    everything after it is stored too. Unknown reviews reset the run, which
+    keeps late-indexed reviews between known ones from ending collection
+    early.
+
+    Known-ness is by ID only: an edited review keeps its ID, so it is skipped
+    here and counts towards the run. Edits are only picked up (and
+    re-queued for analysis by merge_reviews) on full, non-incremental runs.
+    """
+
+    def __init__(self, index: Optional[KnownReviewIndex], stop_after: Optional[int] = None):
+        self.index = index
+        self.stop_after = stop_after or DEFAULT_KNOWN_STOP_RUN
+        self.run = 0
+        self.skipped = 0
+
+    def is_known(self, review_id: str) -> bool:
+        """Record one review; True when it is already stored and should be skipped"""
+        if self.index is None or review_id not in self.index:
+            self.run = 0
+            return False
+        self.run += 1
+        self.skipped += 1
+        return True
+
+    @property
+    def should_stop(self) -> bool:
+        return self.index is not None and self.run >= self.stop_after
@@ -17,9 +17,11 @@ import pandas as pd
 # Local imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database.manager import DatabaseManager, get_db_manager
+from database.metadata_registry import get_metadata_registry
 
 # Import the enhanced review collector
 from incremental_fetch_reviews import ReviewCollectionManager
+from collection_scheduler import CollectionScheduler, CollectionTask, SCRAPER_KEYS, get_platform_rate_limits
 
 # Setup logging
 logging.basicConfig(
@@ -31,28 +33,34 @@ logger = logging.getLogger(__name__)
 class MultiProductCollector:
     """Manages review collection for multiple products"""
     
-    def __init__(self):
+    def __init__(self, workers_per_platform: Optional[int] = None):
         self.db_manager = get_db_manager()
         self.review_manager = ReviewCollectionManager()
+        self.scheduler = CollectionScheduler(
+            get_platform_rate_limits(self.db_manager),
+            workers_per_platform=workers_per_platform
+        )
     
     def get_products_with_platform_info(self) -> List[Dict[str, Any]]:
         """Get all products with their platform mappings and review statistics"""
         
-        # Use the working database methods from the incremental script
-        products = self.db_manager.get_products()
-        mappings = self.db_manager.get_product_mappings()
+        # Cached metadata; products are copied because they are annotated below
+        metadata = get_metadata_registry()
+        products = [dict(product) for product in metadata.products()]
+        mappings = metadata.mappings()
+        
+        # Review counts and latest dates from the collection watermarks in one query
+        try:
+            watermarks = self.db_manager.get_collection_watermarks()
+        except Exception as e:
+            logger.warning(f"Could not load collection watermarks: {e}")
+            watermarks = {}
         
-        # Add review counts using simple query
         for product in products:
-            try:
-                reviews = self.db_manager.get_reviews(product_id=product['id'], limit=1)
-                product['existing_reviews'] = len(reviews) if reviews else 0
-                product['max_review_date'] = None
-                product['min_review_date'] = None
-            except:
-                product['existing_reviews'] = 0
-                product['max_review_date'] = None
-                product['min_review_date'] = None
+            product_marks = [mark for (product_id, _), mark in watermarks.items() if product_id == product['id']]
+            latest_dates = [mark['latest_review_date'] for mark in product_marks if mark['latest_review_date']]
+            product['existing_reviews'] = sum(mark['total_reviews'] for mark in product_marks)
+            product['max_review_date'] = max(latest_dates).isoformat() if latest_dates else None
         
         # Organize mappings by product_id
         mappings_by_product = {}
@@ -60,10 +68,12 @@ class MultiProductCollector:
             product_id = mapping['product_id']
             if product_id not in mappings_by_product:
                 mappings_by_product[product_id] = []
+            watermark = watermarks.get((product_id, mapping['platform_id']), {})
             mappings_by_product[product_id].append({
                 'platform_name': mapping['platform_name'],
                 'platform_display_name': mapping['display_name'],
-                'app_id': mapping['platform_app_id']
+                'app_id': mapping['platform_app_id'],
+                'latest_review_date': watermark.get('latest_review_date')
             })
         
         # Combine products with their mappings
@@ -121,117 +131,100 @@ class MultiProductCollector:
         print(f"Products with platform mappings: {len([p for p in products if p['platforms']])}")
         print("="*120)
     
-    def collect_for_product(self, product_id: int, platform_filter: Optional[str] = None, 
-                           max_reviews: int = 10000, incremental: bool = False,
-                           start_date: Optional[datetime] = None, **kwargs) -> Dict[str, Any]:
-        """Collect reviews for a specific product from all its platforms"""
-        
-        products = self.get_products_with_platform_info()
-        product = next((p for p in products if p['id'] == product_id), None)
-        
-        if not product:
-            raise ValueError(f"Product with ID {product_id} not found")
-        
-        if not product['platforms']:
-            logger.warning(f"⚠️ Product '{product['name']}' has no platform mappings")
-            return {'product_id': product_id, 'results': []}
-        
-        logger.info(f"🚀 Starting collection for: {product['name']} by {product['company']}")
-        
-        results = []
-        total_collected = 0
-        
-        for platform_info in product['platforms']:
-            platform_name = platform_info['platform_name']
-            app_id = platform_info['app_id']
-            
-            # Apply platform filter if specified
-            if platform_filter and platform_name != platform_filter:
-                logger.info(f"⏭️ Skipping {platform_name} (filtered)")
-                continue
-            
-            # Map platform names to scraper keys
-            platform_map = {
-                'google_play': 'google',
-                'apple_store': 'apple',
-                'amazon': 'amazon'
-            }
-            
-            scraper_key = platform_map.get(platform_name)
-            if not scraper_key:
-                logger.warning(f"⚠️ No scraper available for platform {platform_name}")
+    def build_collection_tasks(self, products: List[Dict[str, Any]],
+                               platform_filter: Optional[str] = None) -> List[CollectionTask]:
+        """One task per (product, platform mapping) that has a scraper"""
+        tasks = []
+        for product in products:
+            if not product['platforms']:
+                logger.warning(f"⚠️ Product '{product['name']}' has no platform mappings")
                 continue
             
-            try:
-                logger.info(f"📱 Collecting from {platform_info['platform_display_name']} (ID: {app_id})")
-                
-                result = self.review_manager.collect_reviews(
-                    platform=scraper_key,
-                    app_id=app_id,
-                    product_id=product_id,
-                    max_reviews=max_reviews,
-                    incremental=incremental,
-                    start_date=start_date,
-                    **kwargs
-                )
+            for platform_info in product['platforms']:
+                platform_name = platform_info['platform_name']
                 
-                result['platform_name'] = platform_name
-                result['platform_display_name'] = platform_info['platform_display_name']
-                results.append(result)
-                total_collected += result['reviews_collected']
+                # Apply platform filter if specified
+                if platform_filter and platform_name != platform_filter:
+                    logger.info(f"⏭️ Skipping {platform_name} for {product['name']} (filtered)")
+                    continue
                 
-                logger.info(f"✅ {platform_info['platform_display_name']}: {result['reviews_collected']} reviews collected")
+                if platform_name not in SCRAPER_KEYS:
+                    logger.warning(f"⚠️ No scraper available for platform {platform_name}")
+                    continue
                 
-                # Rate limiting between platforms
-                time.sleep(2)
-                
-            except Exception as e:
-                logger.error(f"❌ Failed to collect from {platform_name}: {e}")
-                results.append({
-                    'platform_name': platform_name,
-                    'platform_display_name': platform_info['platform_display_name'],
-                    'error': str(e),
-                    'reviews_collected': 0
-                })
+                tasks.append(CollectionTask(
+                    product_id=product['id'],
+                    product_name=product['name'],
+                    platform_name=platform_name,
+                    platform_display_name=platform_info['platform_display_name'],
+                    app_id=platform_info['app_id'],
+                    latest_review_date=platform_info.get('latest_review_date')
+                ))
+        return tasks
+    
+    def collect_for_products(self, product_ids: List[int], platform_filter: Optional[str] = None,
+                             max_reviews: int = 10000, incremental: bool = False,
+                             start_date: Optional[datetime] = None, **kwargs) -> List[Dict[str, Any]]:
+        """Collect reviews for several products across all their platforms concurrently.
         
-        logger.info(f"🎉 Total collected for {product['name']}: {total_collected} reviews")
+        Returns one summary per product in the order given.
+        """
+        products_by_id = {p['id']: p for p in self.get_products_with_platform_info()}
+        missing = [pid for pid in product_ids if pid not in products_by_id]
+        products = [products_by_id[pid] for pid in product_ids if pid in products_by_id]
         
-        return {
-            'product_id': product_id,
-            'product_name': product['name'],
-            'company': product['company'],
-            'total_collected': total_collected,
-            'results': results
+        tasks = self.build_collection_tasks(products, platform_filter)
+        logger.info(f"🚀 Scheduling {len(tasks)} collection tasks for {len(products)} products")
+        
+        results = self.scheduler.run(
+            tasks,
+            max_reviews=max_reviews,
+            incremental=incremental,
+            start_date=start_date,
+            **kwargs
+        ) if tasks else []
+        
+        summaries = {
+            product['id']: {
+                'product_id': product['id'],
+                'product_name': product['name'],
+                'company': product['company'],
+                'total_collected': 0,
+                'results': []
+            }
+            for product in products
         }
+        for result in results:
+            summary = summaries[result['product_id']]
+            summary['results'].append(result)
+            summary['total_collected'] += result['reviews_collected']
+        
+        for summary in summaries.values():
+            logger.info(f"🎉 Total collected for {summary['product_name']}: {summary['total_collected']} reviews")
+        
+        ordered = []
+        for product_id in product_ids:
+            if product_id in summaries:
+                ordered.append(summaries[product_id])
+            elif product_id in missing:
+                logger.error(f"❌ Product with ID {product_id} not found")
+                ordered.append({'product_id': product_id, 'error': 'Product not found', 'total_collected': 0})
+        return ordered
+    
+    def collect_for_product(self, product_id: int, **kwargs) -> Dict[str, Any]:
+        """Collect reviews for a specific product from all its platforms"""
+        result = self.collect_for_products([product_id], **kwargs)[0]
+        if result.get('error'):
+            raise ValueError(f"Product with ID {product_id} not found")
+        return result
     
     def collect_for_multiple_products(self, product_ids: List[int], **kwargs) -> Dict[str, Any]:
         """Collect reviews for multiple products"""
         
         logger.info(f"🚀 Starting collection for {len(product_ids)} products")
         
-        all_results = []
-        total_collected = 0
-        
-        for i, product_id in enumerate(product_ids, 1):
-            logger.info(f"\n📊 Progress: {i}/{len(product_ids)} - Product ID {product_id}")
-            
-            try:
-                result = self.collect_for_product(product_id, **kwargs)
-                all_results.append(result)
-                total_collected += result['total_collected']
-                
-                # Rate limiting between products
-                if i < len(product_ids):
-                    logger.info("⏳ Waiting 5 seconds before next product...")
-                    time.sleep(5)
-                    
-            except Exception as e:
-                logger.error(f"❌ Failed to collect for product {product_id}: {e}")
-                all_results.append({
-                    'product_id': product_id,
-                    'error': str(e),
-                    'total_collected': 0
-                })
+        all_results = self.collect_for_products(product_ids, **kwargs)
+        total_collected = sum(result['total_collected'] for result in all_results)
         
         logger.info(f"\n🎉 Multi-product collection completed!")
         logger.info(f"📊 Total reviews collected: {total_collected}")
@@ -322,7 +315,15 @@ def main():
     
     # Platform-specific parameters
     parser.add_argument('--country', default='us', help='Country code for reviews')
+    parser.add_argument('--countries', type=str,
+                       help='Comma-separated App Store countries collected concurrently (e.g., "us,gb,ca,au")')
+    parser.add_argument('--stars', type=str,
+                       help='Google Play: comma-separated star ratings collected as concurrent partitions (e.g., "1,2,3,4,5")')
+    parser.add_argument('--locales', type=str,
+                       help='Google Play: comma-separated lang:country partitions (e.g., "en:us,en:gb,de:de")')
     parser.add_argument('--language', default='en', help='Language code for reviews')
+    parser.add_argument('--workers_per_platform', type=int,
+                       help='Concurrent collection workers per platform (default: COLLECTION_WORKERS_PER_PLATFORM or 2)')
     
     # Output options
     parser.add_argument('--output_json', help='Save results to JSON file')
@@ -330,7 +331,7 @@ def main():
     args = parser.parse_args()
     
     try:
-        collector = MultiProductCollector()
+        collector = MultiProductCollector(workers_per_platform=args.workers_per_platform)
         
         if args.action == 'list':
             collector.display_products_table()
@@ -374,6 +375,12 @@ def main():
                 'country': args.country,
                 'language': args.language
             }
+            if args.countries:
+                collection_params['countries'] = [c.strip() for c in args.countries.split(',') if c.strip()]
+            if args.stars:
+                collection_params['stars'] = [int(star) for star in args.stars.split(',') if star.strip()]
+            if args.locales:
+                collection_params['locales'] = [locale.strip() for locale in args.locales.split(',') if locale.strip()]
             
             result = collector.collect_for_product(args.product_id, **collection_params)
             
@@ -433,6 +440,12 @@ def main():
                 'country': args.country,
                 'language': args.language
             }
+            if args.countries:
+                collection_params['countries'] = [c.strip() for c in args.countries.split(',') if c.strip()]
+            if args.stars:
+                collection_params['stars'] = [int(star) for star in args.stars.split(',') if star.strip()]
+            if args.locales:
+                collection_params['locales'] = [locale.strip() for locale in args.locales.split(',') if locale.strip()]
             
             result = collector.collect_for_multiple_products(product_ids, **collection_params)
             
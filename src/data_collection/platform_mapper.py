@@ -13,6 +13,7 @@ from typing import Dict, List, Any
 # Local imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database.manager import DatabaseManager, get_db_manager
+from database.metadata_registry import get_metadata_registry
 
 # Setup logging
 logging.basicConfig(
@@ -26,28 +27,25 @@ class PlatformMappingManager:
     
     def __init__(self):
         self.db_manager = get_db_manager()
+        self.metadata = get_metadata_registry()
     
     def add_mapping(self, product_id: int, platform_name: str, app_id: str):
         """Add a new platform mapping for a product"""
         
         # Get platform ID
-        platforms = self.db_manager.get_platforms()
-        platform = next((p for p in platforms if p['name'] == platform_name), None)
+        platform = self.metadata.platform_by_name(platform_name)
         
-        if not platform:
+        if not platform or not platform.get('is_active'):
             raise ValueError(f"Platform '{platform_name}' not found")
         
         # Check if product exists
-        products = self.db_manager.get_products()
-        product = next((p for p in products if p['id'] == product_id), None)
+        product = self.metadata.product(product_id)
         
-        if not product:
+        if not product or not product.get('is_active'):
             raise ValueError(f"Product with ID {product_id} not found")
         
         # Check if mapping already exists
-        existing_mappings = self.db_manager.get_product_mappings()
-        existing = next((m for m in existing_mappings 
-                        if m['product_id'] == product_id and m['platform_id'] == platform['id']), None)
+        existing = self.metadata.mapping_for(product_id, platform['id'])
         
         if existing:
             logger.warning(f"⚠️ Mapping already exists for {product['name']} on {platform['display_name']}")
@@ -72,6 +70,7 @@ class PlatformMappingManager:
                 (product_id, platform['id'], app_id, True))
             
             mapping_id = result[0]['id'] if result else None
+            self.metadata.invalidate('mappings')
             
             logger.info(f"✅ Added mapping: {product['name']} -> {platform['display_name']} ({app_id})")
             return mapping_id
@@ -227,7 +226,7 @@ def main():
             print("🚀 Adding common platform mappings...")
             
             # Get all products to match names
-            products = manager.db_manager.get_products()
+            products = manager.metadata.products()
             
             added_count = 0
             for mapping in COMMON_MAPPINGS:
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Raw Response Archive
+Content-addressed, gzip-compressed store of every raw scraper payload plus a
+per-run manifest of request metadata, so parsing and inserting can be re-run
+offline (--replay) after a parser fix or schema change
+"""
+
+import os
+import re
+import gzip
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional, Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_ARCHIVE_DIR = os.path.join(project_root, '.cache', 'raw_archive')
+
+_SAFE_NAME_RE = re.compile(r'[^A-Za-z0-9._-]+')
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    raise TypeError(f"Cannot archive value of type {type(value).__name__}")
+
+
+def _json_hook(value: Dict[str, Any]) -> Any:
+    if len(value) == 1 and '__datetime__' in value:
+        return datetime.fromisoformat(value['__datetime__'])
+    return value
+
+
+def dumps_payload(data: Any) -> bytes:
+    """Serialize a scraper library result (datetimes survive the round trip)"""
+    return json.dumps(data, default=_json_default, ensure_ascii=False).encode('utf-8')
+
+
+def loads_payload(payload: bytes) -> Any:
+    return json.loads(payload.decode('utf-8'), object_hook=_json_hook)
+
+
+class ArchiveRun:
+    """One collection run's payloads in fetch order.
+
+    Recording appends one manifest line per payload; replaying reads them
+    back in the same order, or by request (for scrapers that fetch
+    concurrently, like Amazon).
+    """
+
+    def __init__(self, archive: 'RawResponseArchive', platform: str, app_id: str, run_id: str):
+        self.archive = archive
+        self.platform = platform
+        self.app_id = app_id
+        self.run_id = run_id
+        self.manifest_path = os.path.join(archive.run_dir(platform, app_id), f"{run_id}.jsonl")
+        self._lock = threading.Lock()
+        self._sequence = 0
+
+    def record(self, request: Dict[str, Any], payload: bytes, **metadata) -> str:
+        """Archive one raw payload with the request that produced it; returns its digest"""
+        digest = self.archive.put(payload)
+        entry = {
+            'sequence': None,
+            'platform': self.platform,
+            'app_id': self.app_id,
+            'request': request,
+            'sha256': digest,
+            'size': len(payload),
+            'fetched_at': datetime.now(timezone.utc).isoformat(),
+            **metadata
+        }
+        with self._lock:
+            entry['sequence'] = self._sequence
+            self._sequence += 1
+            with open(self.manifest_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + '\n')
+        return digest
+
+    def entries(self) -> List[Dict[str, Any]]:
+        with open(self.manifest_path, encoding='utf-8') as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        return sorted(entries, key=lambda entry: entry['sequence'])
+
+    def __iter__(self) -> Iterator[Tuple[Dict[str, Any], bytes]]:
+        for entry in self.entries():
+            yield entry, self.archive.get(entry['sha256'])
+
+    def find(self, **request) -> Optional[bytes]:
+        """Payload of the first entry whose request matches all given fields"""
+        for entry in self.entries():
+            if all(entry['request'].get(key) == value for key, value in request.items()):
+                return self.archive.get(entry['sha256'])
+        return None
+
+
+class RawResponseArchive:
+    """Payloads under objects/<sha[:2]>/<sha>.gz, manifests under runs/<platform>/<app_id>/"""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or os.getenv('RAW_ARCHIVE_DIR', DEFAULT_ARCHIVE_DIR)
+
+    def run_dir(self, platform: str, app_id: str) -> str:
+        return os.path.join(self.root, 'runs', platform, _SAFE_NAME_RE.sub('_', str(app_id)))
+
+    def put(self, payload: bytes) -> str:
+        """Store a payload once, however many runs fetch it"""
+        digest = hashlib.sha256(payload).hexdigest()
+        path = os.path.join(self.root, 'objects', digest[:2], f"{digest}.gz")
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(temp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(temp_path, path)
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        with gzip.open(os.path.join(self.root, 'objects', digest[:2], f"{digest}.gz"), 'rb') as f:
+            return f.read()
+
+    def start_run(self, platform: str, app_id: str) -> ArchiveRun:
+        os.makedirs(self.run_dir(platform, app_id), exist_ok=True)
+        run_id = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+        return ArchiveRun(self, platform, app_id, run_id)
+
+    def list_runs(self, platform: str, app_id: str) -> List[str]:
+        """Archived run ids for an app, oldest first"""
+        run_dir = self.run_dir(platform, app_id)
+        if not os.path.isdir(run_dir):
+            return []
+        return sorted(name[:-len('.jsonl')] for name in os.listdir(run_dir) if name.endswith('.jsonl'))
+
+    def open_run(self, platform: str, app_id: str, run_id: Optional[str] = None) -> ArchiveRun:
+        """An archived run to replay: the given one, or the latest"""
+        runs = self.list_runs(platform, app_id)
+        if run_id is None and runs:
+            run_id = runs[-1]
+        if run_id is None or run_id not in runs:
+            raise FileNotFoundError(f"No archived {platform} run for {app_id}" + (f" with id {run_id}" if run_id else ''))
+        logger.info(f"📼 Replaying archived {platform} run {run_id} for {app_id}")
+        return ArchiveRun(self, platform, app_id, run_id)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Streaming scrape-to-database pipeline
+Inserts each page of scraped reviews while the scraper fetches the next one,
+so memory stays constant and a crash only loses the pages still in flight
+"""
+
+import os
+import sys
+import time
+import queue
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Iterable
+
+# Local imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.manager import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+_END_OF_STREAM = object()
+
+
+class ReviewPagePipeline:
+    """Bounded producer/consumer pipeline between a scraper and the database.
+
+    The caller's thread drives the scraper's page generator; a writer thread
+    inserts pages as they arrive. Pages that pile up while an insert is in
+    flight are merged into the next insert (up to max_insert_size reviews).
+    The queue holds at most queue_pages pages, so a slow database applies
+    back-pressure to the scraper instead of growing memory.
+
+    Pages may carry a `checkpoint` dict (the scraper cursor after that page).
+    Once a page is inserted, its checkpoint is saved into the job's
+    parameters, so a resumed job never skips reviews that were not written.
+    """
+
+    def __init__(self, db_manager: DatabaseManager, product_id: int, platform_id: int,
+                 job_id: Optional[int] = None, queue_pages: int = 4, max_insert_size: int = 1000,
+                 job_parameters: Optional[Dict[str, Any]] = None, found: int = 0, inserted: int = 0):
+        self.db_manager = db_manager
+        self.product_id = product_id
+        self.platform_id = platform_id
+        self.job_id = job_id
+        self.job_parameters = dict(job_parameters or {})
+        self.max_insert_size = max_insert_size
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_pages)
+        self._writer_error: Optional[BaseException] = None
+        self._started_at = time.time()
+
+        # Counters start from a resumed job's totals
+        self.pages = 0
+        self.found = found
+        self.inserted = inserted
+        self._inserted_at_start = inserted
+
+    def _to_rows(self, page: List[Any]) -> List[Dict[str, Any]]:
+        rows = []
+        for review in page:
+            review_dict = review.to_dict()
+            review_dict['product_id'] = self.product_id
+            review_dict['platform_id'] = self.platform_id
+            rows.append(review_dict)
+        return rows
+
+    def _report_progress(self, checkpoint: Optional[Dict[str, Any]] = None):
+        if self.job_id is None:
+            return
+        elapsed_minutes = max((time.time() - self._started_at) / 60, 1e-6)
+        updates = {
+            'total_reviews_found': self.found,
+            'reviews_collected': self.inserted,
+            'collection_rate_per_minute': round((self.inserted - self._inserted_at_start) / elapsed_minutes, 2)
+        }
+        if checkpoint is not None:
+            self.job_parameters['checkpoint'] = checkpoint
+            updates['parameters'] = self.job_parameters
+        try:
+            self.db_manager.update_collection_job(self.job_id, updates)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not update progress for job {self.job_id}: {e}")
+
+    def _writer(self):
+        finished = False
+        while not finished:
+            page = self._queue.get()
+            if page is _END_OF_STREAM:
+                break
+
+            # Merge whatever else is already waiting into this insert
+            batch = list(page)
+            checkpoint = getattr(page, 'checkpoint', None)
+            while len(batch) < self.max_insert_size:
+                try:
+                    extra = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if extra is _END_OF_STREAM:
+                    finished = True
+                    break
+                batch.extend(extra)
+                checkpoint = getattr(extra, 'checkpoint', None) or checkpoint
+
+            try:
+                if batch:
+                    written = self.db_manager.insert_reviews(self._to_rows(batch))
+                    self.inserted += written
+                    # insert_reviews logs and swallows failures; a short write must
+                    # stop the run so the checkpoint never moves past unsaved reviews
+                    if written < len(batch):
+                        raise RuntimeError(f"Only {written}/{len(batch)} reviews were inserted")
+            except BaseException as e:
+                self._writer_error = e
+                # Keep draining so the producer never blocks on a dead writer
+                while not finished and self._queue.get() is not _END_OF_STREAM:
+                    pass
+                return
+
+            self._report_progress(checkpoint)
+            logger.info(f"💾 Streamed {self.inserted}/{self.found} reviews to the database")
+
+    def run(self, pages: Iterable[List[Any]]) -> Dict[str, int]:
+        """Consume the page iterator, inserting pages concurrently.
+
+        Pages fetched before a scraper error are still written; the error is
+        then re-raised. Returns found/inserted/pages counters.
+        """
+        writer = threading.Thread(target=self._writer, name='review-pipeline-writer', daemon=True)
+        writer.start()
+
+        try:
+            for page in pages:
+                if self._writer_error is not None:
+                    break
+                # Empty pages still matter when they move the checkpoint
+                if not page and getattr(page, 'checkpoint', None) is None:
+                    continue
+                self.pages += 1
+                self.found += len(page)
+                self._queue.put(page)
+        finally:
+            self._queue.put(_END_OF_STREAM)
+            writer.join()
+
+        if self._writer_error is not None:
+            raise self._writer_error
+
+        return {'found': self.found, 'inserted': self.inserted, 'pages': self.pages}
+
+
+def stream_reviews_to_db(db_manager: DatabaseManager, pages: Iterable[List[Any]], product_id: int,
+                         platform_id: int, job_id: Optional[int] = None, **kwargs) -> Dict[str, int]:
+    """Convenience wrapper around ReviewPagePipeline"""
+    return ReviewPagePipeline(db_manager, product_id, platform_id, job_id, **kwargs).run(pages)
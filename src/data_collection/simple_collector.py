@@ -11,19 +11,19 @@ import logging
 
 # Local imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from database.manager import get_db_manager
+from database.metadata_registry import get_metadata_registry
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def get_products_with_mappings():
     """Get products that have platform mappings"""
-    db_manager = get_db_manager()
+    metadata = get_metadata_registry()
     
     try:
         # Get all products
-        products = db_manager.get_products()
-        mappings = db_manager.get_product_mappings()
+        products = metadata.products()
+        mappings = metadata.mappings()
         
         # Group mappings by product
         product_mappings = {}
@@ -73,18 +73,17 @@ def collect_for_product(product_id, platform_name='google_play', max_reviews=100
                        incremental=False, start_date=None):
     """Collect reviews for a specific product"""
     
-    db_manager = get_db_manager()
+    metadata = get_metadata_registry()
     
     # Get product info
-    products = db_manager.get_products()
-    product = next((p for p in products if p['id'] == product_id), None)
+    product = metadata.product(product_id)
     
-    if not product:
+    if not product or not product.get('is_active'):
         print(f"❌ Product ID {product_id} not found")
         return False
     
     # Get mappings for this product
-    mappings = db_manager.get_product_mappings(product_id=product_id)
+    mappings = metadata.mappings(product_id=product_id)
     
     if not mappings:
         print(f"❌ No platform mappings found for {product['name']}")
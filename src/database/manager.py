@@ -1,18 +1,32 @@
 """
 Database configuration and connection management for Supabase
 """
+import io
 import os
+import re
+import time
 import logging
-from typing import Dict, Any, Optional, List
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, List, Tuple, Iterator
 from dataclasses import dataclass
 import pandas as pd
+import httpx
 from supabase import create_client, Client
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from psycopg2.extras import RealDictCursor, Json, execute_values
+from psycopg2.pool import PoolError
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
+try:
+    from supabase.lib.client_options import SyncClientOptions
+except ImportError:  # older supabase: each client builds its own HTTP session
+    SyncClientOptions = None
+
 # Load environment variables from project root
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 env_path = os.path.join(project_root, '.env')
@@ -20,6 +34,168 @@ load_dotenv(env_path)
 
 logger = logging.getLogger(__name__)
 
+# AI result columns written back to reviews, with their SQL types
+REVIEW_RESULT_COLUMNS = {
+    'sentiment_score': 'DECIMAL(4,3)',
+    'sentiment_label': 'VARCHAR(20)',
+    'confidence_score': 'DECIMAL(4,3)',
+    'key_topics': 'JSONB',
+    'issues_mentioned': 'JSONB',
+    'features_mentioned': 'JSONB',
+    'competitive_mentions': 'JSONB',
+    'suggested_improvements': 'TEXT',
+    'priority_level': 'VARCHAR(10)',
+    'requires_response': 'BOOLEAN',
+    'ai_model_used': 'VARCHAR(50)',
+    'processing_version': 'VARCHAR(10)',
+    'processing_duration_ms': 'INTEGER',
+    'processed_at': 'TIMESTAMPTZ'
+}
+
+# Columns of review_analysis written alongside, with their SQL types
+ANALYSIS_RECORD_COLUMNS = {
+    'emotion_scores': 'JSONB',
+    'aspect_sentiment': 'JSONB',
+    'subjectivity_score': 'DECIMAL(4,3)',
+    'primary_topic': 'VARCHAR(100)',
+    'topic_distribution': 'JSONB',
+    'intent_type': 'VARCHAR(30)',
+    'action_required': 'BOOLEAN',
+    'escalation_needed': 'BOOLEAN',
+    'competitor_mentions': 'JSONB',
+    'switching_intent': 'BOOLEAN',
+    'churn_risk_score': 'DECIMAL(4,3)',
+    'upsell_opportunity': 'BOOLEAN'
+}
+
+# (review_id, reviews column updates, optional review_analysis record)
+ReviewResult = Tuple[int, Dict[str, Any], Optional[Dict[str, Any]]]
+
+# Groupings supported by get_review_aggregates
+AGGREGATE_GROUP_KEYS = ('product_id', 'platform_id', 'year')
+
+# Failed analyses back off exponentially and are dead-lettered after this many attempts
+ANALYSIS_MAX_ATTEMPTS = int(os.getenv('ANALYSIS_MAX_ATTEMPTS', 5))
+ANALYSIS_RETRY_BASE_SECONDS = int(os.getenv('ANALYSIS_RETRY_BASE_SECONDS', 300))
+ANALYSIS_RETRY_MAX_SECONDS = int(os.getenv('ANALYSIS_RETRY_MAX_SECONDS', 86400))
+
+# Unprocessed, not dead-lettered, and out of backoff
+ANALYSIS_BACKLOG_SQL = """processed_at IS NULL AND analysis_dead_lettered_at IS NULL
+    AND (analysis_next_attempt_at IS NULL OR analysis_next_attempt_at <= NOW())"""
+
+# How long a claimed review stays leased to a worker without a heartbeat
+ANALYSIS_LEASE_SECONDS = int(os.getenv('ANALYSIS_LEASE_SECONDS', 600))
+
+# Reviews per insert: one COPY + merge transaction on the direct connection,
+# one upsert request through PostgREST
+REVIEW_COPY_CHUNK_SIZE = int(os.getenv('REVIEW_COPY_CHUNK_SIZE', 5000))
+REVIEW_API_BATCH_SIZE = int(os.getenv('REVIEW_API_BATCH_SIZE', 1000))
+
+# SQLSTATE classes caused by the rows being written rather than the connection
+# or schema: cardinality violation, data exception, integrity constraint
+ROW_ERROR_SQLSTATE_CLASSES = ('21', '22', '23')
+
+# Applied when a re-collected review's content fingerprint changed, so the
+# edited review is analyzed again (see merge_reviews in schema.sql)
+REANALYZE_ASSIGNMENTS = ("processed_at = NULL, analysis_attempts = 0, analysis_last_error = NULL, "
+                         "analysis_next_attempt_at = NULL, analysis_dead_lettered_at = NULL")
+
+# Filter operators accepted by iter_reviews, as column__op keys
+_SQL_FILTER_OPS = {'eq': '=', 'neq': '<>', 'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<='}
+_IDENTIFIER_RE = re.compile(r'^[a-z_][a-z0-9_]*$')
+
+def _check_identifier(name: str) -> str:
+    """Reject anything that is not a plain column name before it reaches SQL"""
+    if not _IDENTIFIER_RE.match(name):
+        raise ValueError(f"Invalid column name: {name!r}")
+    return name
+
+def _parse_review_filter(key: str, value: Any) -> Tuple[str, str, Any]:
+    """Split a column__op filter key into (column, op, value)"""
+    column, _, op = key.partition('__')
+    op = op or ('isnull' if value is None else 'eq')
+    if value is None and op == 'eq':
+        op, value = 'isnull', True
+    if op not in _SQL_FILTER_OPS and op not in ('in', 'isnull'):
+        raise ValueError(f"Unsupported filter operator: {op!r}")
+    return _check_identifier(column), op, value
+
+def _filters_to_sql(conditions: List[Tuple[str, str, Any]]) -> Tuple[List[str], List[Any]]:
+    """Translate parsed filters into SQL WHERE clauses and parameters"""
+    clauses, params = [], []
+    for column, op, value in conditions:
+        if op == 'isnull':
+            clauses.append(f"{column} IS {'' if value else 'NOT '}NULL")
+        elif op == 'in':
+            clauses.append(f"{column} = ANY(%s)")
+            params.append(list(value))
+        else:
+            clauses.append(f"{column} {_SQL_FILTER_OPS[op]} %s")
+            params.append(value)
+    return clauses, params
+
+def _parse_watermark(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Watermark row with timestamps as datetimes (the API returns ISO strings)"""
+    row = dict(row)
+    for key in ('latest_review_date', 'last_successful_run_at', 'updated_at'):
+        if isinstance(row.get(key), str):
+            row[key] = datetime.fromisoformat(row[key].replace('Z', '+00:00'))
+    return row
+
+def _copy_value(value: Any) -> str:
+    """One field in COPY text format"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    elif isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+def _copy_rows(rows: List[Dict[str, Any]], columns: List[str]) -> io.StringIO:
+    """Rows as a COPY FROM STDIN text stream (missing keys are NULL)"""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(_copy_value(row.get(column)) for column in columns))
+        buffer.write('\n')
+    buffer.seek(0)
+    return buffer
+
+def _review_key(review: Dict[str, Any]) -> Tuple[Any, Any]:
+    return review.get('platform_id'), review.get('platform_review_id')
+
+def dedupe_reviews(reviews: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Fold reviews sharing (platform_id, platform_review_id) into the last
+    occurrence (the latest fetch), in first-seen order"""
+    latest: Dict[Tuple[Any, Any], Dict[str, Any]] = {}
+    for review in reviews:
+        latest[_review_key(review)] = review
+    return list(latest.values())
+
+def _is_row_error(error: Exception) -> bool:
+    """Whether a psycopg2 / PostgREST error was caused by the rows themselves"""
+    code = getattr(error, 'pgcode', None) or getattr(error, 'code', None)
+    return isinstance(code, str) and code[:2] in ROW_ERROR_SQLSTATE_CLASSES
+
+def filter_analysis_backlog(query):
+    """Restrict a PostgREST reviews query to rows eligible for analysis now"""
+    now = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
+    return query.is_('processed_at', 'null').is_('analysis_dead_lettered_at', 'null') \
+        .or_(f'analysis_next_attempt_at.is.null,analysis_next_attempt_at.lte.{now}')
+
+def _apply_api_filters(query, conditions: List[Tuple[str, str, Any]]):
+    """Apply parsed filters to a PostgREST query builder"""
+    for column, op, value in conditions:
+        if op == 'isnull':
+            query = query.is_(column, 'null') if value else query.not_.is_(column, 'null')
+        elif op == 'in':
+            query = query.in_(column, list(value))
+        else:
+            query = getattr(query, op)(column, value)
+    return query
+
 @dataclass
 class DatabaseConfig:
     """Database configuration from environment variables"""
@@ -30,6 +206,17 @@ class DatabaseConfig:
     db_name: str
     db_user: str
     db_password: str
+    # psycopg2 pool: connections kept open, hard cap, and how long a caller
+    # waits for a free one before PoolError
+    pool_min_connections: int = 1
+    pool_max_connections: int = 10
+    pool_timeout: float = 30.0
+    connect_timeout: int = 10
+    # Connections idle longer than this are pinged before reuse (0: always)
+    health_check_interval: float = 30.0
+    # Shared HTTP session for PostgREST
+    http_max_connections: int = 20
+    http_timeout: float = 120.0
     
     @classmethod
     def from_env(cls) -> 'DatabaseConfig':
@@ -41,39 +228,181 @@ class DatabaseConfig:
             db_port=int(os.getenv('DB_PORT', 5432)),
             db_name=os.getenv('DB_NAME', ''),
             db_user=os.getenv('DB_USER', ''),
-            db_password=os.getenv('DB_PASSWORD', '')
+            db_password=os.getenv('DB_PASSWORD', ''),
+            pool_min_connections=int(os.getenv('DB_POOL_MIN_CONNECTIONS', 1)),
+            pool_max_connections=int(os.getenv('DB_POOL_MAX_CONNECTIONS', 10)),
+            pool_timeout=float(os.getenv('DB_POOL_TIMEOUT_SECONDS', 30)),
+            connect_timeout=int(os.getenv('DB_CONNECT_TIMEOUT_SECONDS', 10)),
+            health_check_interval=float(os.getenv('DB_HEALTH_CHECK_INTERVAL_SECONDS', 30)),
+            http_max_connections=int(os.getenv('SUPABASE_HTTP_MAX_CONNECTIONS', 20)),
+            http_timeout=float(os.getenv('SUPABASE_HTTP_TIMEOUT_SECONDS', 120))
         )
 
+
+class PgConnectionPool:
+    """Thread-safe pool of psycopg2 connections that callers queue for.
+    
+    Unlike psycopg2's ThreadedConnectionPool, which raises when exhausted and
+    closes every connection above minconn on return, idle connections stay
+    open (up to pool_max_connections) and a caller waits up to pool_timeout
+    for one. Connections idle longer than health_check_interval are pinged on
+    checkout, and broken ones are discarded on return, so a connection
+    dropped by the server or pooler is replaced rather than handed out.
+    """
+    
+    def __init__(self, config: DatabaseConfig):
+        self.config = config
+        self._slots = threading.BoundedSemaphore(config.pool_max_connections)
+        self._idle: List[Tuple[Any, float]] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        for _ in range(config.pool_min_connections):
+            self._idle.append((self._connect(), time.monotonic()))
+    
+    def _connect(self):
+        return psycopg2.connect(
+            host=self.config.db_host,
+            port=self.config.db_port,
+            database=self.config.db_name,
+            user=self.config.db_user,
+            password=self.config.db_password,
+            connect_timeout=self.config.connect_timeout,
+            keepalives=1,
+            keepalives_idle=60,
+            cursor_factory=RealDictCursor
+        )
+    
+    def getconn(self):
+        """Borrow a healthy connection, waiting up to pool_timeout for one to free up"""
+        if not self._slots.acquire(timeout=self.config.pool_timeout):
+            raise PoolError(f"No database connection free after {self.config.pool_timeout}s "
+                            f"(pool size {self.config.pool_max_connections})")
+        try:
+            while True:
+                with self._lock:
+                    if self._closed:
+                        raise PoolError("Connection pool is closed")
+                    conn, idle_since = self._idle.pop() if self._idle else (None, None)
+                if conn is None:
+                    return self._connect()
+                if self._is_healthy(conn, idle_since):
+                    return conn
+                logger.warning("⚠️ Discarding stale database connection")
+                conn.close()
+        except Exception:
+            self._slots.release()
+            raise
+    
+    def putconn(self, conn):
+        """Return a connection; it is closed instead if it is broken or mid-transaction"""
+        try:
+            reusable = not conn.closed and conn.info.transaction_status == TRANSACTION_STATUS_IDLE
+            with self._lock:
+                if reusable and not self._closed:
+                    self._idle.append((conn, time.monotonic()))
+                    return
+            if not conn.closed:
+                conn.close()
+        finally:
+            self._slots.release()
+    
+    def _is_healthy(self, conn, idle_since: float) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - idle_since < self.config.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+    
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+    
+    def closeall(self):
+        """Close idle connections; borrowed ones are closed when returned"""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            conn.close()
+
+
 class DatabaseManager:
     """Manages database connections and operations for the review analysis system"""
     
     def __init__(self, config: Optional[DatabaseConfig] = None):
         self.config = config or DatabaseConfig.from_env()
         self._supabase_client: Optional[Client] = None
-        self._pg_connection = None
+        self._http_client: Optional[httpx.Client] = None
+        self._pg_pool: Optional[PgConnectionPool] = None
+        self._lock = threading.Lock()
+        # Bumped by the add_* methods so cached metadata (MetadataRegistry) reloads
+        self.metadata_version = 0
+        self.maintain_trends = os.getenv('MAINTAIN_REVIEW_TRENDS', 'true').lower() == 'true'
         
     @property
     def supabase(self) -> Client:
-        """Get Supabase client (lazy initialization)"""
+        """Get Supabase client (lazy initialization, one HTTP session for all threads)"""
         if self._supabase_client is None:
-            self._supabase_client = create_client(
-                self.config.supabase_url,
-                self.config.supabase_key
-            )
+            with self._lock:
+                if self._supabase_client is None:
+                    self._supabase_client = create_client(
+                        self.config.supabase_url,
+                        self.config.supabase_key,
+                        options=self._client_options()
+                    )
         return self._supabase_client
     
+    def _client_options(self):
+        """Keep-alive httpx session reused by every PostgREST request"""
+        if SyncClientOptions is None:
+            return None
+        self._http_client = httpx.Client(
+            limits=httpx.Limits(max_connections=self.config.http_max_connections,
+                                max_keepalive_connections=self.config.http_max_connections),
+            timeout=self.config.http_timeout,
+            follow_redirects=True,
+            http2=True
+        )
+        return SyncClientOptions(httpx_client=self._http_client)
+    
+    def _get_pg_pool(self) -> PgConnectionPool:
+        if self._pg_pool is None:
+            with self._lock:
+                if self._pg_pool is None:
+                    self._pg_pool = PgConnectionPool(self.config)
+        return self._pg_pool
+    
+    @contextmanager
     def get_pg_connection(self):
-        """Get direct PostgreSQL connection for complex operations"""
-        if self._pg_connection is None or self._pg_connection.closed:
-            self._pg_connection = psycopg2.connect(
-                host=self.config.db_host,
-                port=self.config.db_port,
-                database=self.config.db_name,
-                user=self.config.db_user,
-                password=self.config.db_password,
-                cursor_factory=RealDictCursor
-            )
-        return self._pg_connection
+        """Borrow a pooled PostgreSQL connection for one transaction.
+        
+        Commits when the block exits normally and rolls back on error, then
+        returns the connection to the pool.
+        """
+        pool = self._get_pg_pool()
+        conn = pool.getconn()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            if not conn.closed:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    pass
+            raise
+        finally:
+            pool.putconn(conn)
+    
+    def has_direct_connection(self) -> bool:
+        """Whether direct PostgreSQL credentials are configured"""
+        return bool(self.config.db_host and self.config.db_password)
     
     def execute_sql(self, query: str, params: Optional[tuple] = None) -> List[Dict]:
         """Execute SQL query and return results"""
@@ -99,7 +428,9 @@ class DatabaseManager:
     
     def add_platform(self, platform_data: Dict[str, Any]) -> Dict:
         """Add a new platform"""
-        return self.supabase.table('platforms').insert(platform_data).execute().data[0]
+        row = self.supabase.table('platforms').insert(platform_data).execute().data[0]
+        self.metadata_version += 1
+        return row
     
     # Product Management
     def get_products(self, active_only: bool = True) -> List[Dict]:
@@ -111,7 +442,9 @@ class DatabaseManager:
     
     def add_product(self, product_data: Dict[str, Any]) -> Dict:
         """Add a new product"""
-        return self.supabase.table('products').insert(product_data).execute().data[0]
+        row = self.supabase.table('products').insert(product_data).execute().data[0]
+        self.metadata_version += 1
+        return row
     
     def get_product_by_name(self, name: str, company: str = None) -> Optional[Dict]:
         """Get product by name and optionally company"""
@@ -148,42 +481,156 @@ class DatabaseManager:
     
     def add_product_mapping(self, mapping_data: Dict[str, Any]) -> Dict:
         """Add product-platform mapping"""
-        return self.supabase.table('product_platform_mappings').insert(mapping_data).execute().data[0]
+        row = self.supabase.table('product_platform_mappings').insert(mapping_data).execute().data[0]
+        self.metadata_version += 1
+        return row
     
     # Review Management
     def insert_reviews(self, reviews: List[Dict[str, Any]]) -> int:
-        """Insert multiple reviews in batches to avoid timeout"""
+        """Merge reviews on (platform_id, platform_review_id); returns rows stored.
+        
+        New reviews are inserted; existing ones are only rewritten when their
+        content fingerprint (title, content, rating) changed, and are then
+        queued for re-analysis. Identical re-fetched reviews cost no write but
+        still count as stored. Uses COPY into a staging table plus one merge
+        per chunk when direct PostgreSQL credentials are configured, the
+        merge_reviews RPC otherwise.
+        
+        Duplicates within the call are folded into their latest occurrence
+        first. A chunk rejected because of its data is bisected until the bad
+        rows are isolated; those are quarantined and count as handled, so the
+        load completes in one pass. Any other error stops at that chunk and
+        returns what was stored so far.
+        
+        The count is always in terms of the reviews passed in: a folded
+        duplicate counts as stored once its latest occurrence is, so a full
+        load returns len(reviews) and a partial one returns less.
+        """
         if not reviews:
             return 0
         
-        # Insert in batches of 1000 to avoid timeout
-        batch_size = 1000
+        unique = dedupe_reviews(reviews)
+        folded = len(reviews) - len(unique)
+        occurrences = Counter(_review_key(review) for review in reviews)
+        if folded:
+            logger.info(f"🔁 Folded {folded} duplicate reviews into their latest occurrence")
+        
+        if self.has_direct_connection():
+            merge, chunk_size = self._copy_merge_reviews, REVIEW_COPY_CHUNK_SIZE
+        else:
+            merge, chunk_size = self._rpc_merge_reviews, REVIEW_API_BATCH_SIZE
+        total_chunks = (len(unique) + chunk_size - 1) // chunk_size
         total_inserted = 0
+        total_quarantined = 0
+        total_stored = 0
+        start_time = time.time()
         
         try:
-            for i in range(0, len(reviews), batch_size):
-                batch = reviews[i:i + batch_size]
-                
-                # Log progress
-                logger.info(f"Inserting batch {i//batch_size + 1}/{(len(reviews) + batch_size - 1)//batch_size} ({len(batch)} reviews)")
-                
-                result = self.supabase.table('reviews').upsert(
-                    batch,
-                    on_conflict='platform_id,platform_review_id'
-                ).execute()
-                
-                total_inserted += len(result.data)
-                
-                # Small delay between batches
-                import time
-                time.sleep(0.5)
-            
-            logger.info(f"Successfully inserted {total_inserted} reviews in {(len(reviews) + batch_size - 1)//batch_size} batches")
-            return total_inserted
-            
+            for i in range(0, len(unique), chunk_size):
+                chunk = unique[i:i + chunk_size]
+                started = time.perf_counter()
+                written, quarantined = self._merge_or_quarantine(chunk, merge)
+                total_inserted += len(chunk)
+                total_stored += sum(occurrences[_review_key(row)] for row in chunk)
+                total_quarantined += quarantined
+                logger.info(f"⏱️ Chunk {i//chunk_size + 1}/{total_chunks}: {len(chunk)} reviews merged in "
+                            f"{time.perf_counter() - started:.2f}s")
+                self.update_trends_for_reviews([row['review_id'] for row in written])
+                self._log_merge(len(chunk) - quarantined, written)
         except Exception as e:
             logger.error(f"Error inserting reviews: {e}")
-            return total_inserted  # Return what we managed to insert
+            return total_stored  # Return what we managed to insert
+        
+        logger.info(f"Successfully inserted {total_inserted - total_quarantined} reviews in {total_chunks} chunks "
+                    f"({time.time() - start_time:.1f}s)" +
+                    (f", {total_quarantined} quarantined" if total_quarantined else ""))
+        return total_stored
+    
+    def _merge_or_quarantine(self, rows: List[Dict[str, Any]], merge) -> Tuple[List[Dict], int]:
+        """Merge rows, bisecting on row-level errors until the offending rows are
+        isolated and quarantined. Returns (merge results, rows quarantined)."""
+        try:
+            return merge(rows), 0
+        except Exception as e:
+            if not _is_row_error(e):
+                raise
+            if len(rows) == 1:
+                self.quarantine_reviews(rows, str(e))
+                return [], 1
+        
+        middle = len(rows) // 2
+        left, left_quarantined = self._merge_or_quarantine(rows[:middle], merge)
+        right, right_quarantined = self._merge_or_quarantine(rows[middle:], merge)
+        return left + right, left_quarantined + right_quarantined
+    
+    def _rpc_merge_reviews(self, rows: List[Dict[str, Any]]) -> List[Dict]:
+        """Merge one batch through the merge_reviews RPC; returns inserted or changed rows"""
+        return self.supabase.rpc('merge_reviews', {'p_reviews': rows}).execute().data or []
+    
+    def _copy_merge_reviews(self, rows: List[Dict[str, Any]]) -> List[Dict]:
+        """COPY one chunk into a transaction-scoped staging table and merge it into
+        reviews in a single statement. Returns the inserted or changed rows as
+        review_id/inserted dicts."""
+        columns = list(dict.fromkeys(_check_identifier(key) for row in rows for key in row))
+        assignments = [f'{c} = EXCLUDED.{c}' for c in columns if c not in ('platform_id', 'platform_review_id')]
+        assignments += [REANALYZE_ASSIGNMENTS, 'updated_at = NOW()']
+        column_list = ', '.join(columns)
+        
+        with self.get_pg_connection() as conn:
+            with conn.cursor() as cursor:
+                started = time.perf_counter()
+                # Same column types as reviews, none of its constraints or defaults
+                cursor.execute(f"CREATE TEMP TABLE reviews_staging ON COMMIT DROP AS "
+                               f"SELECT {column_list} FROM reviews WITH NO DATA")
+                cursor.copy_expert(f"COPY reviews_staging ({column_list}) FROM STDIN", _copy_rows(rows, columns))
+                copied = time.perf_counter()
+                
+                cursor.execute(f"""
+                    INSERT INTO reviews ({column_list})
+                    SELECT {column_list} FROM reviews_staging
+                    ON CONFLICT (platform_id, platform_review_id) DO UPDATE SET {', '.join(assignments)}
+                    WHERE reviews.content_fingerprint IS DISTINCT FROM
+                        review_fingerprint(EXCLUDED.title, EXCLUDED.content, EXCLUDED.rating)
+                    RETURNING id AS review_id, xmax = 0 AS inserted
+                """)
+                written = cursor.fetchall()
+        
+        logger.debug(f"{len(rows)} reviews copied in {copied - started:.2f}s, "
+                     f"merged in {time.perf_counter() - copied:.2f}s")
+        return written
+    
+    def quarantine_reviews(self, reviews: List[Dict[str, Any]], error: str) -> int:
+        """Park reviews the database rejected in review_quarantine, with the error"""
+        records = []
+        for review in reviews:
+            product_id, platform_id = review.get('product_id'), review.get('platform_id')
+            records.append({
+                'product_id': product_id if isinstance(product_id, int) else None,
+                'platform_id': platform_id if isinstance(platform_id, int) else None,
+                'platform_review_id': str(review.get('platform_review_id')),
+                'payload': json.loads(json.dumps(review, default=str)),
+                'error': error[:2000]
+            })
+        
+        if self.has_direct_connection():
+            with self.get_pg_connection() as conn:
+                with conn.cursor() as cursor:
+                    execute_values(cursor, """
+                        INSERT INTO review_quarantine (product_id, platform_id, platform_review_id, payload, error)
+                        VALUES %s
+                    """, [(r['product_id'], r['platform_id'], r['platform_review_id'], Json(r['payload']), r['error'])
+                          for r in records])
+        else:
+            self.supabase.table('review_quarantine').insert(records).execute()
+        
+        logger.warning(f"🚫 Quarantined {len(records)} reviews: {error.strip().splitlines()[0] if error.strip() else error}")
+        return len(records)
+    
+    def _log_merge(self, total: int, written: List[Dict]):
+        inserted = sum(1 for row in written if row['inserted'])
+        changed = len(written) - inserted
+        logger.info(f"🧬 {inserted} new, {changed} changed (queued for re-analysis), "
+                    f"{total - len(written)} unchanged reviews")
     
     def get_reviews(self, product_id: int = None, platform_id: int = None, 
                    limit: int = 1000, offset: int = 0) -> List[Dict]:
@@ -197,16 +644,256 @@ class DatabaseManager:
         
         return result.order('review_date', desc=True).limit(limit).offset(offset).execute().data
     
+    def get_platform_review_ids(self, product_id: int, platform_id: int) -> List[str]:
+        """All stored platform_review_ids for one product on one platform"""
+        if self.has_direct_connection():
+            rows = self.execute_sql(
+                "SELECT platform_review_id FROM reviews WHERE product_id = %s AND platform_id = %s",
+                (product_id, platform_id)
+            )
+        else:
+            rows = self.iter_reviews({'product_id': product_id, 'platform_id': platform_id},
+                                     columns=['platform_review_id'])
+        return [row['platform_review_id'] for row in rows]
+    
     def get_unprocessed_reviews(self, limit: int = 100) -> List[Dict]:
-        """Get reviews that haven't been processed by AI yet"""
-        result = self.supabase.table('reviews').select('*').is_('processed_at', 'null')
+        """Get reviews that haven't been processed by AI yet.
+        
+        Reviews backing off after a failed analysis, or dead-lettered, are
+        skipped so they cannot fill every batch. This only reads the backlog;
+        workers that analyze what they get use claim_analysis_batch instead.
+        """
+        result = filter_analysis_backlog(self.supabase.table('reviews').select('*'))
         return result.limit(limit).execute().data
     
+    def count_analysis_backlog(self) -> int:
+        """Reviews get_unprocessed_reviews would return right now"""
+        if self.has_direct_connection():
+            return self.execute_sql(f"SELECT COUNT(*) AS total FROM reviews WHERE {ANALYSIS_BACKLOG_SQL}")[0]['total']
+        query = self.supabase.table('reviews').select('id', count='exact', head=True)
+        return filter_analysis_backlog(query).execute().count or 0
+
+    def iter_reviews(self, filters: Optional[Dict[str, Any]] = None, columns: Optional[List[str]] = None,
+                     page_size: int = 1000, as_dataframe: bool = False,
+                     limit: Optional[int] = None) -> Iterator[Any]:
+        """Stream reviews newest first with bounded memory.
+
+        Pages on a (review_date, id) keyset cursor, so every page is an index
+        range scan no matter how deep the iteration goes, and rows updated
+        while iterating are neither skipped nor repeated. Filters are
+        {column: value} or {column__op: value} with op in eq, neq, gt, gte,
+        lt, lte, in, isnull. Only the requested columns are fetched; id and
+        review_date are always included. Yields dict rows, or one DataFrame
+        per page when as_dataframe is set.
+        """
+        columns = list(dict.fromkeys(['id', 'review_date'] + list(columns or ['*'])))
+        conditions = [_parse_review_filter(key, value) for key, value in (filters or {}).items()]
+        for column in columns:
+            if column != '*':
+                _check_identifier(column)
+
+        fetch_page = self._fetch_reviews_page_pg if self.has_direct_connection() else self._fetch_reviews_page_api
+        cursor = None
+        remaining = limit
+
+        while remaining is None or remaining > 0:
+            size = page_size if remaining is None else min(page_size, remaining)
+            rows = fetch_page(conditions, columns, cursor, size)
+            if not rows:
+                break
+
+            if as_dataframe:
+                yield pd.DataFrame(rows)
+            else:
+                yield from rows
+
+            if len(rows) < size:
+                break
+            if remaining is not None:
+                remaining -= len(rows)
+            cursor = (rows[-1]['review_date'], rows[-1]['id'])
+
+    def _fetch_reviews_page_pg(self, conditions: List[Tuple[str, str, Any]], columns: List[str],
+                               cursor: Optional[Tuple[Any, int]], size: int) -> List[Dict]:
+        clauses, params = _filters_to_sql(conditions)
+        if cursor is not None:
+            clauses.append("(review_date, id) < (%s, %s)")
+            params.extend(cursor)
+
+        query = f"SELECT {', '.join(columns)} FROM reviews"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY review_date DESC, id DESC LIMIT %s"
+        params.append(size)
+
+        return self.execute_sql(query, tuple(params))
+
+    def _fetch_reviews_page_api(self, conditions: List[Tuple[str, str, Any]], columns: List[str],
+                                cursor: Optional[Tuple[Any, int]], size: int) -> List[Dict]:
+        query = _apply_api_filters(self.supabase.table('reviews').select(','.join(columns)), conditions)
+        if cursor is not None:
+            review_date, review_id = cursor
+            query = query.or_(
+                f'review_date.lt."{review_date}",and(review_date.eq."{review_date}",id.lt.{review_id})'
+            )
+
+        return query.order('review_date', desc=True).order('id', desc=True).limit(size).execute().data
+
     def mark_review_processed(self, review_id: int, processing_data: Dict[str, Any]):
         """Mark a review as processed with AI analysis results"""
         processing_data['processed_at'] = datetime.utcnow().isoformat()
         return self.supabase.table('reviews').update(processing_data).eq('id', review_id).execute()
     
+    def apply_review_results(self, results: List[ReviewResult]) -> int:
+        """Write a batch of AI results to reviews and review_analysis in one round-trip.
+        
+        Columns missing from an update keep their current value. Uses a single
+        multi-row UPDATE ... FROM (VALUES ...) over the direct connection when
+        credentials are available, otherwise the apply_review_results RPC.
+        """
+        if not results:
+            return 0
+        
+        processed_at = datetime.utcnow().isoformat()
+        for _, updates, _ in results:
+            updates.setdefault('processed_at', processed_at)
+        
+        if self.has_direct_connection():
+            return self._apply_review_results_pg(results)
+        
+        payload = [
+            {'id': review_id, **updates, 'analysis': analysis}
+            for review_id, updates, analysis in results
+        ]
+        response = self.supabase.rpc('apply_review_results', {'results': payload}).execute()
+        return response.data if isinstance(response.data, int) else len(results)
+    
+    def _apply_review_results_pg(self, results: List[ReviewResult]) -> int:
+        """Direct-connection implementation of apply_review_results"""
+        def to_db(value, sql_type):
+            return Json(value) if sql_type == 'JSONB' and value is not None else value
+        
+        review_columns = list(REVIEW_RESULT_COLUMNS)
+        review_rows = [
+            (review_id, *[to_db(updates.get(c), REVIEW_RESULT_COLUMNS[c]) for c in review_columns])
+            for review_id, updates, _ in results
+        ]
+        review_template = '(%s::INTEGER, ' + ', '.join(f'%s::{REVIEW_RESULT_COLUMNS[c]}' for c in review_columns) + ')'
+        
+        analysis_columns = list(ANALYSIS_RECORD_COLUMNS)
+        analysis_rows = [
+            (review_id, *[to_db(analysis.get(c), ANALYSIS_RECORD_COLUMNS[c]) for c in analysis_columns])
+            for review_id, _, analysis in results if analysis
+        ]
+        analysis_template = '(%s::INTEGER, ' + ', '.join(f'%s::{ANALYSIS_RECORD_COLUMNS[c]}' for c in analysis_columns) + ')'
+        
+        with self.get_pg_connection() as conn:
+            with conn.cursor() as cursor:
+                execute_values(cursor, f"""
+                    UPDATE reviews r SET
+                        {', '.join(f'{c} = COALESCE(t.{c}, r.{c})' for c in review_columns)},
+                        updated_at = NOW()
+                    FROM (VALUES %s) AS t(id, {', '.join(review_columns)})
+                    WHERE r.id = t.id
+                """, review_rows, template=review_template, page_size=len(review_rows))
+                updated = cursor.rowcount
+                
+                if analysis_rows:
+                    execute_values(cursor, f"""
+                        INSERT INTO review_analysis (review_id, {', '.join(analysis_columns)})
+                        VALUES %s
+                        ON CONFLICT (review_id) DO UPDATE SET
+                            {', '.join(f'{c} = EXCLUDED.{c}' for c in analysis_columns)},
+                            updated_at = NOW()
+                    """, analysis_rows, template=analysis_template, page_size=len(analysis_rows))
+        
+        return updated
+    
+    def record_analysis_failures(self, failures: List[Tuple[int, str]]) -> Dict[str, int]:
+        """Count a failed analysis attempt against each (review_id, error).
+        
+        Each review's next attempt is pushed back exponentially (from
+        ANALYSIS_RETRY_BASE_SECONDS up to ANALYSIS_RETRY_MAX_SECONDS); after
+        ANALYSIS_MAX_ATTEMPTS it is dead-lettered until requeued.
+        """
+        if not failures:
+            return {'recorded': 0, 'dead_lettered': 0}
+        
+        payload = [{'id': review_id, 'error': str(error)} for review_id, error in failures]
+        params = (ANALYSIS_MAX_ATTEMPTS, ANALYSIS_RETRY_BASE_SECONDS, ANALYSIS_RETRY_MAX_SECONDS)
+        if self.has_direct_connection():
+            rows = self.execute_sql("SELECT * FROM record_analysis_failures(%s::JSONB, %s, %s, %s)",
+                                    (Json(payload), *params))
+        else:
+            rows = self.supabase.rpc('record_analysis_failures', {
+                'failures': payload,
+                'max_attempts': params[0],
+                'base_delay_seconds': params[1],
+                'max_delay_seconds': params[2]
+            }).execute().data or []
+        
+        dead_lettered = sum(1 for row in rows if row['dead_lettered'])
+        if dead_lettered:
+            logger.warning(f"☠️ {dead_lettered} reviews dead-lettered after {ANALYSIS_MAX_ATTEMPTS} failed analyses")
+        return {'recorded': len(rows), 'dead_lettered': dead_lettered}
+    
+    def requeue_dead_lettered_reviews(self, review_ids: Optional[List[int]] = None) -> int:
+        """Return dead-lettered reviews (all, or the given ids) to the analysis backlog"""
+        if self.has_direct_connection():
+            return self.execute_sql("SELECT requeue_dead_lettered_reviews(%s) AS requeued", (review_ids,))[0]['requeued']
+        return self.supabase.rpc('requeue_dead_lettered_reviews', {'p_review_ids': review_ids}).execute().data
+
+    def claim_analysis_batch(self, worker_id: str, limit: int, lease_seconds: Optional[int] = None,
+                             product_ids: Optional[List[int]] = None, year: Optional[int] = None) -> List[Dict]:
+        """Lease up to `limit` backlog reviews to a worker (FOR UPDATE SKIP LOCKED).
+
+        Concurrent claims never return the same review; a claimed review stays
+        out of every other worker's claims until its lease expires or is
+        released. Optionally restricted to some products and one review year.
+        """
+        lease_seconds = lease_seconds or ANALYSIS_LEASE_SECONDS
+        if self.has_direct_connection():
+            return self.execute_sql("SELECT * FROM claim_analysis_batch(%s, %s, %s, %s, %s)",
+                                    (worker_id, limit, lease_seconds, product_ids, year))
+        return self.supabase.rpc('claim_analysis_batch', {
+            'p_worker': worker_id,
+            'p_limit': limit,
+            'p_lease_seconds': lease_seconds,
+            'p_product_ids': product_ids,
+            'p_year': year
+        }).execute().data or []
+
+    def renew_analysis_leases(self, worker_id: str, review_ids: List[int],
+                              lease_seconds: Optional[int] = None) -> List[int]:
+        """Extend a worker's leases; returns the ids it still holds"""
+        if not review_ids:
+            return []
+        lease_seconds = lease_seconds or ANALYSIS_LEASE_SECONDS
+        if self.has_direct_connection():
+            rows = self.execute_sql("SELECT * FROM renew_analysis_leases(%s, %s, %s)",
+                                    (worker_id, list(review_ids), lease_seconds))
+        else:
+            rows = self.supabase.rpc('renew_analysis_leases', {
+                'p_worker': worker_id,
+                'p_review_ids': list(review_ids),
+                'p_lease_seconds': lease_seconds
+            }).execute().data or []
+        return [row['review_id'] for row in rows]
+
+    def release_analysis_leases(self, worker_id: str, review_ids: Optional[List[int]] = None) -> int:
+        """Give up a worker's leases (all, or the given ids); returns leases released"""
+        if review_ids is not None:
+            review_ids = list(review_ids)
+            if not review_ids:
+                return 0
+        if self.has_direct_connection():
+            return self.execute_sql("SELECT release_analysis_leases(%s, %s) AS released",
+                                    (worker_id, review_ids))[0]['released']
+        return self.supabase.rpc('release_analysis_leases', {
+            'p_worker': worker_id,
+            'p_review_ids': review_ids
+        }).execute().data
+
     # Collection Jobs Management
     def create_collection_job(self, job_data: Dict[str, Any]) -> Dict:
         """Create a new collection job"""
@@ -217,84 +904,323 @@ class DatabaseManager:
         updates['updated_at'] = datetime.utcnow().isoformat()
         return self.supabase.table('collection_jobs').update(updates).eq('id', job_id).execute().data[0]
     
+    def get_collection_job(self, job_id: int) -> Optional[Dict]:
+        """Get a collection job by ID"""
+        result = self.supabase.table('collection_jobs').select('*').eq('id', job_id).execute()
+        return result.data[0] if result.data else None
+    
     def get_pending_jobs(self) -> List[Dict]:
         """Get pending collection jobs"""
         return self.supabase.table('collection_jobs').select('*').eq('status', 'pending').execute().data
     
+    # Collection Watermarks
+    def get_collection_watermark(self, product_id: int, platform_id: int) -> Optional[Dict]:
+        """High-water mark for one product/platform, or None if nothing was ever collected"""
+        result = self.supabase.table('collection_watermarks').select('*') \
+            .eq('product_id', product_id).eq('platform_id', platform_id).execute()
+        return _parse_watermark(result.data[0]) if result.data else None
+    
+    def get_collection_watermarks(self) -> Dict[Tuple[int, int], Dict]:
+        """Watermarks for every active product-platform mapping in one round-trip.
+        
+        Keyed by (product_id, platform_id); mappings never collected have
+        total_reviews 0 and no dates.
+        """
+        if self.has_direct_connection():
+            rows = self.execute_sql("SELECT * FROM active_collection_watermarks()")
+        else:
+            rows = self.supabase.rpc('active_collection_watermarks', {}).execute().data or []
+        return {(row['product_id'], row['platform_id']): _parse_watermark(row) for row in rows}
+    
+    def rebuild_collection_watermarks(self) -> int:
+        """Recompute all watermarks from the reviews table (after deletes or bulk repairs)"""
+        if self.has_direct_connection():
+            return self.execute_sql("SELECT rebuild_collection_watermarks() AS rebuilt")[0]['rebuilt']
+        return self.supabase.rpc('rebuild_collection_watermarks', {}).execute().data
+    
     # Analytics and Reporting
+    def count_reviews(self, filters: Optional[Dict[str, Any]] = None) -> int:
+        """Exact review count computed by Postgres; filters as in iter_reviews"""
+        conditions = [_parse_review_filter(key, value) for key, value in (filters or {}).items()]
+
+        if self.has_direct_connection():
+            clauses, params = _filters_to_sql(conditions)
+            query = "SELECT COUNT(*) AS total FROM reviews"
+            if clauses:
+                query += " WHERE " + " AND ".join(clauses)
+            return self.execute_sql(query, tuple(params))[0]['total']
+
+        query = self.supabase.table('reviews').select('id', count='exact', head=True)
+        return _apply_api_filters(query, conditions).execute().count or 0
+
+    def get_review_aggregates(self, group_by: Optional[List[str]] = None,
+                              product_ids: Optional[List[int]] = None,
+                              platform_ids: Optional[List[int]] = None,
+                              unprocessed_only: bool = False) -> List[Dict[str, Any]]:
+        """Review counts and date ranges grouped by any of product_id, platform_id, year.
+
+        Postgres groups by (product_id, platform_id, year) in one query via the
+        review_aggregates function; that result is a few hundred rows at most
+        and is rolled up here to the requested grouping. Each row has the group
+        keys plus review_count, processed_count, first_review_date and
+        last_review_date (ISO strings). With no group_by a single total row is
+        returned.
+        """
+        group_by = list(group_by or [])
+        for key in group_by:
+            if key not in AGGREGATE_GROUP_KEYS:
+                raise ValueError(f"Unsupported aggregate grouping: {key!r}")
+
+        params = {
+            'p_product_ids': list(product_ids) if product_ids else None,
+            'p_platform_ids': list(platform_ids) if platform_ids else None,
+            'p_unprocessed_only': unprocessed_only
+        }
+        if self.has_direct_connection():
+            rows = self.execute_sql(
+                "SELECT * FROM review_aggregates(%s::INTEGER[], %s::INTEGER[], %s)",
+                tuple(params.values())
+            )
+        else:
+            rows = self.supabase.rpc('review_aggregates', params).execute().data or []
+
+        groups: Dict[tuple, Dict[str, Any]] = {}
+        for row in rows:
+            first, last = row['first_review_date'], row['last_review_date']
+            if isinstance(first, datetime):
+                first, last = first.isoformat(), last.isoformat()
+
+            key = tuple(row[k] for k in group_by)
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = dict(zip(group_by, key), review_count=0, processed_count=0,
+                                           first_review_date=first, last_review_date=last)
+            group['review_count'] += row['review_count']
+            group['processed_count'] += row['processed_count']
+            group['first_review_date'] = min(group['first_review_date'], first)
+            group['last_review_date'] = max(group['last_review_date'], last)
+
+        if not group_by and not groups:
+            return [{'review_count': 0, 'processed_count': 0,
+                     'first_review_date': None, 'last_review_date': None}]
+        return [groups[key] for key in sorted(groups, key=lambda k: [(v is None, v or 0) for v in k])]
+
     def get_review_stats(self, product_id: int = None, platform_id: int = None, 
                         days: int = 30) -> Dict[str, Any]:
-        """Get review statistics for the specified period"""
-        query = """
-        SELECT 
-            COUNT(*) as total_reviews,
-            AVG(rating) as avg_rating,
-            COUNT(CASE WHEN sentiment_label = 'positive' THEN 1 END) as positive_reviews,
-            COUNT(CASE WHEN sentiment_label = 'negative' THEN 1 END) as negative_reviews,
-            COUNT(CASE WHEN sentiment_label = 'neutral' THEN 1 END) as neutral_reviews,
-            AVG(sentiment_score) as avg_sentiment,
-            COUNT(CASE WHEN rating = 5 THEN 1 END) as five_star,
-            COUNT(CASE WHEN rating = 4 THEN 1 END) as four_star,
-            COUNT(CASE WHEN rating = 3 THEN 1 END) as three_star,
-            COUNT(CASE WHEN rating = 2 THEN 1 END) as two_star,
-            COUNT(CASE WHEN rating = 1 THEN 1 END) as one_star
-        FROM reviews 
-        WHERE review_date >= NOW() - INTERVAL '%s days'
+        """Review statistics for the last `days` whole UTC days, summed from
+        the daily review_trends buckets instead of scanning reviews.
+        
+        Average rating is weighted by each bucket's review count; average
+        sentiment by its sentiment-labelled (analyzed) reviews, the rows the
+        bucket average was taken over.
         """
-        params = [days]
+        buckets = self.get_review_trends(product_id, platform_id, 'daily',
+                                         since=datetime.utcnow() - timedelta(days=days))
         
-        if product_id:
-            query += " AND product_id = %s"
-            params.append(product_id)
+        stars = {'5': 'five_star', '4': 'four_star', '3': 'three_star', '2': 'two_star', '1': 'one_star'}
+        stats = {'total_reviews': 0, 'avg_rating': None, 'positive_reviews': 0, 'negative_reviews': 0,
+                 'neutral_reviews': 0, 'avg_sentiment': None, **{name: 0 for name in stars.values()}}
+        rating_sum = sentiment_sum = sentiment_weight = 0.0
         
-        if platform_id:
-            query += " AND platform_id = %s"
-            params.append(platform_id)
+        for bucket in buckets:
+            count = bucket.get('total_reviews') or 0
+            labelled = sum(bucket.get(key) or 0 for key in ('positive_reviews', 'negative_reviews', 'neutral_reviews'))
+            stats['total_reviews'] += count
+            for key in ('positive_reviews', 'negative_reviews', 'neutral_reviews'):
+                stats[key] += bucket.get(key) or 0
+            for star, name in stars.items():
+                stats[name] += int((bucket.get('rating_distribution') or {}).get(star, 0))
+            if bucket.get('average_rating') is not None:
+                rating_sum += float(bucket['average_rating']) * count
+            if bucket.get('average_sentiment') is not None and labelled:
+                sentiment_sum += float(bucket['average_sentiment']) * labelled
+                sentiment_weight += labelled
         
-        result = self.execute_sql(query, tuple(params))
-        return result[0] if result else {}
+        if stats['total_reviews']:
+            stats['avg_rating'] = rating_sum / stats['total_reviews']
+        if sentiment_weight:
+            stats['avg_sentiment'] = sentiment_sum / sentiment_weight
+        return stats
     
-    def get_trending_topics(self, product_id: int = None, days: int = 7, limit: int = 10) -> List[Dict]:
-        """Get trending topics from recent reviews"""
-        query = """
-        SELECT 
-            topic,
-            COUNT(*) as mention_count,
-            AVG(sentiment_score) as avg_sentiment
-        FROM (
-            SELECT 
-                jsonb_array_elements_text(key_topics) as topic,
-                sentiment_score
-            FROM reviews 
-            WHERE review_date >= NOW() - INTERVAL '%s days'
-            AND key_topics IS NOT NULL
+    def refresh_review_trends(self, review_ids: Optional[List[int]] = None,
+                              since: Optional[datetime] = None, until: Optional[datetime] = None) -> int:
+        """Rebuild the review_trends buckets touched by the given reviews, or by
+        every review dated in [since, until) when no ids are given. Returns the
+        number of (product, platform, period) buckets written."""
+        params = {
+            'p_review_ids': list(review_ids) if review_ids is not None else None,
+            'p_since': since.isoformat() if since else None,
+            'p_until': until.isoformat() if until else None
+        }
+        if self.has_direct_connection():
+            return self.execute_sql(
+                "SELECT refresh_review_trends(%s::INTEGER[], %s::TIMESTAMPTZ, %s::TIMESTAMPTZ) AS refreshed",
+                tuple(params.values())
+            )[0]['refreshed']
+        return self.supabase.rpc('refresh_review_trends', params).execute().data or 0
+    
+    def update_trends_for_reviews(self, review_ids: List[int]) -> int:
+        """Incrementally maintain review_trends after reviews were written.
+        
+        Trend maintenance never fails the write that triggered it; a skipped
+        refresh is repaired by the next write to the bucket or a backfill.
         """
-        params = [days]
+        if not review_ids or not self.maintain_trends:
+            return 0
+        try:
+            return self.refresh_review_trends(review_ids)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not refresh review trends for {len(review_ids)} reviews: {e}")
+            return 0
+    
+    def get_review_trends(self, product_id: int = None, platform_id: int = None,
+                          period_type: str = 'monthly', since: Optional[datetime] = None) -> List[Dict]:
+        """Pre-aggregated review_trends rows, oldest period first"""
+        if self.has_direct_connection():
+            query = "SELECT * FROM review_trends WHERE period_type = %s"
+            params: List[Any] = [period_type]
+            if product_id:
+                query += " AND product_id = %s"
+                params.append(product_id)
+            if platform_id:
+                query += " AND platform_id = %s"
+                params.append(platform_id)
+            if since:
+                query += " AND period_start >= %s"
+                params.append(since.date())
+            return self.execute_sql(query + " ORDER BY period_start, product_id, platform_id", tuple(params))
         
+        result = self.supabase.table('review_trends').select('*').eq('period_type', period_type)
         if product_id:
-            query += " AND product_id = %s"
-            params.append(product_id)
+            result = result.eq('product_id', product_id)
+        if platform_id:
+            result = result.eq('platform_id', platform_id)
+        if since:
+            result = result.gte('period_start', since.date().isoformat())
+        return result.order('period_start', desc=False).execute().data
+    
+    def get_trending_topics(self, product_id: int = None, days: int = 7, limit: int = 10) -> List[Dict]:
+        """Most mentioned topics over the last `days` whole UTC days, summed from
+        the daily review_trends buckets (each keeps its top 25 topics, so
+        counts of rarely mentioned topics are a lower bound)"""
+        buckets = self.get_review_trends(product_id, period_type='daily',
+                                         since=datetime.utcnow() - timedelta(days=days))
+        mentions: Counter = Counter()
+        for bucket in buckets:
+            mentions.update({topic: int(count) for topic, count in (bucket.get('trending_topics') or {}).items()})
+        return [{'topic': topic, 'mention_count': count} for topic, count in mentions.most_common(limit)]
+    
+    def health_check(self) -> Dict[str, bool]:
+        """Round-trip the REST API (and the direct connection, when configured)"""
+        status = {}
+        try:
+            self.supabase.table('platforms').select('id').limit(1).execute()
+            status['rest'] = True
+        except Exception as e:
+            logger.error(f"❌ Supabase REST health check failed: {e}")
+            status['rest'] = False
+        if self.has_direct_connection():
+            try:
+                status['postgres'] = self.execute_sql("SELECT 1 AS ok")[0]['ok'] == 1
+            except Exception as e:
+                logger.error(f"❌ PostgreSQL health check failed: {e}")
+                status['postgres'] = False
+        return status
+    
+    def close(self):
+        """Close pooled connections and the HTTP session (they reopen on next use)"""
+        with self._lock:
+            if self._pg_pool is not None:
+                self._pg_pool.closeall()
+                self._pg_pool = None
+            if self._http_client is not None:
+                self._http_client.close()
+                self._http_client = None
+                self._supabase_client = None
+
+
+class BulkResultWriter:
+    """Buffers AI results and flushes them with apply_review_results.
+    
+    Flushes when flush_size results are pending or flush_interval seconds have
+    passed since the last flush, whichever comes first. Safe to share between
+    threads. Use as a context manager (or call close()) to flush the tail.
+    """
+    
+    def __init__(self, db_manager: DatabaseManager, flush_size: int = 500, flush_interval: float = 5.0):
+        self.db_manager = db_manager
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._pending: List[ReviewResult] = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self.written = 0
+        self.failed = 0
+    
+    def add(self, review_id: int, review_updates: Dict[str, Any],
+            analysis_record: Optional[Dict[str, Any]] = None) -> int:
+        """Queue one result; returns the number of rows written if this triggered a flush"""
+        return self.add_many([(review_id, review_updates, analysis_record)])
+    
+    def add_many(self, results: List[ReviewResult]) -> int:
+        """Queue several results; returns the number of rows written if this triggered a flush"""
+        with self._lock:
+            self._pending.extend(results)
+            due = (len(self._pending) >= self.flush_size or
+                   time.monotonic() - self._last_flush >= self.flush_interval)
+        return self.flush() if due else 0
+    
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+    
+    def flush(self) -> int:
+        """Write everything pending; returns the number of rows written"""
+        with self._lock:
+            batch, self._pending = self._pending, []
+            self._last_flush = time.monotonic()
         
-        query += """
-        ) topics
-        GROUP BY topic
-        ORDER BY mention_count DESC
-        LIMIT %s
-        """
-        params.append(limit)
+        written = 0
+        for i in range(0, len(batch), self.flush_size):
+            chunk = batch[i:i + self.flush_size]
+            try:
+                written += self.db_manager.apply_review_results(chunk)
+                self.db_manager.update_trends_for_reviews([review_id for review_id, _, _ in chunk])
+            except Exception as e:
+                # Rows stay unprocessed and will be picked up by the next run
+                logger.error(f"❌ Bulk write of {len(chunk)} results failed: {e}")
+                self.failed += len(chunk)
         
-        return self.execute_sql(query, tuple(params))
+        if batch:
+            logger.info(f"💾 Flushed {written}/{len(batch)} analysis results")
+        self.written += written
+        return written
     
-    def close(self):
-        """Close database connections"""
-        if self._pg_connection and not self._pg_connection.closed:
-            self._pg_connection.close()
+    def close(self) -> int:
+        return self.flush()
+    
+    def __enter__(self) -> 'BulkResultWriter':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
 
 # Convenience functions for common operations
+_db_manager: Optional[DatabaseManager] = None
+_db_manager_pid: Optional[int] = None
+_db_manager_lock = threading.Lock()
+
+
 def get_db_manager() -> DatabaseManager:
-    """Get a database manager instance"""
-    return DatabaseManager()
+    """Process-wide database manager, so every collector and analyzer shares
+    one connection pool and HTTP session (a forked child gets its own)"""
+    global _db_manager, _db_manager_pid
+    with _db_manager_lock:
+        if _db_manager is None or _db_manager_pid != os.getpid():
+            _db_manager = DatabaseManager()
+            _db_manager_pid = os.getpid()
+        return _db_manager
 
 def setup_initial_data(db_manager: DatabaseManager):
     """Set up initial platforms and products data"""
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Product / Platform Metadata Registry
+Process-wide, in-memory copy of the platforms, products and product-platform
+mappings tables with O(1) lookups, so collectors and analyzers stop
+re-fetching whole tables for every job, review or insert
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Callable
+
+# Local imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.manager import DatabaseManager, get_db_manager
+
+logger = logging.getLogger(__name__)
+
+# Snapshots older than this are reloaded on next use
+METADATA_CACHE_TTL_SECONDS = float(os.getenv('METADATA_CACHE_TTL_SECONDS', 300))
+
+# Scraper keys -> database platform names
+PLATFORM_KEYS = {
+    'google': 'google_play',
+    'apple': 'apple_store',
+    'amazon': 'amazon'
+}
+
+# Company names as users type them -> substrings of products.company
+COMPANY_ALIASES = {
+    'Norton': ['Norton', 'NorTech', 'Broadcom'],
+    'Bitdefender': ['Bitdefender'],
+    'McAfee': ['McAfee', 'Intel Security'],
+    'Kaspersky': ['Kaspersky'],
+    'AVG': ['AVG', 'AVG Technologies'],
+    'Avast': ['Avast'],
+    'ESET': ['ESET'],
+    'Trend Micro': ['Trend Micro'],
+    'Malwarebytes': ['Malwarebytes']
+}
+
+
+class _Snapshot:
+    """One loaded table plus its lookup indexes"""
+
+    def __init__(self, rows: List[Dict[str, Any]], indexes: Dict[str, Dict]):
+        self.rows = rows
+        self.indexes = indexes
+        self.loaded_at = time.monotonic()
+
+
+class MetadataRegistry:
+    """Cached platforms, products and mappings with dictionary lookups.
+
+    Each table is loaded on first use and reloaded once it is older than
+    ttl_seconds, after invalidate(), or when the database manager's
+    metadata_version changes (its add_* methods bump it). Lookups return the
+    cached row dicts; treat them as read-only. Safe to share between threads.
+    """
+
+    def __init__(self, db_manager: Optional[DatabaseManager] = None, ttl_seconds: Optional[float] = None):
+        self.db_manager = db_manager or get_db_manager()
+        self.ttl_seconds = METADATA_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self._snapshots: Dict[str, _Snapshot] = {}
+        self._version = self.db_manager.metadata_version
+        self._company_ids: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+        self._loaders: Dict[str, Callable[[], _Snapshot]] = {
+            'platforms': self._load_platforms,
+            'products': self._load_products,
+            'mappings': self._load_mappings
+        }
+
+    def invalidate(self, table: Optional[str] = None):
+        """Drop one cached table (or all); it is reloaded on next use"""
+        with self._lock:
+            for name in ([table] if table else list(self._snapshots)):
+                self._snapshots.pop(name, None)
+            self._company_ids = {}
+
+    def _snapshot(self, table: str) -> _Snapshot:
+        with self._lock:
+            if self._version != self.db_manager.metadata_version:
+                self._version = self.db_manager.metadata_version
+                self._snapshots = {}
+                self._company_ids = {}
+            snapshot = self._snapshots.get(table)
+            if snapshot is None or time.monotonic() - snapshot.loaded_at >= self.ttl_seconds:
+                snapshot = self._loaders[table]()
+                self._snapshots[table] = snapshot
+                if table == 'products':
+                    self._company_ids = {}
+                logger.debug(f"🗂️ Loaded {len(snapshot.rows)} {table} into the metadata registry")
+            return snapshot
+
+    def _load_platforms(self) -> _Snapshot:
+        platforms = self.db_manager.get_platforms(active_only=False)
+        return _Snapshot(platforms, {
+            'id': {p['id']: p for p in platforms},
+            'name': {p['name']: p for p in platforms}
+        })
+
+    def _load_products(self) -> _Snapshot:
+        products = self.db_manager.get_products(active_only=False)
+        by_name: Dict[str, Dict] = {}
+        for product in products:
+            by_name.setdefault(product['name'], product)
+        return _Snapshot(products, {
+            'id': {p['id']: p for p in products},
+            'name': by_name,
+            'name_company': {(p['name'], p['company']): p for p in products}
+        })
+
+    def _load_mappings(self) -> _Snapshot:
+        mappings = self.db_manager.get_product_mappings()
+        by_product: Dict[int, List[Dict]] = {}
+        for mapping in mappings:
+            by_product.setdefault(mapping['product_id'], []).append(mapping)
+        return _Snapshot(mappings, {
+            'id': {m['id']: m for m in mappings},
+            'product': by_product,
+            'product_platform': {(m['product_id'], m['platform_id']): m for m in mappings}
+        })
+
+    # Platforms
+    def platforms(self, active_only: bool = True) -> List[Dict]:
+        """Platforms ordered by display name, as DatabaseManager.get_platforms"""
+        rows = self._snapshot('platforms').rows
+        return [p for p in rows if p.get('is_active')] if active_only else list(rows)
+
+    def platform(self, platform_id: int) -> Optional[Dict]:
+        return self._snapshot('platforms').indexes['id'].get(platform_id)
+
+    def platform_by_name(self, name: str) -> Optional[Dict]:
+        """Platform by database name ('google_play') or scraper key ('google')"""
+        return self._snapshot('platforms').indexes['name'].get(PLATFORM_KEYS.get(name, name))
+
+    def platform_id(self, name: str) -> int:
+        """Platform ID by database name or scraper key; ValueError when unknown"""
+        platform = self.platform_by_name(name)
+        if not platform:
+            raise ValueError(f"Platform {name} not found in database")
+        return platform['id']
+
+    def platform_key(self, platform_id: int) -> Optional[str]:
+        """Scraper key ('google') of a platform ID, or its database name when no scraper uses a key"""
+        platform = self.platform(platform_id)
+        if not platform:
+            return None
+        return next((key for key, name in PLATFORM_KEYS.items() if name == platform['name']), platform['name'])
+
+    # Products
+    def products(self, active_only: bool = True) -> List[Dict]:
+        """Products ordered by company and name, as DatabaseManager.get_products"""
+        rows = self._snapshot('products').rows
+        return [p for p in rows if p.get('is_active')] if active_only else list(rows)
+
+    def product(self, product_id: int) -> Optional[Dict]:
+        return self._snapshot('products').indexes['id'].get(product_id)
+
+    def product_by_name(self, name: str, company: Optional[str] = None) -> Optional[Dict]:
+        indexes = self._snapshot('products').indexes
+        if company:
+            return indexes['name_company'].get((name, company))
+        return indexes['name'].get(name)
+
+    def product_label(self, product_id: int) -> str:
+        """Product context given to the analyzers: "<name> by <company>" """
+        product = self.product(product_id)
+        return f"{product['name']} by {product['company']}" if product else "Unknown Product"
+
+    def product_labels(self) -> Dict[int, str]:
+        return {p['id']: f"{p['name']} by {p['company']}" for p in self._snapshot('products').rows}
+
+    def product_ids_for_company(self, company: str) -> List[int]:
+        """Product IDs whose company matches a COMPANY_ALIASES entry (or contains
+        the given name); computed once per products snapshot"""
+        snapshot = self._snapshot('products')
+        with self._lock:
+            if company in self._company_ids:
+                return list(self._company_ids[company])
+        patterns = [pattern.lower() for pattern in COMPANY_ALIASES.get(company, [company])]
+        product_ids = [p['id'] for p in snapshot.rows
+                       if any(pattern in (p.get('company') or '').lower() for pattern in patterns)]
+        with self._lock:
+            self._company_ids[company] = product_ids
+        return list(product_ids)
+
+    # Product-platform mappings
+    def mappings(self, product_id: Optional[int] = None, platform_id: Optional[int] = None) -> List[Dict]:
+        """Active mappings with product and platform names, as DatabaseManager.get_product_mappings"""
+        snapshot = self._snapshot('mappings')
+        if product_id and platform_id:
+            mapping = snapshot.indexes['product_platform'].get((product_id, platform_id))
+            return [mapping] if mapping else []
+        if product_id:
+            return list(snapshot.indexes['product'].get(product_id, []))
+        if platform_id:
+            return [m for m in snapshot.rows if m['platform_id'] == platform_id]
+        return list(snapshot.rows)
+
+    def mapping(self, mapping_id: int) -> Optional[Dict]:
+        return self._snapshot('mappings').indexes['id'].get(mapping_id)
+
+    def mapping_for(self, product_id: int, platform_id: int) -> Optional[Dict]:
+        return self._snapshot('mappings').indexes['product_platform'].get((product_id, platform_id))
+
+
+_registry: Optional[MetadataRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_metadata_registry() -> MetadataRegistry:
+    """Process-wide registry on the shared database manager"""
+    global _registry
+    with _registry_lock:
+        if _registry is None or _registry.db_manager is not get_db_manager():
+            _registry = MetadataRegistry()
+        return _registry
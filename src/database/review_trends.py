@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Review trend rollups
+Backfills the review_trends table; day-to-day maintenance happens on write
+(DatabaseManager.insert_reviews and BulkResultWriter refresh touched buckets)
+"""
+
+import os
+import sys
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+# Local imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.manager import DatabaseManager, get_db_manager
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def backfill_review_trends(db_manager: DatabaseManager, since: Optional[datetime] = None,
+                           until: Optional[datetime] = None, window_days: int = 30) -> int:
+    """Rebuild every trend bucket for reviews dated in [since, until).
+
+    Works through the range in window_days slices, newest first, so each
+    refresh call stays well under the API statement timeout. Buckets that
+    straddle a slice boundary are rebuilt in full either way.
+    """
+    if since is None:
+        first = db_manager.get_review_aggregates()[0]['first_review_date']
+        if first is None:
+            logger.info("📭 No reviews to roll up")
+            return 0
+        since = datetime.fromisoformat(first.replace('Z', '+00:00'))
+    until = until or datetime.now(timezone.utc) + timedelta(days=1)
+
+    total = 0
+    window_end = until
+    while window_end > since:
+        window_start = max(since, window_end - timedelta(days=window_days))
+        refreshed = db_manager.refresh_review_trends(since=window_start, until=window_end)
+        total += refreshed
+        logger.info(f"📈 {window_start.date()} → {window_end.date()}: {refreshed} trend buckets refreshed")
+        window_end = window_start
+
+    logger.info(f"✅ Backfill complete: {total} trend buckets refreshed")
+    return total
+
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Review trend rollup maintenance")
+    parser.add_argument('--since', type=str, help='Start date (YYYY-MM-DD), default: oldest review')
+    parser.add_argument('--until', type=str, help='End date (YYYY-MM-DD, exclusive), default: now')
+    parser.add_argument('--window_days', type=int, default=30, help='Days refreshed per call')
+    args = parser.parse_args()
+
+    def parse_date(value: Optional[str]) -> Optional[datetime]:
+        return datetime.strptime(value, '%Y-%m-%d').replace(tzinfo=timezone.utc) if value else None
+
+    backfill_review_trends(get_db_manager(), parse_date(args.since), parse_date(args.until), args.window_days)
+
+
+if __name__ == "__main__":
+    main()
@@ -268,16 +268,661 @@ CREATE TABLE IF NOT EXISTS ai_models (
     updated_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- 10. Bulk AI Result Write-back (one PostgREST round-trip per batch)
+-- results: [{"id": 1, "sentiment_score": 0.5, ..., "analysis": {"emotion_scores": {...}, ...}}, ...]
+-- Columns missing from an entry keep their current value.
+CREATE OR REPLACE FUNCTION apply_review_results(results JSONB)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    updated_count INTEGER;
+BEGIN
+    UPDATE reviews r SET
+        sentiment_score = COALESCE(u.sentiment_score, r.sentiment_score),
+        sentiment_label = COALESCE(u.sentiment_label, r.sentiment_label),
+        confidence_score = COALESCE(u.confidence_score, r.confidence_score),
+        key_topics = COALESCE(u.key_topics, r.key_topics),
+        issues_mentioned = COALESCE(u.issues_mentioned, r.issues_mentioned),
+        features_mentioned = COALESCE(u.features_mentioned, r.features_mentioned),
+        competitive_mentions = COALESCE(u.competitive_mentions, r.competitive_mentions),
+        suggested_improvements = COALESCE(u.suggested_improvements, r.suggested_improvements),
+        priority_level = COALESCE(u.priority_level, r.priority_level),
+        requires_response = COALESCE(u.requires_response, r.requires_response),
+        ai_model_used = COALESCE(u.ai_model_used, r.ai_model_used),
+        processing_version = COALESCE(u.processing_version, r.processing_version),
+        processing_duration_ms = COALESCE(u.processing_duration_ms, r.processing_duration_ms),
+        processed_at = COALESCE(u.processed_at, NOW()),
+        updated_at = NOW()
+    FROM jsonb_to_recordset(results) AS u(
+        id INTEGER,
+        sentiment_score DECIMAL(4,3),
+        sentiment_label VARCHAR(20),
+        confidence_score DECIMAL(4,3),
+        key_topics JSONB,
+        issues_mentioned JSONB,
+        features_mentioned JSONB,
+        competitive_mentions JSONB,
+        suggested_improvements TEXT,
+        priority_level VARCHAR(10),
+        requires_response BOOLEAN,
+        ai_model_used VARCHAR(50),
+        processing_version VARCHAR(10),
+        processing_duration_ms INTEGER,
+        processed_at TIMESTAMPTZ
+    )
+    WHERE r.id = u.id;
+    
+    GET DIAGNOSTICS updated_count = ROW_COUNT;
+    
+    INSERT INTO review_analysis (
+        review_id, emotion_scores, aspect_sentiment, subjectivity_score, primary_topic,
+        topic_distribution, intent_type, action_required, escalation_needed,
+        competitor_mentions, switching_intent, churn_risk_score, upsell_opportunity
+    )
+    SELECT
+        (item->>'id')::INTEGER, a.emotion_scores, a.aspect_sentiment, a.subjectivity_score, a.primary_topic,
+        a.topic_distribution, a.intent_type, a.action_required, a.escalation_needed,
+        a.competitor_mentions, a.switching_intent, a.churn_risk_score, a.upsell_opportunity
+    FROM jsonb_array_elements(results) AS item,
+    LATERAL jsonb_to_record(item->'analysis') AS a(
+        emotion_scores JSONB,
+        aspect_sentiment JSONB,
+        subjectivity_score DECIMAL(4,3),
+        primary_topic VARCHAR(100),
+        topic_distribution JSONB,
+        intent_type VARCHAR(30),
+        action_required BOOLEAN,
+        escalation_needed BOOLEAN,
+        competitor_mentions JSONB,
+        switching_intent BOOLEAN,
+        churn_risk_score DECIMAL(4,3),
+        upsell_opportunity BOOLEAN
+    )
+    WHERE jsonb_typeof(item->'analysis') = 'object'
+    ON CONFLICT (review_id) DO UPDATE SET
+        emotion_scores = EXCLUDED.emotion_scores,
+        aspect_sentiment = EXCLUDED.aspect_sentiment,
+        subjectivity_score = EXCLUDED.subjectivity_score,
+        primary_topic = EXCLUDED.primary_topic,
+        topic_distribution = EXCLUDED.topic_distribution,
+        intent_type = EXCLUDED.intent_type,
+        action_required = EXCLUDED.action_required,
+        escalation_needed = EXCLUDED.escalation_needed,
+        competitor_mentions = EXCLUDED.competitor_mentions,
+        switching_intent = EXCLUDED.switching_intent,
+        churn_risk_score = EXCLUDED.churn_risk_score,
+        upsell_opportunity = EXCLUDED.upsell_opportunity,
+        updated_at = NOW();
+    
+    RETURN updated_count;
+END;
+$$;
+
+-- 11. Review Aggregates (exact counts per product / platform / year in one query)
+-- Callers roll the rows up to coarser groupings; used via RPC or direct SQL.
+CREATE OR REPLACE FUNCTION review_aggregates(
+    p_product_ids INTEGER[] DEFAULT NULL,
+    p_platform_ids INTEGER[] DEFAULT NULL,
+    p_unprocessed_only BOOLEAN DEFAULT FALSE
+)
+RETURNS TABLE (
+    product_id INTEGER,
+    platform_id INTEGER,
+    year INTEGER,
+    review_count BIGINT,
+    processed_count BIGINT,
+    first_review_date TIMESTAMPTZ,
+    last_review_date TIMESTAMPTZ
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        r.product_id,
+        r.platform_id,
+        EXTRACT(YEAR FROM r.review_date)::INTEGER,
+        COUNT(*),
+        COUNT(r.processed_at),
+        MIN(r.review_date),
+        MAX(r.review_date)
+    FROM reviews r
+    WHERE (p_product_ids IS NULL OR r.product_id = ANY(p_product_ids))
+    AND (p_platform_ids IS NULL OR r.platform_id = ANY(p_platform_ids))
+    AND (NOT p_unprocessed_only OR r.processed_at IS NULL)
+    GROUP BY 1, 2, 3;
+$$;
+
+-- 12. Review Trend Rollups
+-- Term counts across a set of JSONB arrays, e.g. top_json_terms(array_agg(key_topics))
+CREATE OR REPLACE FUNCTION top_json_terms(arrays JSONB[], max_terms INTEGER DEFAULT 25)
+RETURNS JSONB
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT COALESCE(jsonb_object_agg(term, mentions), '{}'::jsonb)
+    FROM (
+        SELECT term, COUNT(*) AS mentions
+        FROM unnest(arrays) AS a(doc),
+             jsonb_array_elements_text(CASE WHEN jsonb_typeof(doc) = 'array' THEN doc ELSE '[]'::jsonb END) AS term
+        GROUP BY term
+        ORDER BY mentions DESC, term
+        LIMIT max_terms
+    ) terms;
+$$;
+
+-- Recompute the daily/weekly/monthly review_trends buckets touched by the given
+-- reviews (or by every review dated in [p_since, p_until) when no ids are given).
+-- Buckets are UTC calendar periods (ISO weeks) and are always rebuilt from the
+-- full bucket contents, so refreshing is idempotent. Returns buckets written.
+CREATE OR REPLACE FUNCTION refresh_review_trends(
+    p_review_ids INTEGER[] DEFAULT NULL,
+    p_since TIMESTAMPTZ DEFAULT NULL,
+    p_until TIMESTAMPTZ DEFAULT NULL
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    refreshed_count INTEGER;
+BEGIN
+    WITH periods(period_type, unit, step) AS (
+        VALUES ('daily', 'day', INTERVAL '1 day'),
+               ('weekly', 'week', INTERVAL '1 week'),
+               ('monthly', 'month', INTERVAL '1 month')
+    ),
+    touched AS (
+        SELECT DISTINCT
+            r.product_id,
+            r.platform_id,
+            p.period_type,
+            date_trunc(p.unit, r.review_date AT TIME ZONE 'UTC') AS bucket_start,
+            date_trunc(p.unit, r.review_date AT TIME ZONE 'UTC') + p.step AS bucket_end
+        FROM reviews r
+        CROSS JOIN periods p
+        WHERE r.product_id IS NOT NULL
+        AND r.platform_id IS NOT NULL
+        AND (p_review_ids IS NULL OR r.id = ANY(p_review_ids))
+        AND (p_since IS NULL OR r.review_date >= p_since)
+        AND (p_until IS NULL OR r.review_date < p_until)
+    ),
+    upserted AS (
+        INSERT INTO review_trends (
+            product_id, platform_id, period_type, period_start, period_end,
+            total_reviews, average_rating, rating_distribution,
+            positive_reviews, negative_reviews, neutral_reviews, average_sentiment,
+            trending_topics, trending_issues, trending_features,
+            competitor_mention_count, switching_intent_count
+        )
+        SELECT
+            t.product_id,
+            t.platform_id,
+            t.period_type,
+            t.bucket_start::DATE,
+            (t.bucket_end - INTERVAL '1 day')::DATE,
+            s.total_reviews,
+            s.average_rating,
+            s.rating_distribution,
+            s.positive_reviews,
+            s.negative_reviews,
+            s.neutral_reviews,
+            s.average_sentiment,
+            s.trending_topics,
+            s.trending_issues,
+            s.trending_features,
+            s.competitor_mention_count,
+            s.switching_intent_count
+        FROM touched t
+        CROSS JOIN LATERAL (
+            SELECT
+                COUNT(*) AS total_reviews,
+                ROUND(AVG(r.rating), 2) AS average_rating,
+                jsonb_build_object(
+                    '1', COUNT(*) FILTER (WHERE r.rating = 1),
+                    '2', COUNT(*) FILTER (WHERE r.rating = 2),
+                    '3', COUNT(*) FILTER (WHERE r.rating = 3),
+                    '4', COUNT(*) FILTER (WHERE r.rating = 4),
+                    '5', COUNT(*) FILTER (WHERE r.rating = 5)
+                ) AS rating_distribution,
+                COUNT(*) FILTER (WHERE r.sentiment_label = 'positive') AS positive_reviews,
+                COUNT(*) FILTER (WHERE r.sentiment_label = 'negative') AS negative_reviews,
+                COUNT(*) FILTER (WHERE r.sentiment_label = 'neutral') AS neutral_reviews,
+                ROUND(AVG(r.sentiment_score), 3) AS average_sentiment,
+                top_json_terms(array_agg(r.key_topics)) AS trending_topics,
+                top_json_terms(array_agg(r.issues_mentioned)) AS trending_issues,
+                top_json_terms(array_agg(r.features_mentioned)) AS trending_features,
+                COUNT(*) FILTER (
+                    WHERE jsonb_typeof(r.competitive_mentions) = 'array'
+                    AND jsonb_array_length(r.competitive_mentions) > 0
+                ) AS competitor_mention_count,
+                COUNT(*) FILTER (WHERE ra.switching_intent) AS switching_intent_count
+            FROM reviews r
+            LEFT JOIN review_analysis ra ON ra.review_id = r.id
+            WHERE r.product_id = t.product_id
+            AND r.platform_id = t.platform_id
+            AND r.review_date >= t.bucket_start AT TIME ZONE 'UTC'
+            AND r.review_date < t.bucket_end AT TIME ZONE 'UTC'
+        ) s
+        ON CONFLICT (product_id, platform_id, period_type, period_start)
+        DO UPDATE SET
+            period_end = EXCLUDED.period_end,
+            total_reviews = EXCLUDED.total_reviews,
+            average_rating = EXCLUDED.average_rating,
+            rating_distribution = EXCLUDED.rating_distribution,
+            positive_reviews = EXCLUDED.positive_reviews,
+            negative_reviews = EXCLUDED.negative_reviews,
+            neutral_reviews = EXCLUDED.neutral_reviews,
+            average_sentiment = EXCLUDED.average_sentiment,
+            trending_topics = EXCLUDED.trending_topics,
+            trending_issues = EXCLUDED.trending_issues,
+            trending_features = EXCLUDED.trending_features,
+            competitor_mention_count = EXCLUDED.competitor_mention_count,
+            switching_intent_count = EXCLUDED.switching_intent_count
+        RETURNING 1
+    )
+    SELECT COUNT(*) INTO refreshed_count FROM upserted;
+    
+    RETURN refreshed_count;
+END;
+$$;
+
+-- 13. Collection Watermarks (per product/platform high-water marks)
+-- Kept current by triggers in the same transaction as each review insert and
+-- each completed collection job, so planning an incremental refresh never has
+-- to scan reviews.
+CREATE TABLE IF NOT EXISTS collection_watermarks (
+    product_id INTEGER REFERENCES products(id) ON DELETE CASCADE,
+    platform_id INTEGER REFERENCES platforms(id) ON DELETE CASCADE,
+    latest_review_date TIMESTAMPTZ,
+    latest_review_id INTEGER,
+    latest_platform_review_id VARCHAR(255),
+    total_reviews INTEGER NOT NULL DEFAULT 0,
+    last_successful_run_at TIMESTAMPTZ,
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (product_id, platform_id)
+);
+
+-- Statement-level: one upsert per (product, platform) per insert batch. Only
+-- newly inserted rows are in new_reviews (upserted duplicates are updates).
+CREATE OR REPLACE FUNCTION advance_collection_watermarks()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO collection_watermarks AS w (
+        product_id, platform_id, latest_review_date, latest_review_id,
+        latest_platform_review_id, total_reviews, updated_at
+    )
+    SELECT DISTINCT ON (n.product_id, n.platform_id)
+        n.product_id,
+        n.platform_id,
+        n.review_date,
+        n.id,
+        n.platform_review_id,
+        COUNT(*) OVER (PARTITION BY n.product_id, n.platform_id),
+        NOW()
+    FROM new_reviews n
+    WHERE n.product_id IS NOT NULL AND n.platform_id IS NOT NULL
+    ORDER BY n.product_id, n.platform_id, n.review_date DESC NULLS LAST, n.id DESC
+    ON CONFLICT (product_id, platform_id) DO UPDATE SET
+        total_reviews = w.total_reviews + EXCLUDED.total_reviews,
+        latest_review_date = GREATEST(w.latest_review_date, EXCLUDED.latest_review_date),
+        latest_review_id = CASE
+            WHEN w.latest_review_date IS NULL OR EXCLUDED.latest_review_date > w.latest_review_date
+            THEN EXCLUDED.latest_review_id ELSE w.latest_review_id END,
+        latest_platform_review_id = CASE
+            WHEN w.latest_review_date IS NULL OR EXCLUDED.latest_review_date > w.latest_review_date
+            THEN EXCLUDED.latest_platform_review_id ELSE w.latest_platform_review_id END,
+        updated_at = NOW();
+    
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS reviews_advance_watermarks ON reviews;
+CREATE TRIGGER reviews_advance_watermarks
+    AFTER INSERT ON reviews
+    REFERENCING NEW TABLE AS new_reviews
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION advance_collection_watermarks();
+
+CREATE OR REPLACE FUNCTION record_collection_run()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO collection_watermarks (product_id, platform_id, last_successful_run_at, updated_at)
+    VALUES (NEW.product_id, NEW.platform_id, COALESCE(NEW.completed_at, NOW()), NOW())
+    ON CONFLICT (product_id, platform_id) DO UPDATE SET
+        last_successful_run_at = EXCLUDED.last_successful_run_at,
+        updated_at = NOW();
+    
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS collection_jobs_record_run ON collection_jobs;
+CREATE TRIGGER collection_jobs_record_run
+    AFTER UPDATE OF status ON collection_jobs
+    FOR EACH ROW
+    WHEN (NEW.status = 'completed' AND OLD.status IS DISTINCT FROM 'completed'
+          AND NEW.product_id IS NOT NULL AND NEW.platform_id IS NOT NULL)
+    EXECUTE FUNCTION record_collection_run();
+
+-- Recompute latest review and count from reviews (initial seed, or repair after
+-- deleting reviews). Returns watermarks written.
+CREATE OR REPLACE FUNCTION rebuild_collection_watermarks()
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    rebuilt_count INTEGER;
+BEGIN
+    WITH upserted AS (
+        INSERT INTO collection_watermarks AS w (
+            product_id, platform_id, latest_review_date, latest_review_id,
+            latest_platform_review_id, total_reviews, updated_at
+        )
+        SELECT DISTINCT ON (r.product_id, r.platform_id)
+            r.product_id,
+            r.platform_id,
+            r.review_date,
+            r.id,
+            r.platform_review_id,
+            COUNT(*) OVER (PARTITION BY r.product_id, r.platform_id),
+            NOW()
+        FROM reviews r
+        WHERE r.product_id IS NOT NULL AND r.platform_id IS NOT NULL
+        ORDER BY r.product_id, r.platform_id, r.review_date DESC NULLS LAST, r.id DESC
+        ON CONFLICT (product_id, platform_id) DO UPDATE SET
+            latest_review_date = EXCLUDED.latest_review_date,
+            latest_review_id = EXCLUDED.latest_review_id,
+            latest_platform_review_id = EXCLUDED.latest_platform_review_id,
+            total_reviews = EXCLUDED.total_reviews,
+            updated_at = NOW()
+        RETURNING 1
+    )
+    SELECT COUNT(*) INTO rebuilt_count FROM upserted;
+    
+    RETURN rebuilt_count;
+END;
+$$;
+
+-- Watermarks for every active product-platform mapping (zeroes when never collected)
+CREATE OR REPLACE FUNCTION active_collection_watermarks()
+RETURNS TABLE (
+    product_id INTEGER,
+    platform_id INTEGER,
+    latest_review_date TIMESTAMPTZ,
+    latest_review_id INTEGER,
+    latest_platform_review_id VARCHAR(255),
+    total_reviews INTEGER,
+    last_successful_run_at TIMESTAMPTZ
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        m.product_id,
+        m.platform_id,
+        w.latest_review_date,
+        w.latest_review_id,
+        w.latest_platform_review_id,
+        COALESCE(w.total_reviews, 0),
+        w.last_successful_run_at
+    FROM product_platform_mappings m
+    LEFT JOIN collection_watermarks w
+        ON w.product_id = m.product_id AND w.platform_id = m.platform_id
+    WHERE m.is_active = true;
+$$;
+
+SELECT rebuild_collection_watermarks();
+
+-- 14. Analysis Attempts (poison-review backoff and dead letter)
+-- Reviews whose analysis keeps failing are retried with exponential backoff and
+-- parked once they reach max_attempts, so the backlog query only returns rows
+-- that are eligible now and every batch makes forward progress.
+ALTER TABLE reviews ADD COLUMN IF NOT EXISTS analysis_attempts INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE reviews ADD COLUMN IF NOT EXISTS analysis_last_error TEXT;
+ALTER TABLE reviews ADD COLUMN IF NOT EXISTS analysis_next_attempt_at TIMESTAMPTZ;
+ALTER TABLE reviews ADD COLUMN IF NOT EXISTS analysis_dead_lettered_at TIMESTAMPTZ;
+
+-- failures: [{"id": 1, "error": "..."}, ...]. Returns one row per review with its
+-- attempt count and whether it is now dead-lettered.
+CREATE OR REPLACE FUNCTION record_analysis_failures(
+    failures JSONB,
+    max_attempts INTEGER DEFAULT 5,
+    base_delay_seconds INTEGER DEFAULT 300,
+    max_delay_seconds INTEGER DEFAULT 86400
+)
+RETURNS TABLE (review_id INTEGER, attempts INTEGER, dead_lettered BOOLEAN)
+LANGUAGE sql
+AS $$
+    UPDATE reviews r SET
+        analysis_attempts = r.analysis_attempts + 1,
+        analysis_last_error = LEFT(f.error, 2000),
+        analysis_next_attempt_at = NOW() + make_interval(secs => LEAST(
+            max_delay_seconds::DOUBLE PRECISION,
+            base_delay_seconds * power(2, LEAST(r.analysis_attempts, 30))
+        )),
+        analysis_dead_lettered_at = CASE
+            WHEN r.analysis_attempts + 1 >= max_attempts THEN NOW()
+            ELSE r.analysis_dead_lettered_at
+        END,
+        updated_at = NOW()
+    FROM jsonb_to_recordset(failures) AS f(id INTEGER, error TEXT)
+    WHERE r.id = f.id AND r.processed_at IS NULL
+    RETURNING r.id, r.analysis_attempts, r.analysis_dead_lettered_at IS NOT NULL;
+$$;
+
+-- Put dead-lettered reviews back in the backlog (all of them when no ids are
+-- given), e.g. after fixing the prompt or parser. Returns reviews requeued.
+CREATE OR REPLACE FUNCTION requeue_dead_lettered_reviews(p_review_ids INTEGER[] DEFAULT NULL)
+RETURNS INTEGER
+LANGUAGE sql
+AS $$
+    WITH requeued AS (
+        UPDATE reviews SET
+            analysis_attempts = 0,
+            analysis_next_attempt_at = NULL,
+            analysis_dead_lettered_at = NULL,
+            updated_at = NOW()
+        WHERE analysis_dead_lettered_at IS NOT NULL
+        AND processed_at IS NULL
+        AND (p_review_ids IS NULL OR id = ANY(p_review_ids))
+        RETURNING 1
+    )
+    SELECT COUNT(*)::INTEGER FROM requeued;
+$$;
+
+-- 15. Content Fingerprints (re-collection only rewrites reviews that changed)
+-- Re-scraped reviews whose title, content and rating are unchanged are left
+-- untouched; edited ones are updated and returned to the analysis backlog.
+CREATE OR REPLACE FUNCTION review_fingerprint(p_title TEXT, p_content TEXT, p_rating INTEGER)
+RETURNS TEXT
+LANGUAGE sql
+IMMUTABLE PARALLEL SAFE
+AS $$
+    SELECT md5(COALESCE(p_title, '') || E'\x1f' || COALESCE(p_content, '') || E'\x1f' || COALESCE(p_rating::TEXT, ''));
+$$;
+
+ALTER TABLE reviews ADD COLUMN IF NOT EXISTS content_fingerprint TEXT
+    GENERATED ALWAYS AS (review_fingerprint(title, content, rating)) STORED;
+
+-- p_reviews: [{"product_id": 1, "platform_id": 1, "platform_review_id": "...", ...}, ...]
+-- Returns the reviews that were inserted or changed; unchanged ones are skipped.
+CREATE OR REPLACE FUNCTION merge_reviews(p_reviews JSONB)
+RETURNS TABLE (review_id INTEGER, inserted BOOLEAN)
+LANGUAGE sql
+AS $$
+    INSERT INTO reviews AS r (
+        product_id, platform_id, platform_review_id, user_name, user_id, title, content, rating,
+        review_date, country_code, country_name, language_code, language_name, helpful_count,
+        total_votes, verified_purchase, version_reviewed, review_source_url, word_count, character_count
+    )
+    SELECT
+        n.product_id, n.platform_id, n.platform_review_id, n.user_name, n.user_id, n.title, n.content, n.rating,
+        n.review_date, n.country_code, n.country_name, n.language_code, n.language_name, COALESCE(n.helpful_count, 0),
+        COALESCE(n.total_votes, 0), n.verified_purchase, n.version_reviewed, n.review_source_url, n.word_count, n.character_count
+    FROM jsonb_to_recordset(p_reviews) AS n(
+        product_id INTEGER,
+        platform_id INTEGER,
+        platform_review_id VARCHAR(255),
+        user_name VARCHAR(255),
+        user_id VARCHAR(255),
+        title VARCHAR(500),
+        content TEXT,
+        rating INTEGER,
+        review_date TIMESTAMPTZ,
+        country_code VARCHAR(3),
+        country_name VARCHAR(100),
+        language_code VARCHAR(5),
+        language_name VARCHAR(50),
+        helpful_count INTEGER,
+        total_votes INTEGER,
+        verified_purchase BOOLEAN,
+        version_reviewed VARCHAR(50),
+        review_source_url VARCHAR(500),
+        word_count INTEGER,
+        character_count INTEGER
+    )
+    ON CONFLICT (platform_id, platform_review_id) DO UPDATE SET
+        product_id = EXCLUDED.product_id,
+        user_name = EXCLUDED.user_name,
+        user_id = EXCLUDED.user_id,
+        title = EXCLUDED.title,
+        content = EXCLUDED.content,
+        rating = EXCLUDED.rating,
+        review_date = EXCLUDED.review_date,
+        country_code = EXCLUDED.country_code,
+        country_name = EXCLUDED.country_name,
+        language_code = EXCLUDED.language_code,
+        language_name = EXCLUDED.language_name,
+        helpful_count = EXCLUDED.helpful_count,
+        total_votes = EXCLUDED.total_votes,
+        verified_purchase = EXCLUDED.verified_purchase,
+        version_reviewed = EXCLUDED.version_reviewed,
+        review_source_url = EXCLUDED.review_source_url,
+        word_count = EXCLUDED.word_count,
+        character_count = EXCLUDED.character_count,
+        processed_at = NULL,
+        analysis_attempts = 0,
+        analysis_last_error = NULL,
+        analysis_next_attempt_at = NULL,
+        analysis_dead_lettered_at = NULL,
+        updated_at = NOW()
+    WHERE r.content_fingerprint IS DISTINCT FROM review_fingerprint(EXCLUDED.title, EXCLUDED.content, EXCLUDED.rating)
+    RETURNING r.id, r.xmax = 0;
+$$;
+
+-- 16. Review Quarantine (rows a merge rejected, kept for inspection)
+-- Ingest bisects a failing chunk down to the rows that cause the error; only
+-- those land here, so the rest of the load still completes in one pass.
+CREATE TABLE IF NOT EXISTS review_quarantine (
+    id SERIAL PRIMARY KEY,
+    product_id INTEGER,
+    platform_id INTEGER,
+    platform_review_id TEXT,
+    payload JSONB NOT NULL,
+    error TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- 17. Analysis Leases (work queue for any number of analysis workers)
+-- A worker claims backlog reviews with FOR UPDATE SKIP LOCKED and stamps them
+-- with its id and a lease expiry, so concurrent claims never return the same
+-- row. Workers renew their leases while analyzing (heartbeat) and release them
+-- when done; leases of a crashed worker simply expire and the rows are
+-- claimable again.
+ALTER TABLE reviews ADD COLUMN IF NOT EXISTS analysis_lease_owner TEXT;
+ALTER TABLE reviews ADD COLUMN IF NOT EXISTS analysis_lease_expires_at TIMESTAMPTZ;
+
+-- Claim up to p_limit reviews that are in the analysis backlog and not leased,
+-- optionally restricted to some products and to one review_date year.
+CREATE OR REPLACE FUNCTION claim_analysis_batch(
+    p_worker TEXT,
+    p_limit INTEGER,
+    p_lease_seconds INTEGER DEFAULT 600,
+    p_product_ids INTEGER[] DEFAULT NULL,
+    p_year INTEGER DEFAULT NULL
+)
+RETURNS SETOF reviews
+LANGUAGE sql
+AS $$
+    WITH claimable AS (
+        SELECT id FROM reviews
+        WHERE processed_at IS NULL
+        AND analysis_dead_lettered_at IS NULL
+        AND (analysis_next_attempt_at IS NULL OR analysis_next_attempt_at <= NOW())
+        AND (analysis_lease_expires_at IS NULL OR analysis_lease_expires_at <= NOW())
+        AND (p_product_ids IS NULL OR product_id = ANY(p_product_ids))
+        AND (p_year IS NULL OR (review_date >= make_date(p_year, 1, 1)
+                                AND review_date < make_date(p_year + 1, 1, 1)))
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE reviews r SET
+        analysis_lease_owner = p_worker,
+        analysis_lease_expires_at = NOW() + make_interval(secs => p_lease_seconds)
+    FROM claimable c
+    WHERE r.id = c.id
+    RETURNING r.*;
+$$;
+
+-- Heartbeat: extend the worker's leases that are still its own. Returns the ids
+-- renewed; a missing id means the lease expired and another worker took it.
+CREATE OR REPLACE FUNCTION renew_analysis_leases(
+    p_worker TEXT,
+    p_review_ids INTEGER[],
+    p_lease_seconds INTEGER DEFAULT 600
+)
+RETURNS TABLE (review_id INTEGER)
+LANGUAGE sql
+AS $$
+    UPDATE reviews SET
+        analysis_lease_expires_at = NOW() + make_interval(secs => p_lease_seconds)
+    WHERE id = ANY(p_review_ids)
+    AND analysis_lease_owner = p_worker
+    RETURNING id;
+$$;
+
+-- Give up the worker's leases (all of them when no ids are given). Analyzed
+-- reviews have left the backlog by then; the rest are claimable right away.
+-- Returns leases released.
+CREATE OR REPLACE FUNCTION release_analysis_leases(p_worker TEXT, p_review_ids INTEGER[] DEFAULT NULL)
+RETURNS INTEGER
+LANGUAGE sql
+AS $$
+    WITH released AS (
+        UPDATE reviews SET
+            analysis_lease_owner = NULL,
+            analysis_lease_expires_at = NULL
+        WHERE analysis_lease_owner = p_worker
+        AND (p_review_ids IS NULL OR id = ANY(p_review_ids))
+        RETURNING 1
+    )
+    SELECT COUNT(*)::INTEGER FROM released;
+$$;
+
 -- Create Indexes for Performance
 CREATE INDEX IF NOT EXISTS idx_reviews_product_platform ON reviews(product_id, platform_id);
 CREATE INDEX IF NOT EXISTS idx_reviews_date ON reviews(review_date);
+CREATE INDEX IF NOT EXISTS idx_reviews_date_id ON reviews(review_date DESC, id DESC);
 CREATE INDEX IF NOT EXISTS idx_reviews_sentiment ON reviews(sentiment_label);
 CREATE INDEX IF NOT EXISTS idx_reviews_rating ON reviews(rating);
 CREATE INDEX IF NOT EXISTS idx_reviews_country ON reviews(country_code);
 CREATE INDEX IF NOT EXISTS idx_reviews_processing ON reviews(processed_at);
+CREATE INDEX IF NOT EXISTS idx_reviews_aggregate ON reviews(product_id, platform_id, review_date) INCLUDE (processed_at);
+CREATE INDEX IF NOT EXISTS idx_reviews_unprocessed ON reviews(product_id, review_date) WHERE processed_at IS NULL;
+CREATE INDEX IF NOT EXISTS idx_reviews_analysis_backlog ON reviews(analysis_next_attempt_at NULLS FIRST)
+    WHERE processed_at IS NULL AND analysis_dead_lettered_at IS NULL;
+CREATE INDEX IF NOT EXISTS idx_reviews_analysis_lease ON reviews(analysis_lease_owner)
+    WHERE analysis_lease_owner IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_review_quarantine_review ON review_quarantine(platform_id, platform_review_id);
 CREATE INDEX IF NOT EXISTS idx_collection_jobs_status ON collection_jobs(status);
 CREATE INDEX IF NOT EXISTS idx_collection_jobs_product_platform ON collection_jobs(product_id, platform_id);
 CREATE INDEX IF NOT EXISTS idx_trends_period ON review_trends(period_type, period_start);
+CREATE INDEX IF NOT EXISTS idx_trends_product_period ON review_trends(product_id, period_type, period_start);
 
 -- Create GIN indexes for JSONB columns
 CREATE INDEX IF NOT EXISTS idx_reviews_topics_gin ON reviews USING GIN(key_topics);
@@ -304,3 +949,5 @@ COMMENT ON TABLE reviews IS 'Main table storing all collected reviews from vario
 COMMENT ON TABLE review_analysis IS 'Advanced AI-powered analysis of reviews including sentiment, topics, and business intelligence';
 COMMENT ON TABLE collection_jobs IS 'Tracks data collection jobs and their progress';
 COMMENT ON TABLE review_trends IS 'Aggregated review data for performance and trend analysis';
+COMMENT ON TABLE collection_watermarks IS 'Per product/platform collection high-water marks, maintained by triggers';
+COMMENT ON TABLE review_quarantine IS 'Scraped reviews rejected at ingest, with the database error';
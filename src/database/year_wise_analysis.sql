@@ -139,22 +139,29 @@ ORDER BY
 -- ============================================================================
 -- 5. MONTHLY BREAKDOWN FOR RECENT YEARS (2023-2025)
 -- ============================================================================
+-- Read from the monthly review_trends buckets (one row per product, platform
+-- and month) instead of scanning reviews. Rollups carry no processed_at
+-- count, so sentiment-labelled reviews stand in for AI-processed ones.
 
 SELECT 
     p.company,
     p.name as product_name,
-    EXTRACT(YEAR FROM r.review_date) as year,
-    EXTRACT(MONTH FROM r.review_date) as month,
-    TO_CHAR(r.review_date, 'YYYY-MM') as year_month,
-    COUNT(r.id) as total_reviews,
-    COUNT(CASE WHEN r.processed_at IS NOT NULL THEN 1 END) as ai_processed,
-    ROUND(AVG(r.rating), 2) as avg_rating,
-    ROUND(AVG(r.sentiment_score), 3) as avg_sentiment
+    EXTRACT(YEAR FROM t.period_start) as year,
+    EXTRACT(MONTH FROM t.period_start) as month,
+    TO_CHAR(t.period_start, 'YYYY-MM') as year_month,
+    SUM(t.total_reviews) as total_reviews,
+    SUM(t.positive_reviews + t.negative_reviews + t.neutral_reviews) as sentiment_labelled,
+    ROUND(SUM(t.average_rating * t.total_reviews) / NULLIF(SUM(t.total_reviews), 0), 2) as avg_rating,
+    ROUND(
+        SUM(t.average_sentiment * (t.positive_reviews + t.negative_reviews + t.neutral_reviews)) /
+        NULLIF(SUM(CASE WHEN t.average_sentiment IS NOT NULL
+                        THEN t.positive_reviews + t.negative_reviews + t.neutral_reviews END), 0), 3
+    ) as avg_sentiment
 FROM products p 
-INNER JOIN reviews r ON p.id = r.product_id 
+INNER JOIN review_trends t ON p.id = t.product_id AND t.period_type = 'monthly'
 WHERE p.id IN (21, 22, 23)
-AND EXTRACT(YEAR FROM r.review_date) >= 2023
-GROUP BY p.company, p.name, EXTRACT(YEAR FROM r.review_date), EXTRACT(MONTH FROM r.review_date), TO_CHAR(r.review_date, 'YYYY-MM')
+AND t.period_start >= DATE '2023-01-01'
+GROUP BY p.company, p.name, t.period_start
 ORDER BY p.company, p.name, year DESC, month DESC;
 
 -- ============================================================================
@@ -265,26 +272,31 @@ ORDER BY processing_date DESC, p.company, p.name;
 -- ============================================================================
 -- 9. SENTIMENT TRENDS BY YEAR AND PRODUCT
 -- ============================================================================
+-- Summed from the monthly review_trends buckets; the average user rating
+-- covers every review in the year, not only the analyzed ones.
 
 SELECT 
     p.company,
     p.name as product_name,
-    EXTRACT(YEAR FROM r.review_date) as year,
-    COUNT(CASE WHEN r.sentiment_label = 'positive' THEN 1 END) as positive_count,
-    COUNT(CASE WHEN r.sentiment_label = 'negative' THEN 1 END) as negative_count,
-    COUNT(CASE WHEN r.sentiment_label = 'neutral' THEN 1 END) as neutral_count,
+    EXTRACT(YEAR FROM t.period_start) as year,
+    SUM(t.positive_reviews) as positive_count,
+    SUM(t.negative_reviews) as negative_count,
+    SUM(t.neutral_reviews) as neutral_count,
     ROUND(
-        COUNT(CASE WHEN r.sentiment_label = 'positive' THEN 1 END) * 100.0 / 
-        NULLIF(COUNT(CASE WHEN r.sentiment_label IS NOT NULL THEN 1 END), 0), 1
+        SUM(t.positive_reviews) * 100.0 / 
+        NULLIF(SUM(t.positive_reviews + t.negative_reviews + t.neutral_reviews), 0), 1
     ) as positive_percentage,
-    ROUND(AVG(r.sentiment_score), 3) as avg_sentiment_score,
-    ROUND(AVG(r.rating), 2) as avg_user_rating
+    ROUND(
+        SUM(t.average_sentiment * (t.positive_reviews + t.negative_reviews + t.neutral_reviews)) /
+        NULLIF(SUM(CASE WHEN t.average_sentiment IS NOT NULL
+                        THEN t.positive_reviews + t.negative_reviews + t.neutral_reviews END), 0), 3
+    ) as avg_sentiment_score,
+    ROUND(SUM(t.average_rating * t.total_reviews) / NULLIF(SUM(t.total_reviews), 0), 2) as avg_user_rating
 FROM products p 
-INNER JOIN reviews r ON p.id = r.product_id 
+INNER JOIN review_trends t ON p.id = t.product_id AND t.period_type = 'monthly'
 WHERE p.id IN (21, 22, 23)
-AND r.processed_at IS NOT NULL
-AND r.sentiment_label IS NOT NULL
-GROUP BY p.company, p.name, EXTRACT(YEAR FROM r.review_date)
+GROUP BY p.company, p.name, EXTRACT(YEAR FROM t.period_start)
+HAVING SUM(t.positive_reviews + t.negative_reviews + t.neutral_reviews) > 0
 ORDER BY p.company, p.name, year DESC;
 
 -- ============================================================================